@@ -0,0 +1,85 @@
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from src.Benchmark import generate_corpus, synthetic_queries, run_benchmark, environment
+
+
+def bench_size(ndocs, args):
+    """
+    Generate (or reuse) a corpus of ndocs documents and benchmark it.
+    Runs in its own process so peak memory is measured per corpus size.
+    """
+    data_dir = os.path.join(args.corpus_dir, f"{ndocs}docs")
+    words, cum_weights = generate_corpus(data_dir, ndocs, args.vocab, args.zipf, args.doc_length, args.seed)
+    queries = synthetic_queries(words, cum_weights, args.queries, args.seed + 1)
+    prune = None
+    if args.prune_top_n is not None or args.prune_threshold is not None or args.prune_budget is not None:
+        prune = {"top_n": args.prune_top_n, "threshold": args.prune_threshold, "budget": args.prune_budget,
+                 "by": args.prune_by}
+    result = run_benchmark(data_dir, args.stop_words, queries, args.workers, args.top_k, args.trace_memory,
+                           args.compress_postings, prune)
+    result["config"] = {"ndocs": ndocs, "vocab": args.vocab, "zipf": args.zipf,
+                        "doc_length": args.doc_length, "seed": args.seed, "workers": args.workers,
+                        "compress_postings": args.compress_postings, "prune": prune}
+    return result
+
+
+def main():
+    """
+    Benchmark ingestion, indexing and ranking on synthetic RCV1-style corpora.
+
+    Example:
+        python benchmark.py --docs 1000 10000 100000 --output bench_output.json
+
+    Each corpus size is generated once under --corpus-dir and reused by later
+    runs. Results are printed and, with --output, written as JSON so runs can be
+    compared and regressions caught.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark NewsCollection on synthetic corpora.")
+    parser.add_argument("--docs", type=int, nargs="+", default=[1000, 10000],
+                        help="Corpus sizes to benchmark (documents).")
+    parser.add_argument("--corpus-dir", default="bench_corpus", help="Where synthetic corpora are written.")
+    parser.add_argument("--stop-words", default="common-english-words.txt")
+    parser.add_argument("--vocab", type=int, default=50000, help="Synthetic vocabulary size.")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of the vocabulary.")
+    parser.add_argument("--doc-length", type=int, default=380, help="Mean words per document.")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per ranking model.")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1, help="Ingestion worker processes.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="Also record the tracemalloc peak.")
+    parser.add_argument("--compress-postings", action="store_true", help="Use compressed postings.")
+    parser.add_argument("--prune-top-n", type=int, help="Keep this many tf-idf weights per document or term.")
+    parser.add_argument("--prune-threshold", type=float, help="Drop tf-idf weights below this.")
+    parser.add_argument("--prune-budget", type=int, help="Largest pruned tf-idf index size in bytes.")
+    parser.add_argument("--prune-by", choices=["document", "term"], default="document",
+                        help="What --prune-top-n counts over.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "runs": []}
+    for ndocs in args.docs:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(bench_size, ndocs, args).result()
+        report["runs"].append(result)
+        bm25 = result["latency"]["bm25_topk"]
+        print(f"{ndocs} docs: ingest {result['ingest_docs_per_second']:.0f} docs/s, "
+              f"index {result['index_build_seconds']:.2f}s, peak RSS {result['peak_rss_kb'] // 1024} MB, "
+              f"BM25 top-{args.top_k} p50 {bm25['p50_ms']:.2f} ms p99 {bm25['p99_ms']:.2f} ms")
+        if result["pruning"]:
+            pruning = result["pruning"]
+            print(f"  pruned tf-idf: {pruning['index']['bytes']} of {pruning['index']['full_bytes']} bytes, "
+                  f"overlap@{args.top_k} {pruning['overlap'][args.top_k]:.3f}, "
+                  f"{pruning['pruned_ms']:.2f} ms vs {pruning['exact_ms']:.2f} ms per query")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
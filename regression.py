@@ -0,0 +1,68 @@
+import sys
+import json
+import argparse
+
+from src.Benchmark import environment
+from src.Regression import (GOLDEN_STEMMER_VERSION, stemmer_version, load_golden, load_results, save_results,
+                            run_pipelines, compare)
+
+
+def main():
+    """
+    Run the task 1-3 pipelines in-process and check them against the golden outputs.
+
+    Example:
+        python regression.py --repeat 5 --output regression.json
+
+    Term counts, df, tf-idf weights and the TF-IDF and BM25 rankings are compared
+    with ZachEdwards_Q1.txt, _Q2.txt and _Q3.txt by key, within the given
+    tolerance, and the time of every phase is reported. Exits with status 1
+    if any result differs.
+
+    The golden files were written with PyStemmer GOLDEN_STEMMER_VERSION; other
+    releases stem a few words differently, so the check refuses to run against
+    them. With another stemmer, record a baseline of the unmodified tree with
+    --save and check later changes against it with --baseline.
+    """
+    parser = argparse.ArgumentParser(description="Golden-output regression check with phase timings.")
+    parser.add_argument("--data-dir", default="RCV1v2")
+    parser.add_argument("--stop-words", default="common-english-words.txt")
+    parser.add_argument("--golden-dir", default=".", help="Directory holding the ZachEdwards_Q*.txt files.")
+    parser.add_argument("--rel-tol", type=float, default=1e-9, help="Relative tolerance for scores and weights.")
+    parser.add_argument("--abs-tol", type=float, default=1e-12, help="Absolute tolerance for scores and weights.")
+    parser.add_argument("--repeat", type=int, default=1, help="Times each query phase is run.")
+    parser.add_argument("--workers", type=int, default=1, help="Ingestion worker processes.")
+    parser.add_argument("--index", help="Binary index file to load or (re)build.")
+    parser.add_argument("--baseline", help="Compare with results saved by --save instead of the golden files.")
+    parser.add_argument("--save", help="Save this run's results as a baseline JSON file.")
+    parser.add_argument("--output", help="Write differences and timings as JSON to this file.")
+    args = parser.parse_args()
+
+    if not args.baseline and stemmer_version() != GOLDEN_STEMMER_VERSION:
+        parser.error(f"the golden files were written with PyStemmer {GOLDEN_STEMMER_VERSION}, "
+                     f"but {stemmer_version() or 'an unknown version'} is installed; "
+                     "compare against a --baseline saved with this stemmer instead")
+    golden = load_results(args.baseline) if args.baseline else load_golden(args.golden_dir)
+    actual, stats = run_pipelines(args.data_dir, args.stop_words, repeat=args.repeat, workers=args.workers,
+                                  index_path=args.index)
+    diffs = compare(golden, actual, args.rel_tol, args.abs_tol)
+    if args.save:
+        save_results(actual, args.save)
+
+    print(stats)
+    print()
+    for line in diffs[:50]:
+        print(line)
+    if len(diffs) > 50:
+        print(f"... and {len(diffs) - 50} more")
+    print(f"{len(diffs)} differences" if diffs else "All results match.")
+
+    if args.output:
+        report = {"environment": environment(), "differences": diffs, "timings": stats.snapshot()["stages"]}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if diffs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import asyncio
+import argparse
+
+from src.Parser import Rev1_Parser
+from src.QueryCache import QueryCache
+from src.ShardedCollection import ShardedCollection
+from src.Service import SearchService
+from src.SparseEngine import SparseEngine
+
+
+def main():
+    """
+    Load the collection once and serve TF-IDF and BM25 search over HTTP/JSON.
+
+    Example:
+        python serve.py --data-dir RCV1v2 --index rcv1.idx --port 8080
+        curl 'http://127.0.0.1:8080/search?q=Rocket+attacks&model=bm25&k=5'
+    """
+    parser = argparse.ArgumentParser(description="Serve search over a news collection.")
+    parser.add_argument("--data-dir", default="RCV1v2")
+    parser.add_argument("--stop-words", default="common-english-words.txt")
+    parser.add_argument("--index", help="Binary index file to load or (re)build.")
+    parser.add_argument("--workers", type=int, default=1, help="Ingestion worker processes.")
+    parser.add_argument("--shards", type=int, default=0, help="Serve from this many shard processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="Listen on this Unix socket instead of TCP.")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0, help="How long a batch stays open.")
+    parser.add_argument("--max-batch", type=int, default=64, help="Most requests scored in one batch.")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="Most requests handled at once.")
+    parser.add_argument("--max-queue", type=int, default=1024, help="Queued requests before answering 503.")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query unless the request says.")
+    parser.add_argument("--cache-size", type=int, default=0, help="Query result cache entries (0 disables).")
+    parser.add_argument("--cache-ttl", type=float, help="Query result cache TTL in seconds.")
+    parser.add_argument("--sparse", action="store_true",
+                        help="Score batches as sparse matrix products (needs numpy and scipy; not with --shards).")
+    args = parser.parse_args()
+
+    if args.shards and args.sparse:
+        parser.error("--sparse cannot be combined with --shards")
+    if args.shards:
+        collection = ShardedCollection(args.data_dir, args.stop_words, args.shards)
+    else:
+        cache = QueryCache(args.cache_size, args.cache_ttl) if args.cache_size else None
+        collection = Rev1_Parser(args.stop_words, args.data_dir, args.index, args.workers, query_cache=cache)
+    service = SearchService(collection, args.stop_words, args.batch_window_ms / 1000, args.max_batch,
+                            args.max_concurrency, args.max_queue, args.top_k,
+                            engine=SparseEngine(collection) if args.sparse else None)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Serving {collection.ndocs} documents on {where}")
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.shards:
+            collection.close()
+
+
+if __name__ == "__main__":
+    main()
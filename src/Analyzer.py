@@ -0,0 +1,97 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from .Stats import NULL_STATS
+
+# Everything dropped outright: links, (c) marks, possessive 's, '+', &quot; entities and digits
+STRIP_PATTERN = re.compile(r"https?://\S+|(?i:\(c\))|'s\b|\+|&quot;|\d+")
+# Any run of non-word characters separates words (punctuation counts as whitespace)
+SPLIT_PATTERN = re.compile(r"\W+")
+
+
+class Analyzer():
+    """
+    Turns raw text into stemmed term counts. Shared by NewsItem and Q_Parser
+    so documents and queries are normalised the same way.
+    """
+
+    def __init__(self, stop_words, stemmer, cache_size=65536, stats=None):
+        """
+        Parameters:
+            stop_words (iterable of str): Words to drop (matched after lowercasing).
+            stemmer: Object with a stemWord method, e.g. Stemmer.Stemmer('english').
+            cache_size (int): Number of surface forms whose stems are memoised (LRU).
+            stats (Instrumentation, optional): Records "analyze.clean" and "analyze.stem".
+        """
+        self.stats = stats if stats is not None else NULL_STATS
+        self.stop_words = frozenset(stop_words)
+        self.stemmer = stemmer
+        self.stem = lru_cache(maxsize=cache_size)(stemmer.stemWord)
+
+    def clean_content(self, text):
+        """
+        Normalise raw text:
+        - Remove URLs, (c), possessive 's, '+', &quot; and digits in one pass
+        - Split into words on any run of whitespace or punctuation
+        - Lowercase, filter out stop-words and single-character tokens
+        Returns (list of cleaned word tokens, number of raw words before filtering).
+        """
+        if not text:
+            return [], 0
+        words = SPLIT_PATTERN.split(STRIP_PATTERN.sub('', text))
+        stop_words = self.stop_words
+        cleaned = []
+        for word in words:
+            if len(word) > 1:
+                word = word.lower()
+                if word not in stop_words:
+                    cleaned.append(word)
+        return cleaned, len(words)
+
+    def analyze(self, text):
+        """
+        Convert raw text into a term-frequency Counter of stems.
+        Returns (Counter, number of raw words before filtering).
+        """
+        stats = self.stats
+        if stats.enabled:
+            with stats.stage("analyze.clean", nbytes=len(text)) as timer:
+                words, size = self.clean_content(text)
+                timer.tokens = size
+            with stats.stage("analyze.stem", tokens=len(words)):
+                return self.count_stems(words), size
+        words, size = self.clean_content(text)
+        return self.count_stems(words), size
+
+    def count_stems(self, words):
+        """
+        Stem cleaned words through the LRU cache and count the non-empty stems.
+        """
+        bag = Counter()
+        stem = self.stem
+        for word in words:
+            s = stem(word).strip()
+            if s:
+                bag[s] += 1
+        return bag
+
+    def positions(self, text):
+        """
+        Like analyze, but keep word order: returns (list of (stem, position),
+        number of raw words), where position is the index of the word among
+        the raw words, so dropped stop-words still leave a gap.
+        """
+        if not text:
+            return [], 0
+        words = SPLIT_PATTERN.split(STRIP_PATTERN.sub('', text))
+        stop_words = self.stop_words
+        stem = self.stem
+        out = []
+        for i, word in enumerate(words):
+            if len(word) > 1:
+                word = word.lower()
+                if word not in stop_words:
+                    s = stem(word).strip()
+                    if s:
+                        out.append((s, i))
+        return out, len(words)
@@ -0,0 +1,252 @@
+import Stemmer
+from .NewsItem import NewsCollection
+from .Parser import Q_Collection
+from .Q_Parser import QueryParser
+from .Pruning import overlap_report
+from .Stats import Instrumentation
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import resource
+import tracemalloc
+from itertools import accumulate
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+COUNTRIES = ["FRANCE", "UK", "USA", "ISRAEL", "GERMANY", "JAPAN", "BELGIUM", "CHINA"]
+TOPICS = ["GCAT", "GVIO", "CCAT", "ECAT", "MCAT", "GSPO"]
+# Constructor stages that make up the index build
+INDEX_STAGES = ("df", "postings", "tfidf")
+
+
+def zipf_vocabulary(size, exponent, rng):
+    """
+    Build a vocabulary of distinct pseudo-words and Zipfian cumulative weights.
+    The word of rank r is drawn with probability proportional to 1 / r**exponent.
+    Returns (words, cumulative weights) for random.choices.
+    """
+    words = []
+    seen = set()
+    while len(words) < size:
+        word = "".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 10)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    weights = [1.0 / (rank ** exponent) for rank in range(1, size + 1)]
+    return words, list(accumulate(weights))
+
+
+def synthetic_newsitem(itemid, words, cum_weights, rng, mean_length=380):
+    """
+    Render one RCV1-style <newsitem> XML document with Zipfian text.
+    Layout follows the RCV1v2 files: title, headline, dateline, text of <p>
+    paragraphs, copyright and a metadata block of codes and dc elements.
+    """
+    length = max(20, int(rng.expovariate(1.0 / mean_length)))
+    body = rng.choices(words, cum_weights=cum_weights, k=length)
+    headline = " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(4, 10)))
+    country = rng.choice(COUNTRIES)
+    date = f"1996-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    paragraphs = []
+    pos = 0
+    while pos < length:
+        size = rng.randint(20, 60)
+        sentence = " ".join(body[pos:pos + size])
+        paragraphs.append(f"<p>{sentence[:1].upper()}{sentence[1:]}.</p>")
+        pos += size
+    codes = "\n".join(
+        f'  <code code="{topic}">\n'
+        f'    <editdetail attribution="Reuters BIP Coding Group" action="confirmed" date="{date}"/>\n'
+        f'  </code>'
+        for topic in rng.sample(TOPICS, 2))
+    return (
+        '<?xml version="1.0" encoding="iso-8859-1" ?>\n'
+        f'<newsitem itemid="{itemid}" id="root" date="{date}" xml:lang="en">\n'
+        f'<title>{country}: {headline.upper()}.</title>\n'
+        f'<headline>{headline}.</headline>\n'
+        f'<dateline>{country} {date}</dateline>\n'
+        '<text>\n' + "\n".join(paragraphs) + '\n</text>\n'
+        f'<copyright>(c) Reuters Limited 1996</copyright>\n'
+        '<metadata>\n'
+        f'<codes class="bip:topics:1.0">\n{codes}\n</codes>\n'
+        f'<dc element="dc.date.created" value="{date}"/>\n'
+        '<dc element="dc.publisher" value="Reuters Holdings Plc"/>\n'
+        f'<dc element="dc.creator.location.country.name" value="{country}"/>\n'
+        '</metadata>\n'
+        '</newsitem>\n'
+    )
+
+
+def generate_corpus(out_dir, ndocs, vocab_size=50000, exponent=1.1, mean_length=380, seed=0):
+    """
+    Write ndocs synthetic <newsitem> files into out_dir (one file per document,
+    named like the RCV1v2 files). A corpus already generated with the same
+    parameters is reused.
+
+    Returns:
+        (words, cum_weights): The vocabulary, for drawing queries.
+    """
+    rng = random.Random(seed)
+    words, cum_weights = zipf_vocabulary(vocab_size, exponent, rng)
+    params = {"ndocs": ndocs, "vocab_size": vocab_size, "exponent": exponent,
+              "mean_length": mean_length, "seed": seed}
+    # Kept next to the directory, not in it, so it is not ingested as a document
+    marker = out_dir.rstrip(os.sep) + ".json"
+    if os.path.exists(marker):
+        with open(marker, encoding="utf-8") as f:
+            if json.load(f) == params:
+                return words, cum_weights
+    os.makedirs(out_dir, exist_ok=True)
+    for i in range(ndocs):
+        itemid = 1000000 + i
+        with open(os.path.join(out_dir, f"{itemid}news.xml"), "w", encoding="utf-8") as f:
+            f.write(synthetic_newsitem(itemid, words, cum_weights, rng, mean_length))
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump(params, f)
+    return words, cum_weights
+
+
+def synthetic_queries(words, cum_weights, count, seed=1):
+    """
+    Draw count queries of 2-5 words from the same Zipfian distribution as the corpus.
+    """
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(2, 5)))
+            for _ in range(count)]
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def latency_summary(latencies):
+    """
+    Summarise per-query latencies (seconds) as milliseconds.
+    """
+    total = sum(latencies)
+    return {
+        "queries": len(latencies),
+        "mean_ms": 1000 * total / len(latencies) if latencies else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p99_ms": 1000 * percentile(latencies, 99),
+        "qps": len(latencies) / total if total else 0.0,
+    }
+
+
+def corpus_bytes(data_dir):
+    """
+    Total size of the files in a corpus directory.
+    """
+    return sum(entry.stat().st_size for entry in os.scandir(data_dir) if entry.is_file())
+
+
+def run_benchmark(data_dir, stop_word_path, queries, workers=1, top_k=10, trace_memory=False,
+                  compress_postings=False, prune=None):
+    """
+    Measure one corpus: ingest throughput, peak memory, index build time
+    and per-query latency of TF-IDF and BM25 ranking. The build is timed
+    through the constructor's own Instrumentation stages; ingest time
+    includes the index build.
+
+    Parameters:
+        data_dir (str): Corpus directory.
+        stop_word_path (str): Stop-word file.
+        queries (list of str): Raw query strings.
+        workers (int): Ingestion worker processes.
+        top_k (int): k used for the top-k ranking runs.
+        trace_memory (bool): Also report the tracemalloc peak (slows ingestion).
+        compress_postings (bool): Use the compressed postings format.
+        prune (dict, optional): Keyword arguments of NewsCollection.prune_tfidf; if
+            given, the pruned index size and its overlap@k with exact TF-IDF
+            rankings are reported under "pruning".
+
+    Returns:
+        dict: Machine-readable results.
+    """
+    nbytes = corpus_bytes(data_dir)
+    if trace_memory:
+        tracemalloc.start()
+    stats = Instrumentation()
+    start = time.perf_counter()
+    collection = NewsCollection(data_dir, stop_word_path, Stemmer.Stemmer('english'), workers, stats=stats,
+                                compress_postings=compress_postings)
+    ingest_seconds = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+    # Queries are timed without instrumentation
+    stats.enabled = False
+    build = stats.snapshot()["stages"]
+    # Index build as the constructor did it: df, postings and the lazy tf-idf vectors
+    index_seconds = sum(build[name]["seconds"] for name in INDEX_STAGES if name in build)
+
+    # Compute every tf-idf vector up front so the first queries do not pay for it
+    start = time.perf_counter()
+    for nd in collection.newscollectiondict.values():
+        nd["tf_idf"].current()
+    tfidf_seconds = time.perf_counter() - start
+
+    parser = QueryParser(stop_word_path)
+    runs = {
+        "tfidf": lambda q: Q_Collection(q, collection, parser),
+        "tfidf_topk": lambda q: Q_Collection(q, collection, parser, top_k),
+        "bm25": lambda q: collection.my_bm25(q, collection.df),
+        "bm25_topk": lambda q: collection.my_bm25(q, collection.df, top_k),
+    }
+    latency = {}
+    for name, run in runs.items():
+        times = []
+        for query in queries:
+            start = time.perf_counter()
+            run(query)
+            times.append(time.perf_counter() - start)
+        latency[name] = latency_summary(times)
+
+    pruning = None
+    if prune:
+        start = time.perf_counter()
+        collection.prune_tfidf(**prune)
+        prune_seconds = time.perf_counter() - start
+        pruning = overlap_report(collection, queries, parser, (1, top_k))
+        pruning["build_seconds"] = prune_seconds
+
+    return {
+        "documents": collection.ndocs,
+        "vocabulary": len(collection.df),
+        "postings": sum(len(plist) for plist in collection.postings.values()),
+        "compressed_postings_bytes": collection.postings.nbytes() if compress_postings else None,
+        "corpus_bytes": nbytes,
+        "ingest_seconds": ingest_seconds,
+        "ingest_docs_per_second": collection.ndocs / ingest_seconds if ingest_seconds else 0.0,
+        "ingest_mb_per_second": nbytes / 1e6 / ingest_seconds if ingest_seconds else 0.0,
+        "index_build_seconds": index_seconds,
+        "tfidf_vectors_seconds": tfidf_seconds,
+        "build_stages": build,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "traced_peak_bytes": traced_peak,
+        "top_k": top_k,
+        "latency": latency,
+        "pruning": pruning,
+    }
+
+
+def environment():
+    """
+    Describe the machine a run happened on, stored with the results.
+    """
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
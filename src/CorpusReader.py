@@ -0,0 +1,112 @@
+import codecs
+import tarfile
+import zipfile
+
+import io
+import os
+
+# Bytes read per call when streaming a document
+CHUNK_SIZE = 1 << 16
+
+
+def is_archive(name):
+    """
+    True if a file name looks like a .zip, .tar, .tar.gz or .tgz archive.
+    """
+    name = name.lower()
+    return name.endswith((".zip", ".tar", ".tar.gz", ".tgz"))
+
+
+def read_stream(stream, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Read a binary stream to text in chunk_size reads with an incremental decoder.
+    Newlines are translated like text-mode open(), so "\\r\\n" and "\\r" become "\\n".
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = []
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    text = "".join(parts)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def iter_zip(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Yield (member name, text) for every file in a zip archive, in archive order.
+    Nested archives are read in place.
+    """
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            with archive.open(info) as member:
+                if is_archive(info.filename):
+                    yield from iter_archive(info.filename, member, chunk_size, encoding)
+                else:
+                    yield info.filename, read_stream(member, chunk_size, encoding)
+
+
+def iter_tar(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Yield (member name, text) for every file in a (compressed) tar archive.
+    The archive is read as a stream, one member at a time, without seeking.
+    """
+    if isinstance(source, str):
+        archive = tarfile.open(source, mode="r|*")
+    else:
+        archive = tarfile.open(fileobj=source, mode="r|*")
+    with archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            stream = archive.extractfile(member)
+            if is_archive(member.name):
+                # A stream cannot be re-read, so a nested archive is buffered in memory
+                yield from iter_archive(member.name, io.BytesIO(stream.read()), chunk_size, encoding)
+            else:
+                yield member.name, read_stream(stream, chunk_size, encoding)
+
+
+def iter_archive(name, source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Dispatch on the archive name; source is a path or a binary file object.
+    """
+    if name.lower().endswith(".zip"):
+        return iter_zip(source, chunk_size, encoding)
+    return iter_tar(source, chunk_size, encoding)
+
+
+def iter_documents(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Stream the raw text of every document in a corpus, one at a time, so only
+    the document being parsed is held in memory.
+
+    Parameters:
+        source (str or list of str): A directory (files in os.scandir order), a
+            .zip/.tar/.tar.gz/.tgz archive, a single file, or a list of these.
+            Archives, also inside directories or other archives, are read
+            without extracting them to disk.
+        chunk_size (int): Bytes per read.
+        encoding (str): Text encoding of the documents.
+
+    Yields:
+        tuple: (name, text) of each document.
+    """
+    if isinstance(source, (list, tuple)):
+        for path in source:
+            yield from iter_documents(path, chunk_size, encoding)
+    elif os.path.isdir(source):
+        for entry in os.scandir(source):
+            if entry.is_file():
+                yield from iter_documents(entry.path, chunk_size, encoding)
+    elif is_archive(source):
+        yield from iter_archive(source, source, chunk_size, encoding)
+    else:
+        with open(source, "rb") as f:
+            yield source, read_stream(f, chunk_size, encoding)
@@ -0,0 +1,196 @@
+from array import array
+from .XMLElement import XMLCollection
+
+import os
+import mmap
+import zlib
+import struct
+
+MAGIC = b"RCV1DOC\x01"
+# Trailer: document count, offset of the newsID blob, offset of the tables, compressed flag
+TRAILER = struct.Struct("<QQQ?7x")
+
+
+class DocStoreWriter():
+    """
+    Appends raw documents to one contiguous file, each zlib-compressed or
+    raw, and writes the offset table keyed by newsID when closed.
+    """
+
+    def __init__(self, path, compress=True, level=6):
+        """
+        Parameters:
+            path (str): Destination file; written atomically on close.
+            compress (bool): zlib-compress every document.
+            level (int): zlib compression level.
+        """
+        self.path = path
+        self.compress = compress
+        self.level = level
+        self.tmp_path = path + ".tmp"
+        self.file = open(self.tmp_path, "wb")
+        self.file.write(MAGIC)
+        self.nids = []
+        self.offsets = array("Q", [len(MAGIC)])
+
+    def add(self, newsID, text):
+        """
+        Store the raw text (str or list of lines) of one document.
+        """
+        if not isinstance(text, str):
+            text = "".join(text)
+        data = text.encode("utf-8")
+        if self.compress:
+            data = zlib.compress(data, self.level)
+        self.file.write(data)
+        self.nids.append(newsID)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self):
+        """
+        Write the newsIDs and offsets and move the file into place.
+        """
+        blob = bytearray()
+        nid_offsets = array("Q", [0])
+        for nid in self.nids:
+            blob += nid.encode("utf-8")
+            nid_offsets.append(len(blob))
+        blob_start = self.offsets[-1]
+        self.file.write(blob)
+        self.file.write(b"\0" * (-len(blob) % 8))
+        table_start = blob_start + len(blob) + (-len(blob) % 8)
+        self.file.write(nid_offsets.tobytes())
+        self.file.write(self.offsets.tobytes())
+        self.file.write(TRAILER.pack(len(self.nids), blob_start, table_start, self.compress))
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def element_text(element):
+    """
+    Text of an element and all its descendants, element by element.
+    """
+    parts = [element.content] if element.content else []
+    for child in element.children:
+        text = element_text(child)
+        if text:
+            parts.append(text)
+    return "\n".join(parts)
+
+
+class DocStore():
+    """
+    Read-only, memory-mapped view of a file written by DocStoreWriter.
+    Only the newsID -> position table is resident; a document's bytes are
+    read (and decompressed) from the mapping when asked for.
+    Documents added after the file was written are kept in memory.
+    The most recently parsed document is cached, so its headline, body and
+    snippet are read and parsed once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a document store")
+        count, blob_start, table_start, self.compressed = TRAILER.unpack(self.mmap[-TRAILER.size:])
+        view = memoryview(self.mmap)
+        nid_offsets = view[table_start:table_start + 8 * (count + 1)].cast("Q")
+        self.offsets = view[table_start + 8 * (count + 1):table_start + 16 * (count + 1)].cast("Q")
+        blob = self.mmap[blob_start:blob_start + nid_offsets[count]]
+        self.index = {blob[nid_offsets[i]:nid_offsets[i + 1]].decode("utf-8"): i for i in range(count)}
+        nid_offsets.release()
+        self.added = {}
+        self.parsed = None  # (newsID, fields) of the last parsed document
+
+    def add(self, newsID, text):
+        """
+        Keep the text of a document added after the store was written.
+        """
+        self.added[newsID] = text if isinstance(text, str) else "".join(text)
+        self.forget(newsID)
+
+    def remove(self, newsID):
+        self.forget(newsID)
+        self.added.pop(newsID, None)
+        self.index.pop(newsID, None)
+
+    def forget(self, newsID):
+        """
+        Drop the cached fields of a document whose text changed.
+        """
+        if self.parsed is not None and self.parsed[0] == newsID:
+            self.parsed = None
+
+    def __contains__(self, newsID):
+        return newsID in self.added or newsID in self.index
+
+    def __len__(self):
+        return len(self.index) + sum(1 for nid in self.added if nid not in self.index)
+
+    def raw(self, newsID):
+        """
+        Raw XML text of a document. Raises KeyError if it is not stored.
+        """
+        text = self.added.get(newsID)
+        if text is not None:
+            return text
+        i = self.index[newsID]
+        data = self.mmap[self.offsets[i]:self.offsets[i + 1]]
+        if self.compressed:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
+
+    def fields(self, newsID):
+        """
+        Parse a stored document. Returns {"title", "headline", "dateline", "text"}
+        strings ("" when absent); "text" joins the paragraphs of <text>.
+        The last parsed document is cached until it is added again or removed.
+        """
+        if self.parsed is not None and self.parsed[0] == newsID:
+            return dict(self.parsed[1])
+        fields = {"title": "", "headline": "", "dateline": "", "text": ""}
+        for element in XMLCollection(self.raw(newsID)).elements:
+            if element.tag in fields and not fields[element.tag]:
+                fields[element.tag] = element_text(element)
+        self.parsed = (newsID, fields)
+        return dict(fields)
+
+    def headline(self, newsID):
+        return self.fields(newsID)["headline"]
+
+    def body(self, newsID):
+        return self.fields(newsID)["text"]
+
+    def snippet(self, newsID, query_terms, analyzer, width=30, mark=("[", "]")):
+        """
+        The width-word window of the body with the most query terms, with
+        matching words highlighted.
+
+        Parameters:
+            newsID (str): The document.
+            query_terms (iterable of str): Query stems, e.g. the keys of a parsed query.
+            analyzer (Analyzer): Analyzer the stems came from.
+            width (int): Words in the snippet.
+            mark (tuple of str): Strings placed before and after a matching word.
+        """
+        words = self.body(newsID).split()
+        query_terms = set(query_terms)
+        hits = [any(stem in query_terms for stem in analyzer.analyze(word)[0]) for word in words]
+        best, best_count, count = 0, -1, 0
+        for i, hit in enumerate(hits):
+            count += hit
+            if i >= width:
+                count -= hits[i - width]
+            if count > best_count:
+                best, best_count = max(0, i - width + 1), count
+        window = [mark[0] + word + mark[1] if hits[i] else word
+                  for i, word in enumerate(words[best:best + width], best)]
+        prefix = "... " if best > 0 else ""
+        suffix = " ..." if best + width < len(words) else ""
+        return prefix + " ".join(window) + suffix
+
+    def close(self):
+        self.offsets.release()
+        self.mmap.close()
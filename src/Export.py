@@ -0,0 +1,288 @@
+from array import array
+from operator import itemgetter
+
+import sys
+import json
+import heapq
+import struct
+
+# Characters (text, jsonl) or bytes (binary) buffered before each write to the file
+CHUNK_SIZE = 1 << 16
+FORMATS = ("text", "jsonl", "binary")
+
+MAGIC = b"RCV1EXP\x01"
+# Record kinds of the binary format
+TERM_STATS, TFIDF, RANKING = 1, 2, 3
+# Header: magic, record kind, vocabulary size
+HEADER = struct.Struct("<8sBQ")
+# Document record: newsID bytes, word count, entries
+DOC_RECORD = struct.Struct("<HQI")
+# Ranking record: query bytes, results
+RANKING_RECORD = struct.Struct("<II")
+
+
+class ChunkedWriter():
+    """
+    Collects small writes and passes them on to a file handle in chunks of
+    about chunk_size, so an export never holds more than one chunk.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE, binary=False):
+        """
+        Parameters:
+            f (file): Open text handle, or binary handle if binary is set.
+            chunk_size (int): Buffered characters or bytes before a write.
+            binary (bool): Whether bytes rather than str are written.
+        """
+        self.f = f
+        self.chunk_size = chunk_size
+        self.empty = b"" if binary else ""
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.f.write(self.empty.join(self.parts))
+            self.parts = []
+            self.size = 0
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {', '.join(FORMATS)}, not {fmt!r}")
+
+
+def little_endian(values):
+    """
+    Bytes of an array in little-endian order.
+    """
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_header(out, kind, vocab):
+    """
+    Binary header: magic, record kind and the vocabulary as an array of
+    utf-8 lengths followed by the concatenated terms.
+    """
+    encoded = [term.encode("utf-8") for term in vocab]
+    out.write(HEADER.pack(MAGIC, kind, len(encoded)))
+    out.write(little_endian(array("I", (len(term) for term in encoded))))
+    for term in encoded:
+        out.write(term)
+
+
+def ordered_items(values, limit=None):
+    """
+    (key, value) pairs by descending value, ties in insertion order; the
+    first limit only if given.
+    """
+    if limit is None:
+        return sorted(values.items(), key=itemgetter(1), reverse=True)
+    return heapq.nlargest(limit, values.items(), key=itemgetter(1))
+
+
+def write_term_stats(collection, f, fmt="text", chunk_size=CHUNK_SIZE):
+    """
+    Stream the term statistics of every document, one document at a time.
+
+    Formats:
+        text: NewsItem's layout, documents separated by a blank line; the
+            output equals str(collection).
+        jsonl: {"newsID", "size", "terms": {term: freq}} per line, terms by
+            descending frequency.
+        binary: header with the collection's TermDictionary, then per document
+            DOC_RECORD, the newsID and arrays of term ids and frequencies
+            (uint32, little-endian) in the item's term order.
+
+    Parameters:
+        collection (NewsCollection): The collection to export.
+        f (file): Text handle for text/jsonl, binary handle for binary.
+        fmt (str): One of FORMATS.
+        chunk_size (int): Buffered characters or bytes per write.
+
+    Returns:
+        int: Number of documents written.
+    """
+    check_format(fmt)
+    out = ChunkedWriter(f, chunk_size, fmt == "binary")
+    if fmt == "binary":
+        write_header(out, TERM_STATS, collection.dictionary.terms)
+    count = 0
+    for nd in collection.newscollectiondict.values():
+        item = nd["news_item"]
+        if fmt == "binary":
+            nid = item.newsID.encode("utf-8")
+            out.write(DOC_RECORD.pack(len(nid), item.get_size(), len(item.term_ids)))
+            out.write(nid)
+            out.write(little_endian(item.term_ids))
+            out.write(little_endian(item.freqs))
+        elif fmt == "jsonl":
+            terms = dict(ordered_items(dict(item.iter_terms())))
+            out.write(json.dumps({"newsID": item.newsID, "size": item.get_size(), "terms": terms}) + "\n")
+        else:
+            if count:
+                out.write("\n")
+            out.write(f"Document {item.newsID} contains {sum(item.freqs)} indexing terms"
+                      f" and has a total {item.get_size()} words.\n")
+            for term, freq in ordered_items(dict(item.iter_terms())):
+                out.write(f"{term}: {freq}\n")
+        count += 1
+    out.flush()
+    return count
+
+
+def write_tfidf(collection, f, fmt="text", limit=30, chunk_size=CHUNK_SIZE):
+    """
+    Stream the tf-idf vector of every document, highest weights first. Only
+    the limit largest weights of a document are selected, without keeping a
+    sorted copy of its vector.
+
+    Formats:
+        text: "Document <newsID> contains <size> terms", then "term : weight"
+            lines and a blank line.
+        jsonl: {"newsID", "size", "weights": {term: weight}} per line.
+        binary: header with the collection's TermDictionary, then per document
+            DOC_RECORD, the newsID, term ids (uint32) and weights (float64).
+
+    Parameters:
+        collection (NewsCollection): The collection to export.
+        f (file): Text handle for text/jsonl, binary handle for binary.
+        fmt (str): One of FORMATS.
+        limit (int, optional): Weights per document, or None for all.
+        chunk_size (int): Buffered characters or bytes per write.
+
+    Returns:
+        int: Number of documents written.
+    """
+    check_format(fmt)
+    out = ChunkedWriter(f, chunk_size, fmt == "binary")
+    if fmt == "binary":
+        write_header(out, TFIDF, collection.dictionary.terms)
+    term_id = collection.dictionary.get
+    count = 0
+    for nd in collection.newscollectiondict.values():
+        item = nd["news_item"]
+        top = ordered_items(nd["tf_idf"].current(), limit)
+        if fmt == "binary":
+            nid = item.newsID.encode("utf-8")
+            out.write(DOC_RECORD.pack(len(nid), item.get_size(), len(top)))
+            out.write(nid)
+            out.write(little_endian(array("I", (term_id(term) for term, _ in top))))
+            out.write(little_endian(array("d", (weight for _, weight in top))))
+        elif fmt == "jsonl":
+            out.write(json.dumps({"newsID": item.newsID, "size": item.get_size(), "weights": dict(top)}) + "\n")
+        else:
+            out.write(f"Document {item.newsID} contains {item.get_size()} terms\n")
+            for term, weight in top:
+                out.write(f"{term} : {weight}\n")
+            out.write("\n")
+        count += 1
+    out.flush()
+    return count
+
+
+def write_rankings(rankings, f, fmt="text", chunk_size=CHUNK_SIZE):
+    """
+    Stream ranking results. rankings may be a generator, so each query is
+    only ranked when it is written.
+
+    Formats:
+        text: "The Ranking Result for query: <query>", a blank line, then
+            "<newsID> : <score>" lines and a blank line.
+        jsonl: {"query", "results": {newsID: score}} per line.
+        binary: header with an empty vocabulary, then per query RANKING_RECORD,
+            the query, an array of newsID lengths (uint16), the newsIDs and
+            the scores (float64).
+
+    Parameters:
+        rankings (iterable): (query, {newsID: score}) pairs, results in rank order.
+        f (file): Text handle for text/jsonl, binary handle for binary.
+        fmt (str): One of FORMATS.
+        chunk_size (int): Buffered characters or bytes per write.
+
+    Returns:
+        int: Number of rankings written.
+    """
+    check_format(fmt)
+    out = ChunkedWriter(f, chunk_size, fmt == "binary")
+    if fmt == "binary":
+        write_header(out, RANKING, ())
+    count = 0
+    for query, scores in rankings:
+        if fmt == "binary":
+            encoded = query.encode("utf-8")
+            nids = [nid.encode("utf-8") for nid in scores]
+            out.write(RANKING_RECORD.pack(len(encoded), len(nids)))
+            out.write(encoded)
+            out.write(little_endian(array("H", (len(nid) for nid in nids))))
+            out.write(b"".join(nids))
+            out.write(little_endian(array("d", scores.values())))
+        elif fmt == "jsonl":
+            out.write(json.dumps({"query": query, "results": scores}) + "\n")
+        else:
+            out.write(f"The Ranking Result for query: {query}\n\n")
+            for nid, score in scores.items():
+                out.write(f"{nid} : {score}\n")
+            out.write("\n")
+        count += 1
+    out.flush()
+    return count
+
+
+def read_array(f, code, count):
+    values = array(code)
+    values.frombytes(f.read(count * values.itemsize))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def read_binary(f):
+    """
+    Read an export written with fmt="binary", one record at a time.
+
+    Yields:
+        dict: The same records as the jsonl format ({"newsID", "size", "terms"},
+        {"newsID", "size", "weights"} or {"query", "results"}).
+    """
+    magic, kind, nterms = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("not a binary export")
+    lengths = read_array(f, "I", nterms)
+    blob = f.read(sum(lengths))
+    vocab = []
+    start = 0
+    for length in lengths:
+        vocab.append(blob[start:start + length].decode("utf-8"))
+        start += length
+    record = DOC_RECORD if kind in (TERM_STATS, TFIDF) else RANKING_RECORD
+    while True:
+        head = f.read(record.size)
+        if not head:
+            return
+        if kind == RANKING:
+            qlen, n = record.unpack(head)
+            query = f.read(qlen).decode("utf-8")
+            nids = []
+            for length in read_array(f, "H", n):
+                nids.append(f.read(length).decode("utf-8"))
+            yield {"query": query, "results": dict(zip(nids, read_array(f, "d", n)))}
+            continue
+        nid_len, size, n = record.unpack(head)
+        nid = f.read(nid_len).decode("utf-8")
+        term_ids = read_array(f, "I", n)
+        if kind == TERM_STATS:
+            terms = dict(zip((vocab[tid] for tid in term_ids), read_array(f, "I", n)))
+            yield {"newsID": nid, "size": size, "terms": dict(ordered_items(terms))}
+        else:
+            weights = read_array(f, "d", n)
+            yield {"newsID": nid, "size": size, "weights": dict(zip((vocab[tid] for tid in term_ids), weights))}
@@ -0,0 +1,156 @@
+from collections import Counter
+
+import math
+
+# RCV1 fields indexed by default when a schema is asked for without fields
+DEFAULT_FIELDS = {"title": ("title",), "headline": ("headline",), "text": ("text",)}
+# Subtrees that never hold indexed text in RCV1 documents
+DEFAULT_SKIP = ("metadata", "copyright", "dateline")
+
+
+class FieldSchema():
+    """
+    Which elements of a document are indexed, as named fields, and how
+    each field is weighted by BM25F. Elements outside every field are not
+    cleaned or stemmed at all; see XMLElement.parse_fields.
+    """
+
+    def __init__(self, fields=None, weights=None, b=None, skip=None):
+        """
+        Parameters:
+            fields (dict, optional): {field name: tags}; an element nested in an
+                indexed element belongs to the same field. Defaults to DEFAULT_FIELDS.
+            weights (dict, optional): BM25F weight of each field, 1.0 if not given.
+            b (dict, optional): BM25F length normalisation of each field, 0.75 if not given.
+            skip (iterable of str, optional): Tags whose subtrees are skipped without
+                parsing. Defaults to DEFAULT_SKIP with the default fields and to
+                nothing with custom fields, which may want text in those subtrees.
+        """
+        if skip is None:
+            skip = DEFAULT_SKIP if fields is None else ()
+        fields = fields if fields is not None else DEFAULT_FIELDS
+        self.fields = list(fields)
+        self.tag_fields = {}
+        for name, tags in fields.items():
+            for tag in ([tags] if isinstance(tags, str) else tags):
+                if tag in self.tag_fields:
+                    raise ValueError(f"Tag {tag!r} is in fields {self.tag_fields[tag]!r} and {name!r}")
+                self.tag_fields[tag] = name
+        weights = weights or {}
+        b = b or {}
+        self.weights = {name: float(weights.get(name, 1.0)) for name in self.fields}
+        self.b = {name: float(b.get(name, 0.75)) for name in self.fields}
+        self.skip = tuple(tag for tag in skip if tag not in self.tag_fields)
+
+
+def analyze_fields(texts, analyzer, fields):
+    """
+    Analyze the (field, text) pieces from XMLElement.parse_fields.
+
+    Returns:
+        tuple: ({field: Counter of stems} and {field: word count}, with every
+        field of the schema present, in schema order).
+    """
+    terms = {name: Counter() for name in fields}
+    lengths = dict.fromkeys(fields, 0)
+    for field, text in texts:
+        bag, words = analyzer.analyze(text)
+        terms[field].update(bag)
+        lengths[field] += words
+    return terms, lengths
+
+
+def merge_fields(terms):
+    """
+    Document-level {term: freq} summed over all fields, in first-seen order.
+    """
+    merged = Counter()
+    for bag in terms.values():
+        merged.update(bag)
+    return merged
+
+
+class FieldIndex():
+    """
+    Per-field term statistics of a collection: {field: {term: {newsID: tf}}}
+    postings and per-field document lengths, filled in the same ingest pass
+    as the document-level index and used for BM25F.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.postings = {name: {} for name in schema.fields}
+        self.lengths = {name: {} for name in schema.fields}
+        self.totals = dict.fromkeys(schema.fields, 0)
+
+    def add(self, newsID, terms, lengths):
+        """
+        Index one document from analyze_fields output.
+        """
+        for name in self.schema.fields:
+            postings = self.postings[name]
+            for term, freq in terms.get(name, {}).items():
+                plist = postings.get(term)
+                if plist is None:
+                    postings[term] = {newsID: freq}
+                else:
+                    plist[newsID] = freq
+            length = lengths.get(name, 0)
+            self.lengths[name][newsID] = length
+            self.totals[name] += length
+
+    def remove(self, newsID, terms):
+        """
+        Drop a document from every field, given its document-level terms.
+        """
+        terms = list(terms)
+        for name in self.schema.fields:
+            length = self.lengths[name].pop(newsID, None)
+            if length is None:
+                continue
+            self.totals[name] -= length
+            postings = self.postings[name]
+            for term in terms:
+                plist = postings.get(term)
+                if plist is not None:
+                    plist.pop(newsID, None)
+                    if not plist:
+                        del postings[term]
+
+    def bm25f(self, query_tf, df, ndocs, k1=1.2, k2=100):
+        """
+        BM25F scores: the term frequencies of every field are length-normalised
+        by their own b and average length, weighted and summed,
+            tf = sum over fields of weight * tf_f / ((1 - b_f) + b_f * len_f / avg_f),
+        then saturated once, idf * ((k1 + 1) * tf) / (k1 + tf) * ((k2 + 1) * qf) / (k2 + qf),
+        with the same idf as NewsCollection.my_bm25. Only documents containing
+        a query term are scored.
+
+        Returns:
+            dict: Unsorted {newsID: score}.
+        """
+        schema = self.schema
+        norms = []
+        for name in schema.fields:
+            lengths = self.lengths[name]
+            avg = self.totals[name] / len(lengths) if lengths and self.totals[name] else 0
+            b = schema.b[name]
+            norms.append((name, schema.weights[name], b, avg, lengths))
+        scores = {}
+        for term, qf in query_tf.items():
+            d = df.get(term, 0)
+            idf = max(0, math.log10((ndocs - d + 0.5) / (d + 0.5)))
+            if idf == 0:
+                continue
+            tf = {}
+            for name, weight, b, avg, lengths in norms:
+                plist = self.postings[name].get(term)
+                if not plist or not weight:
+                    continue
+                for nid, f in plist.items():
+                    norm = (1 - b) + b * lengths[nid] / avg
+                    tf[nid] = tf.get(nid, 0) + weight * f / norm
+            qfactor = ((k2 + 1) * qf) / (k2 + qf)
+            for nid, t in tf.items():
+                scores[nid] = scores.get(nid, 0) + idf * ((k1 + 1) * t) / (k1 + t) * qfactor
+        return scores
@@ -0,0 +1,104 @@
+from array import array
+
+import math
+
+
+class BM25Impacts():
+    """
+    Index-time BM25 impacts of a NewsCollection.
+
+    For every posting the query-independent part of BM25,
+        impact = idf * ((k1 + 1) * f) / (K + f),  K = k1 * ((1 - b) + b * len / avg_length),
+    is computed once with k1 and b fixed for the build. A query then only
+    sums impact * ((k2 + 1) * qf) / (k2 + qf) over the postings of its terms.
+
+    With bits=None impacts are stored as doubles and scores are bit-identical
+    to NewsCollection.my_bm25. With bits=n they are quantized linearly to n-bit
+    integers over [0, max impact], so each stored impact is off by at most
+    step / 2 with step = max impact / (2**n - 1), and a document's score is
+    within tolerance(query_tf) = step / 2 * sum of the query-term factors
+    ((k2 + 1) * qf) / (k2 + qf) of the exact score. Near-ties may then swap.
+
+    The impacts are a snapshot of one collection version; NewsCollection
+    rebuilds them on the next BM25 query after documents are added or removed.
+    """
+
+    def __init__(self, collection, k1=1.2, b=0.75, bits=8):
+        """
+        Parameters:
+            collection (NewsCollection): The collection to precompute.
+            k1, b (float): BM25 parameters fixed for this build.
+            bits (int, optional): Quantize impacts to this many bits (8 or 16),
+                or None to keep exact doubles.
+        """
+        if bits not in (None, 8, 16):
+            raise ValueError("bits must be None, 8 or 16")
+        self.collection = collection
+        self.k1, self.b = k1, b
+        self.bits = bits
+        self.build()
+
+    def build(self):
+        """
+        Compute the impacts of every posting from the current collection.
+        """
+        coll = self.collection
+        k1 = self.k1
+        self.version = coll.version
+        length_factors = coll.bm25_length_factors(k1, self.b)
+        ordinals = {nid: i for i, nid in enumerate(coll.newscollectiondict)}
+        self.nids = list(ordinals)
+        self.impacts = {}
+        top = 0.0
+        for term, plist in coll.postings.items():
+            d = coll.df[term]
+            idf = max(0, math.log10((coll.ndocs - d + 0.5) / (d + 0.5)))
+            docs = array("I")
+            values = array("d")
+            for nid, f in plist.items():
+                docs.append(ordinals[nid])
+                values.append(idf * ((k1 + 1) * f) / (length_factors[nid] + f))
+            if values:
+                top = max(top, max(values))
+            self.impacts[term] = (docs, values)
+        self.max_impact = top
+        if self.bits is None:
+            self.step = 1.0
+            return
+        levels = (1 << self.bits) - 1
+        self.step = top / levels if top > 0 else 1.0
+        code = "B" if self.bits == 8 else "H"
+        for term, (docs, values) in self.impacts.items():
+            self.impacts[term] = (docs, array(code, (round(v / self.step) for v in values)))
+
+    def tolerance(self, query_tf, k2=100):
+        """
+        Largest possible difference between a quantized and an exact score for this query.
+        """
+        if self.bits is None:
+            return 0.0
+        return self.step / 2 * sum(((k2 + 1) * qf) / (k2 + qf) for qf in query_tf.values())
+
+    def scores(self, query_tf, k2=100):
+        """
+        Accumulate {newsID: score} term-at-a-time in query-term order.
+        """
+        scores = {}
+        nids = self.nids
+        step = self.step
+        for term, qf in query_tf.items():
+            entry = self.impacts.get(term)
+            if entry is None:
+                continue
+            qnum, qden = (k2 + 1) * qf, k2 + qf
+            for ordinal, value in zip(*entry):
+                nid = nids[ordinal]
+                scores[nid] = scores.get(nid, 0) + value * step * qnum / qden
+        return scores
+
+    def nbytes(self):
+        """
+        Bytes used by the stored document numbers and impacts.
+        """
+        return sum(len(docs) * docs.itemsize + len(values) * values.itemsize
+                   for docs, values in self.impacts.values())
@@ -0,0 +1,395 @@
+from array import array
+from collections import Counter
+from collections.abc import MutableMapping
+from .NewsItem import NewsItem, NewsCollection, TfidfVector
+from .Analyzer import Analyzer
+from .Q_Parser import QueryParser
+from .TermDictionary import TermDictionary
+from .Stats import NULL_STATS
+from .Postings import CompressedPostings
+
+import os
+import sys
+import json
+import mmap
+import struct
+
+MAGIC = b"RCV1IDX\x01"
+HEADER = struct.Struct("<8sQ")
+
+
+def source_manifest(data_dir, stop_word_path):
+    """
+    Describe the inputs an index was built from.
+    Returns a list of [name, size, mtime_ns] for every file in data_dir
+    (or for data_dir itself if it is an archive or file, or for each source
+    if it is a list of them, as iter_documents accepts) plus the stop-word
+    file, used to detect stale indexes.
+    """
+    manifest = source_entries(data_dir)
+    st = os.stat(stop_word_path)
+    manifest.append([os.path.basename(stop_word_path), st.st_size, st.st_mtime_ns])
+    return manifest
+
+
+def source_entries(source):
+    """
+    [name, size, mtime_ns] of the files making up one corpus source.
+    """
+    if isinstance(source, (list, tuple)):
+        return [entry for path in source for entry in source_entries(path)]
+    entries = []
+    if os.path.isdir(source):
+        for entry in sorted(os.scandir(source), key=lambda e: e.name):
+            if entry.is_file():
+                st = entry.stat()
+                entries.append([entry.name, st.st_size, st.st_mtime_ns])
+    else:
+        st = os.stat(source)
+        entries.append([os.path.basename(source), st.st_size, st.st_mtime_ns])
+    return entries
+
+
+def read_header(path):
+    """
+    Read the JSON header of an index file.
+    Returns (header dict, byte offset where the data sections start) or (None, 0)
+    if the file is missing or not an index.
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                return None, 0
+            return json.loads(f.read(length).decode("utf-8")), HEADER.size + length
+    except (OSError, struct.error, ValueError):
+        return None, 0
+
+
+def index_is_fresh(path, data_dir, stop_word_path):
+    """
+    Check that an index exists and matches the current source files.
+    """
+    header, _ = read_header(path)
+    if header is None or header.get("byteorder") != sys.byteorder:
+        return False
+    try:
+        return header.get("manifest") == source_manifest(data_dir, stop_word_path)
+    except OSError:
+        return False
+
+
+def _strings(values):
+    """
+    Pack strings into one utf-8 blob plus an array of end offsets.
+    """
+    blob = bytearray()
+    offsets = array("Q", [0])
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+def save_index(collection, path, manifest=None):
+    """
+    Write a NewsCollection to a compact binary index file.
+
+    Layout: an 8 byte magic, the header length, a JSON header (statistics,
+    source manifest and section table) and then 8 byte aligned native
+    arrays for the vocabulary, df, document lengths, the forward index
+    (term ids, tfs and tf-idf weights per document) and the postings
+    (document numbers and tfs per term).
+
+    Parameters:
+        collection (NewsCollection): The collection to save.
+        path (str): Destination file; written atomically.
+        manifest (list, optional): Source manifest from source_manifest().
+    """
+    # Term ids in the file are the collection's TermDictionary ids
+    vocab = collection.dictionary.terms
+    nids = list(collection.newscollectiondict)
+    doc_num = {nid: i for i, nid in enumerate(nids)}
+
+    doc_lengths = array("Q")
+    doc_offsets = array("Q", [0])
+    fwd_terms = array("I")
+    fwd_tfs = array("I")
+    fwd_weights = array("d")
+    for nd in collection.newscollectiondict.values():
+        item = nd["news_item"]
+        doc_lengths.append(item.get_size())
+        fwd_terms.extend(item.term_ids)
+        fwd_tfs.extend(item.freqs)
+        fwd_weights.extend(nd["tf_idf"].get(term, 0.0) for term, _ in item.iter_terms())
+        doc_offsets.append(len(fwd_terms))
+
+    post_offsets = array("Q", [0])
+    post_docs = array("I")
+    post_tfs = array("I")
+    for term in vocab:
+        for nid, freq in collection.postings.get(term, {}).items():
+            post_docs.append(doc_num[nid])
+            post_tfs.append(freq)
+        post_offsets.append(len(post_docs))
+
+    vocab_blob, vocab_offsets = _strings(vocab)
+    nid_blob, nid_offsets = _strings(nids)
+    sections = [
+        ("vocab", vocab_blob, "B"), ("vocab_offsets", vocab_offsets, "Q"),
+        ("df", array("Q", (collection.df[t] for t in vocab)), "Q"),
+        ("nids", nid_blob, "B"), ("nids_offsets", nid_offsets, "Q"),
+        ("doc_lengths", doc_lengths, "Q"), ("doc_offsets", doc_offsets, "Q"),
+        ("fwd_terms", fwd_terms, "I"), ("fwd_tfs", fwd_tfs, "I"), ("fwd_weights", fwd_weights, "d"),
+        ("post_offsets", post_offsets, "Q"), ("post_docs", post_docs, "I"), ("post_tfs", post_tfs, "I"),
+    ]
+    table = {}
+    offset = 0
+    for name, data, code in sections:
+        size = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        table[name] = [offset, size, code]
+        offset += size + (-size % 8)
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "manifest": manifest,
+        "ndocs": collection.ndocs,
+        "total_length": collection.totalDocLength,
+        "stop_words": collection.stopwordList,
+        "sections": table,
+    }).encode("utf-8")
+    header += b" " * (-(HEADER.size + len(header)) % 8)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for name, data, _ in sections:
+            raw = data.tobytes() if isinstance(data, array) else data
+            f.write(raw)
+            f.write(b"\0" * (-len(raw) % 8))
+    os.replace(tmp_path, path)
+
+
+class MappedPostings(MutableMapping):
+    """
+    {term: {newsID: tf}} view over the postings of a mapped index.
+    Each term's postings are decoded from the file on first access and cached;
+    the decoded dicts may be updated in place and terms added or deleted,
+    which only touches the in-memory overlay, never the file.
+    """
+
+    def __init__(self, term_ids, offsets, docs, tfs, nids):
+        self.term_ids = term_ids
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.nids = nids
+        self.cache = {}
+        self.removed = set()
+
+    def __getitem__(self, term):
+        plist = self.cache.get(term)
+        if plist is None:
+            if term in self.removed:
+                raise KeyError(term)
+            tid = self.term_ids[term]
+            start, end = self.offsets[tid], self.offsets[tid + 1]
+            nids = self.nids
+            plist = {nids[d]: f for d, f in zip(self.docs[start:end], self.tfs[start:end])}
+            self.cache[term] = plist
+        return plist
+
+    def __setitem__(self, term, plist):
+        self.cache[term] = plist
+        self.removed.discard(term)
+
+    def __delitem__(self, term):
+        if term not in self:
+            raise KeyError(term)
+        self.cache.pop(term, None)
+        if term in self.term_ids:
+            self.removed.add(term)
+
+    def __contains__(self, term):
+        return term in self.cache or (term in self.term_ids and term not in self.removed)
+
+    def __iter__(self):
+        for term in self.term_ids:
+            if term not in self.removed:
+                yield term
+        for term in self.cache:
+            if term not in self.term_ids:
+                yield term
+
+    def __len__(self):
+        added = sum(1 for term in self.cache if term not in self.term_ids)
+        return len(self.term_ids) - len(self.removed) + added
+
+
+class MappedDocuments(MutableMapping):
+    """
+    {newsID: {"news_item": NewsItem, "tf_idf": TfidfVector}} view over the
+    forward index of a mapped index, in file order.
+    Each document's entry is built from the file on first access and cached;
+    documents may be added, replaced or deleted, which only touches the
+    in-memory overlay, never the file. Added documents follow the file's.
+    """
+
+    def __init__(self, collection, nids, lengths, offsets, term_ids, tfs, weights, vocab):
+        self.collection = collection
+        self.nids = nids
+        self.doc_nums = {nid: i for i, nid in enumerate(nids)}
+        self.lengths = lengths
+        self.offsets = offsets
+        self.term_ids = term_ids
+        self.tfs = tfs
+        self.weights = weights
+        self.vocab = vocab
+        self.cache = {}
+        self.added = {}
+        self.removed = set()
+
+    def __getitem__(self, nid):
+        nd = self.added.get(nid)
+        if nd is None:
+            nd = self.cache.get(nid)
+        if nd is None:
+            if nid in self.removed:
+                raise KeyError(nid)
+            i = self.doc_nums[nid]
+            start, end = self.offsets[i], self.offsets[i + 1]
+            coll = self.collection
+            item = NewsItem.from_arrays(nid, self.term_ids[start:end], self.tfs[start:end], self.lengths[i],
+                                        coll.dictionary)
+            # Stored weights are those of the collection as saved, version 0
+            weights = None
+            if coll.version == 0:
+                vocab = self.vocab
+                weights = {vocab[tid]: w for tid, w in zip(self.term_ids[start:end], self.weights[start:end])}
+            nd = {"news_item": item, "tf_idf": TfidfVector(coll, item, weights)}
+            self.cache[nid] = nd
+        return nd
+
+    def __setitem__(self, nid, nd):
+        if nid in self.doc_nums and nid not in self.removed:
+            self.cache[nid] = nd
+        else:
+            self.added[nid] = nd
+
+    def __delitem__(self, nid):
+        if nid in self.added:
+            del self.added[nid]
+        elif nid in self.doc_nums and nid not in self.removed:
+            self.cache.pop(nid, None)
+            self.removed.add(nid)
+        else:
+            raise KeyError(nid)
+
+    def __contains__(self, nid):
+        return nid in self.added or (nid in self.doc_nums and nid not in self.removed)
+
+    def __iter__(self):
+        if self.removed:
+            for nid in self.nids:
+                if nid not in self.removed:
+                    yield nid
+        else:
+            yield from self.nids
+        yield from self.added
+
+    def __len__(self):
+        return len(self.nids) - len(self.removed) + len(self.added)
+
+    def document_lengths(self):
+        """
+        {newsID: word count} in collection order, read from the file for
+        documents not yet materialized.
+        """
+        lengths = {}
+        for nid in self:
+            nd = self.added.get(nid)
+            lengths[nid] = nd["news_item"].get_size() if nd is not None else self.lengths[self.doc_nums[nid]]
+        return lengths
+
+
+def load_index(path, stemmer, compress_postings=False, stats=None):
+    """
+    Memory-map an index file written by save_index and rebuild a NewsCollection
+    from it without touching the source documents.
+
+    Parameters:
+        path (str): Index file.
+        stemmer: Stemmer kept on the collection for later query processing.
+        compress_postings (bool): Encode the stored postings as CompressedPostings
+            instead of decoding them per term on demand.
+        stats (Instrumentation, optional): Kept on the collection and its
+            analyzer, as the NewsCollection constructor does.
+
+    Returns:
+        NewsCollection: The loaded collection. Postings are decoded per term and
+        documents per newsID on demand.
+    """
+    header, base = read_header(path)
+    if header is None:
+        raise ValueError(f"{path} is not a news collection index")
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+
+    def section(name):
+        offset, size, code = header["sections"][name]
+        raw = view[base + offset: base + offset + size]
+        return raw if code == "B" else raw.cast(code)
+
+    def strings(name):
+        blob, offsets = bytes(section(name)), section(name + "_offsets").tolist()
+        text = blob.decode("utf-8")
+        if len(text) == len(blob):
+            # Pure ASCII: byte offsets are character offsets
+            return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        return [blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    vocab = strings("vocab")
+    nids = strings("nids")
+    df_values = section("df")
+    doc_lengths = section("doc_lengths")
+    doc_offsets = section("doc_offsets")
+    fwd_terms = section("fwd_terms")
+    fwd_tfs = section("fwd_tfs")
+    fwd_weights = section("fwd_weights")
+
+    collection = NewsCollection.__new__(NewsCollection)
+    collection.stopwordList = header["stop_words"]
+    collection.stemmer = stemmer
+    collection.stats = stats if stats is not None else NULL_STATS
+    collection.query_cache = None
+    collection.compress_postings = compress_postings
+    collection.bm25_impacts = None
+    collection.pruned_tfidf = None
+    collection.positions = None
+    collection.fields = None
+    collection.documents = None
+    collection.analyzer = Analyzer(collection.stopwordList, stemmer, stats=collection.stats)
+    collection.query_parser = QueryParser(collection.stopwordList, stemmer)
+    collection.totalDocLength = header["total_length"]
+    collection.ndocs = header["ndocs"]
+    collection.df = Counter(dict(zip(vocab, df_values.tolist())))
+    if 0 in collection.df.values():
+        collection.df = Counter({term: d for term, d in collection.df.items() if d})
+    collection.dictionary = TermDictionary(vocab)
+    collection.version = 0
+    collection.newscollectiondict = MappedDocuments(collection, nids, doc_lengths, doc_offsets,
+                                                    fwd_terms, fwd_tfs, fwd_weights, vocab)
+    collection.doc_ids = dict(collection.newscollectiondict.doc_nums)
+    collection.next_ordinal = len(collection.doc_ids)
+    if compress_postings:
+        collection.postings = CompressedPostings.from_arrays(collection.doc_ids, nids, vocab,
+                                                             section("post_offsets"), section("post_docs"),
+                                                             section("post_tfs"))
+    else:
+        # The dictionary grows with added documents; the postings only know the file's terms
+        collection.postings = MappedPostings(dict(collection.dictionary.ids),
+                                             section("post_offsets"), section("post_docs"),
+                                             section("post_tfs"), nids)
+    collection.index_mmap = mapped
+    return collection
@@ -1,94 +1,177 @@
+from array import array
 from collections import Counter
-from .XMLElement import XMLCollection
-from .Q_Parser import Q_Parser
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from .XMLElement import XMLCollection, parse_fields
+from .Q_Parser import QueryParser
+from .Analyzer import Analyzer
+from .TermDictionary import TermDictionary
+from .Stats import NULL_STATS
+from .Postings import CompressedPostings, posting_blocks, posting_cursor, posting_probe
+from .CorpusReader import iter_documents
+from .Impacts import BM25Impacts
+from .Pruning import PrunedTfidf
+from .Positions import PositionalIndex, document_positions, parse_positional_query
+from .DocStore import DocStore, DocStoreWriter
+from .Fields import FieldIndex, analyze_fields, merge_fields
+from .Export import write_term_stats
 
-import os
-import re
+import io
 import math
+import time
+import heapq
+from itertools import islice
+
+# Per-process state of ingestion workers, set by init_ingest_worker
+_worker_stop_words = None
+_worker_stemmer = None
+_worker_analyzer = None
+_worker_positions = False
+_worker_schema = None
+
+
+def check_top_k(top_k):
+    """
+    Raise ValueError unless top_k is None or a positive integer.
+    """
+    if top_k is not None and (not isinstance(top_k, int) or top_k < 1):
+        raise ValueError(f"top_k must be a positive integer, not {top_k!r}")
+
+
+def init_ingest_worker(stop_words, stemmer_language, positions=False, schema=None):
+    """
+    Process pool initializer: stemmers cannot be pickled, so every worker
+    builds its own once and keeps it for all documents it processes.
+    """
+    import Stemmer
+    global _worker_stop_words, _worker_stemmer, _worker_analyzer, _worker_positions, _worker_schema
+    _worker_stop_words = stop_words
+    _worker_stemmer = Stemmer.Stemmer(stemmer_language)
+    _worker_analyzer = Analyzer(stop_words, _worker_stemmer)
+    _worker_positions = positions
+    _worker_schema = schema
+
+
+def ingest_document(content):
+    """
+    Parse, clean and stem one document inside a worker process.
+    Returns (newsID, {term: freq} in first-seen order, word count, {term: [positions]}
+    or None unless the worker was started with positions, ({field: terms}, {field: length})
+    or None unless it was started with a schema).
+    """
+    if _worker_schema is not None:
+        newsID, texts = parse_fields(content, _worker_schema.tag_fields, _worker_schema.skip)
+        terms, lengths = analyze_fields(texts, _worker_analyzer, _worker_schema.fields)
+        return newsID, dict(merge_fields(terms)), sum(lengths.values()), None, (terms, lengths)
+    if _worker_positions:
+        newsID, positions, size = document_positions(XMLCollection(content), _worker_analyzer)
+        return newsID, {term: len(plist) for term, plist in positions.items()}, size, positions, None
+    news_item = NewsItem(XMLCollection(content), _worker_stop_words, _worker_stemmer, _worker_analyzer)
+    return news_item.newsID, dict(news_item.iter_terms()), news_item.get_size(), None, None
+
 
 class NewsItem():
     """
     Wraps a single news item, extracting and counting normalized, stemmed terms.
+    Terms are stored as ids from a shared TermDictionary with their
+    frequencies in parallel arrays, in first-seen order.
     """
+    __slots__ = ("newsID", "item_size", "term_ids", "freqs", "dictionary")
 
-    def __init__(self, xml_collection, stop_words, stemmer):
+    def __init__(self, xml_collection, stop_words, stemmer, analyzer=None, dictionary=None):
         """
         Initialize the NewsItem:
         - Parse XML elements to extract text
-        - Clean, tokenize, remove stop-words, stem, and count terms
+        - Clean, tokenize, remove stop-words, stem, and count terms (see Analyzer)
         - Track total word count and document ID
+        Pass a shared analyzer to reuse its stem cache (and stop-word set) across
+        documents, and a shared dictionary so all items intern into one id space.
         """
-        self.terms = Counter()
         self.item_size = 0
         self.newsID = ""
-        self.stop_words = set(stop_words)
+        self.dictionary = dictionary if dictionary is not None else TermDictionary()
+        if analyzer is None:
+            analyzer = Analyzer(stop_words, stemmer)
 
         # Process each element in the XML tree
+        stats = analyzer.stats
+        terms = Counter()
         for element in xml_collection.elements:
             if element.tag == "newsitem":
                 self.newsID = element.properties.get("itemid", "")
             if element.content:
-                element_bag = self.bag_of_words(element.content, stemmer)
-                self.terms += element_bag
-        self.ordered_terms = dict(self.terms.most_common())
-
-    def clean_content(self, text, stopping_words):
-        """
-        Normalise raw text:
-        - Remove URLs, HTML entities, digits, and unwanted symbols
-        - Split into words, lowercase, strip punctuation
-        - Filter out stop-words and single-character tokens
-        - Update document word count
-        Returns a list of cleaned word tokens.
-        """
-        if not text:
-            return []
-        text = re.sub(r'https?://\S+', '', text)
-        text = re.sub(r'\(c\)', '', text, flags=re.IGNORECASE)
-        text = re.sub(r"\'s\b", '', text)
-        text = re.sub(r'\+', '', text)
-        text = re.sub(r"&quot;", "", text)
-        text = re.sub(r"\d+", "", text)
-        text = re.sub(r'[^\w\s]', ' ', text)
-        words = re.split(r"\s+", text)
-        self.set_size(self.get_size() + len(words))
-
-        # strip, lowercase, filter stop-words and single characters
-        words = [word.strip().lower() for word in words if word.strip().lower() not in stopping_words and len(word) > 1]
-
-        return words
-
-    def stem_words(self, words, stemmer):
-        """
-        Apply the provided stemmer to each token.
-        Returns a list of stemmed tokens.
-        """
-        return stemmer.stemWords(words)
-
-    def bag_of_words(self, text, stemmer):
-        """
-        Convert raw text into a term-frequency Counter:
-        1. Clean content
-        2. Stem words
-        3. Count non-empty stems
-        """
-        if not text:
-            return Counter()
-        words = self.clean_content(text, self.stop_words)
-        stems = self.stem_words(words, stemmer)
-        bag = Counter()
-        for stem in stems:
-            s = stem.strip()
-            if s:
-                bag[s] += 1
-        return bag
+                element_bag, words = analyzer.analyze(element.content)
+                self.set_size(self.get_size() + words)
+                if stats.enabled:
+                    with stats.stage("analyze.merge", tokens=len(element_bag)):
+                        terms.update(element_bag)
+                else:
+                    terms.update(element_bag)
+        self.set_terms(terms)
+
+    @classmethod
+    def from_terms(cls, newsID, terms, size, dictionary):
+        """
+        Rebuild a NewsItem from already counted terms (e.g. from a worker process)
+        without parsing or stemming the source document.
+        """
+        item = cls.__new__(cls)
+        item.newsID = newsID
+        item.item_size = size
+        item.dictionary = dictionary
+        item.set_terms(terms)
+        return item
+
+    @classmethod
+    def from_arrays(cls, newsID, term_ids, freqs, size, dictionary):
+        """
+        Rebuild a NewsItem from term id and frequency arrays already in dictionary's id space.
+        """
+        item = cls.__new__(cls)
+        item.newsID = newsID
+        item.item_size = size
+        item.dictionary = dictionary
+        item.term_ids = array("I", term_ids)
+        item.freqs = array("I", freqs)
+        return item
+
+    def set_terms(self, terms):
+        """
+        Replace the item's terms with a {term: freq} mapping, interning each term.
+        """
+        intern = self.dictionary.intern
+        self.term_ids = array("I", [intern(term) for term in terms])
+        self.freqs = array("I", terms.values())
+
+    def iter_terms(self):
+        """
+        Yield (term, freq) pairs in first-seen order without building a Counter.
+        """
+        names = self.dictionary.terms
+        for tid, freq in zip(self.term_ids, self.freqs):
+            yield names[tid], freq
+
+    @property
+    def terms(self):
+        """
+        Counter view {term: freq} of the item, built on demand.
+        """
+        return Counter(dict(self.iter_terms()))
+
+    @property
+    def ordered_terms(self):
+        """
+        {term: freq} ordered by descending frequency, built on demand.
+        """
+        return dict(self.terms.most_common())
 
     def add_term(self, term_bag):
         """
         Merge another Counter of term frequencies into this item.
         """
-        self.terms += term_bag
-        self.ordered_terms = dict(self.terms.most_common())
+        terms = self.terms
+        terms += term_bag
+        self.set_terms(terms)
 
     def get_size(self):
         """
@@ -107,56 +190,362 @@ class NewsItem():
         String representation: header line + each term:freq on its own line.
         """
         lines = [
-            f"Document {self.newsID} contains {sum(self.terms.values())} indexing terms"
+            f"Document {self.newsID} contains {sum(self.freqs)} indexing terms"
             f" and has a total {self.get_size()} words."
         ]
         for term, freq in self.ordered_terms.items():
             lines.append(f"{term}: {freq}")
         return "\n".join(lines) + "\n"
 
+class TfidfVector(Mapping):
+    """
+    Lazily computed, L2-normalised tf-idf vector of one NewsItem.
+
+    Weights are computed from the collection's shared idf table on first
+    access and cached until the collection version changes. Lookups (get,
+    [], in) use the unsorted weights; iterating yields terms by descending
+    weight, and that ordered view is only sorted when first iterated.
+    """
+    __slots__ = ("collection", "item", "version", "weights", "ordered")
+
+    def __init__(self, collection, item, weights=None):
+        """
+        Parameters:
+            collection (NewsCollection): Owner providing idf and version.
+            item (NewsItem): The document.
+            weights (dict, optional): Precomputed weights valid for the current version.
+        """
+        self.collection = collection
+        self.item = item
+        self.version = collection.version if weights is not None else None
+        self.weights = weights
+        self.ordered = None
+
+    def current(self):
+        """
+        Return the {term: weight} dict, recomputing it if the collection changed.
+        """
+        if self.version != self.collection.version:
+            self.weights = self.collection.tfidf_weights(self.item.iter_terms(), self.collection.idf_table())
+            self.version = self.collection.version
+            self.ordered = None
+        return self.weights
+
+    def get(self, term, default=None):
+        return self.current().get(term, default)
+
+    def __getitem__(self, term):
+        return self.current()[term]
+
+    def __contains__(self, term):
+        return term in self.current()
+
+    def __len__(self):
+        return len(self.current())
+
+    def __iter__(self):
+        weights = self.current()
+        if self.ordered is None:
+            self.ordered = dict(sorted(weights.items(), key=lambda kv: kv[1], reverse=True))
+        return iter(self.ordered)
+
+    def release(self):
+        """
+        Drop the cached weights; they are recomputed on next access.
+        """
+        self.version = None
+        self.weights = None
+        self.ordered = None
+
 class NewsCollection():
     """
     Holds a collection of NewsItem objects and computes global statistics
     like document frequencies, TF-IDF, and BM25 rankings.
     """
 
-    def __init__(self, data_dir, stop_word_path, stemmer):
+    def __init__(self, data_dir, stop_word_path, stemmer, workers=1, stemmer_language="english", stats=None,
+                 query_cache=None, compress_postings=False, bm25_impacts=False, positions=False,
+                 doc_store=None, schema=None):
         """
-        Load XML files, parse stop-words, create NewsItem for each document,
+        Stream XML files, parse stop-words, create NewsItem for each document,
         compute document-frequency (df), TF-IDF vectors, and prepare for BM25.
+        data_dir may be a directory, a .zip/.tar.gz archive or a list of files
+        (see CorpusReader.iter_documents); raw text is dropped once parsed.
+        With workers > 1 documents are parsed and stemmed in a process pool,
+        each worker using its own stemmer for stemmer_language.
+        Pass an Instrumentation as stats to record per-stage timings and counters,
+        and a QueryCache as query_cache to reuse the rankings of repeated queries.
+        With compress_postings the inverted index is kept as gap-encoded blocks
+        with skip entries (see src/Postings.py) instead of dicts; it is off by
+        default since decoding makes queries slightly slower.
+        With bm25_impacts, quantized BM25 impacts are precomputed at build time
+        (see build_bm25_impacts).
+        With positions, word positions are kept in a PositionalIndex for phrase
+        and proximity queries (see rank_positional).
+        With doc_store (a file path), the raw documents are written to a packed
+        DocStore while ingesting and read back through mmap on demand.
+        With a FieldSchema as schema only the schema's fields are parsed and
+        indexed, each with its own statistics in a FieldIndex (see rank_bm25f);
+        document lengths then count the words of those fields only.
         """
-        self.files = self.load_dir(data_dir)
+        if schema is not None and positions:
+            raise ValueError("positions cannot be combined with a field schema")
+        self.stats = stats if stats is not None else NULL_STATS
+        self.query_cache = query_cache
+        self.compress_postings = compress_postings
+        self.positions = PositionalIndex() if positions else None
+        self.fields = FieldIndex(schema) if schema is not None else None
         self.stopwordList = self.load_stopwords(stop_word_path)
         self.stemmer = stemmer
+        self.analyzer = Analyzer(self.stopwordList, stemmer, stats=self.stats)
+        self.dictionary = TermDictionary()
+        self.query_parser = QueryParser(self.stopwordList, stemmer)
         self.totalDocLength = 0
-        self.newscollectiondict = self.generate_newscollection(self.files, self.stopwordList)
+        documents = self.read_documents(data_dir)
+        store = DocStoreWriter(doc_store) if doc_store else None
+        if workers > 1:
+            self.newscollectiondict = self.generate_newscollection_parallel(
+                documents, self.stopwordList, workers, stemmer_language, store=store)
+        else:
+            self.newscollectiondict = self.generate_newscollection(documents, self.stopwordList, store)
+        if store is not None:
+            store.close()
+        self.documents = DocStore(doc_store) if doc_store else None
         self.ndocs = len(self.newscollectiondict)
-        self.df = self.my_df()
-        self.all_tfidf()
+        with self.stats.stage("df", docs=self.ndocs):
+            self.df = self.my_df()
+        self.doc_ids = {nid: i for i, nid in enumerate(self.newscollectiondict)}
+        self.next_ordinal = len(self.doc_ids)
+        with self.stats.stage("postings", docs=self.ndocs):
+            self.postings = self.build_postings()
+        # version is bumped on every add/remove so cached statistics can be invalidated
+        self.version = 0
+        with self.stats.stage("tfidf", docs=self.ndocs):
+            self.all_tfidf()
+        self.bm25_impacts = None
+        self.pruned_tfidf = None
+        if bm25_impacts:
+            with self.stats.stage("bm25_impacts", docs=self.ndocs):
+                self.build_bm25_impacts()
 
-    def generate_newscollection(self, file_contents, stopwordList):
+    def generate_newscollection(self, file_contents, stopwordList, store=None):
         """
-        Instantiate NewsItem for each file's XML content.
-        Track total word count across documents.
+        Instantiate NewsItem for each file's XML content, consuming file_contents lazily.
+        Track total word count across documents. Raw documents are also written
+        to store (a DocStoreWriter) if given.
         Returns a dict of {newsID: {"news_item": NewsItem, "tf_idf": None}}.
         """
         news_collection = {}
+        stats = self.stats
         for content in file_contents:
-            xml_collection = XMLCollection(content)
-            news_item = NewsItem(xml_collection, stopwordList, self.stemmer)
+            with stats.stage("parse", docs=1, nbytes=len(content) if stats.enabled else 0):
+                parsed = self.parse_document(content)
+            with stats.stage("analyze", docs=1) as timer:
+                news_item = self.make_item(parsed, news_collection)
+                timer.tokens = news_item.get_size()
             news_collection[news_item.newsID] = {"news_item": news_item, "tf_idf": None}
             self.totalDocLength += news_item.get_size()
+            if store is not None:
+                store.add(news_item.newsID, content)
         return news_collection
 
+    def generate_newscollection_parallel(self, file_contents, stopwordList, workers, stemmer_language,
+                                         chunksize=16, store=None):
+        """
+        Same as generate_newscollection but fans the documents out to a
+        ProcessPoolExecutor. Workers return per-document term counts and the
+        parent merges them in input order, so the result matches the serial build.
+        Documents are handed out window by window, so only chunksize * 4 documents
+        per worker are in flight at a time.
+        Instrumentation sees this as a single "ingest.parallel" stage.
+        """
+        news_collection = {}
+        file_contents = iter(file_contents)
+        window = workers * chunksize * 4
+        ndocs = 0
+        with self.stats.stage("ingest.parallel") as timer, \
+                ProcessPoolExecutor(max_workers=workers, initializer=init_ingest_worker,
+                                    initargs=(stopwordList, stemmer_language, self.positions is not None,
+                                              self.fields.schema if self.fields is not None else None)) as pool:
+            while True:
+                batch = list(islice(file_contents, window))
+                if not batch:
+                    break
+                results = pool.map(ingest_document, batch, chunksize=chunksize)
+                for content, (newsID, terms, size, positions, fields) in zip(batch, results):
+                    if store is not None:
+                        store.add(newsID, content)
+                    if fields is not None:
+                        if newsID in news_collection:
+                            old_item = news_collection[newsID]["news_item"]
+                            self.fields.remove(newsID, (t for t, _ in old_item.iter_terms()))
+                        self.fields.add(newsID, *fields)
+                    if positions is not None:
+                        if newsID in news_collection:
+                            old_item = news_collection[newsID]["news_item"]
+                            self.positions.remove(newsID, (t for t, _ in old_item.iter_terms()))
+                        self.positions.add(newsID, positions)
+                    news_item = NewsItem.from_terms(newsID, terms, size, self.dictionary)
+                    news_collection[newsID] = {"news_item": news_item, "tf_idf": None}
+                    self.totalDocLength += size
+                    ndocs += 1
+            timer.docs = ndocs
+            timer.tokens = self.totalDocLength
+        return news_collection
+
+    def parse_document(self, content):
+        """
+        Parse raw XML: the whole tree, or with a field schema only
+        (newsID, [(field, text)]) from XMLElement.parse_fields.
+        """
+        if self.fields is None:
+            return XMLCollection(content)
+        schema = self.fields.schema
+        return parse_fields(content, schema.tag_fields, schema.skip)
+
+    def make_item(self, parsed, news_collection):
+        """
+        Build the NewsItem of a parsed document (see parse_document); with a
+        positional index or field schema the document is analyzed once and also
+        added to that index, replacing an earlier document with the same newsID
+        in news_collection.
+        """
+        if self.fields is not None:
+            newsID, texts = parsed
+            terms, lengths = analyze_fields(texts, self.analyzer, self.fields.schema.fields)
+            if newsID in news_collection:
+                self.fields.remove(newsID, (t for t, _ in news_collection[newsID]["news_item"].iter_terms()))
+            self.fields.add(newsID, terms, lengths)
+            return NewsItem.from_terms(newsID, merge_fields(terms), sum(lengths.values()), self.dictionary)
+        if self.positions is None:
+            return NewsItem(parsed, self.stopwordList, self.stemmer, self.analyzer, self.dictionary)
+        newsID, positions, size = document_positions(parsed, self.analyzer)
+        if newsID in news_collection:
+            self.positions.remove(newsID, (t for t, _ in news_collection[newsID]["news_item"].iter_terms()))
+        self.positions.add(newsID, positions)
+        return NewsItem.from_terms(newsID, {term: len(plist) for term, plist in positions.items()}, size,
+                                   self.dictionary)
+
+    def read_documents(self, source):
+        """
+        Stream the text of every document in source (a directory, archive or
+        list of files) one at a time, recording reads as the "load" stage.
+        """
+        documents = iter_documents(source)
+        stats = self.stats
+        if not stats.enabled:
+            for _, content in documents:
+                yield content
+            return
+        while True:
+            start = time.perf_counter()
+            entry = next(documents, None)
+            if entry is None:
+                break
+            stats.add("load", time.perf_counter() - start, 1, 1, 0, len(entry[1]))
+            yield entry[1]
+
     def load_dir(self, dir_path):
         """
-        Read all files in a directory and return list of their line lists.
+        Read all files in a directory, archive or list of file paths and return a list of their texts.
+        Holds the whole corpus in memory; the constructor streams with read_documents instead.
+        """
+        return [content for _, content in iter_documents(dir_path)]
+
+    def add_document(self, path_or_xml):
+        """
+        Add a single news item to the collection, updating df, postings,
+        document lengths and ndocs in place. An item with an existing
+        newsID replaces the old one.
+        Tf-idf vectors depend on idf, so they are recomputed lazily on next use.
+
+        Parameters:
+            path_or_xml (str or list of str): Path to an XML file, raw XML text, or its lines.
+
+        Returns:
+            str: The newsID of the added item.
+        """
+        if isinstance(path_or_xml, str) and not path_or_xml.lstrip().startswith("<"):
+            content = self.load_file(path_or_xml)
+        else:
+            content = path_or_xml
+        if self.fields is not None:
+            nid, texts = self.parse_document(content)
+            terms, lengths = analyze_fields(texts, self.analyzer, self.fields.schema.fields)
+            if nid in self.newscollectiondict:
+                self.remove_document(nid)
+            self.fields.add(nid, terms, lengths)
+            news_item = NewsItem.from_terms(nid, merge_fields(terms), sum(lengths.values()), self.dictionary)
+        elif self.positions is not None:
+            nid, positions, size = document_positions(XMLCollection(content), self.analyzer)
+            if nid in self.newscollectiondict:
+                self.remove_document(nid)
+            self.positions.add(nid, positions)
+            news_item = NewsItem.from_terms(nid, {term: len(plist) for term, plist in positions.items()}, size,
+                                            self.dictionary)
+        else:
+            news_item = NewsItem(XMLCollection(content), self.stopwordList, self.stemmer, self.analyzer,
+                                 self.dictionary)
+            nid = news_item.newsID
+            if nid in self.newscollectiondict:
+                self.remove_document(nid)
+
+        self.newscollectiondict[nid] = {"news_item": news_item, "tf_idf": TfidfVector(self, news_item)}
+        if self.documents is not None:
+            self.documents.add(nid, content)
+        self.doc_ids[nid] = self.next_ordinal
+        self.next_ordinal += 1
+        self.ndocs += 1
+        self.totalDocLength += news_item.get_size()
+        for term, freq in news_item.iter_terms():
+            self.df[term] += 1
+            plist = self.postings.get(term)
+            if plist is None:
+                self.postings[term] = {nid: freq}
+            else:
+                plist[nid] = freq
+        self.version += 1
+        return nid
+
+    def remove_document(self, newsID):
+        """
+        Remove a news item from the collection, updating df, postings,
+        document lengths and ndocs in place.
+        Tf-idf vectors depend on idf, so they are recomputed lazily on next use.
+        Raises KeyError if the newsID is not in the collection.
+        """
+        nd = self.newscollectiondict.pop(newsID)
+        news_item = nd["news_item"]
+        if self.positions is not None:
+            self.positions.remove(newsID, (term for term, _ in news_item.iter_terms()))
+        if self.fields is not None:
+            self.fields.remove(newsID, (term for term, _ in news_item.iter_terms()))
+        if self.documents is not None:
+            self.documents.remove(newsID)
+        self.ndocs -= 1
+        self.totalDocLength -= news_item.get_size()
+        for term, _ in news_item.iter_terms():
+            self.df[term] -= 1
+            if self.df[term] <= 0:
+                del self.df[term]
+                del self.postings[term]
+            else:
+                del self.postings[term][newsID]
+        # Compressed postings look documents up by ordinal, so drop it last
+        del self.doc_ids[newsID]
+        self.version += 1
+
+    def apply_global_stats(self, df, ndocs, total_length):
+        """
+        Replace df, ndocs and the total document length with the statistics of
+        a larger collection this one is a shard of, so idf, average length and
+        therefore every tf-idf and BM25 score match a single build of the whole
+        collection. Postings stay local. Cached statistics are invalidated.
         """
-        contents = []
-        for entry in os.scandir(dir_path):
-            if entry.is_file():
-                contents.append(self.load_file(entry.path))
-        return contents
+        self.df = Counter(df)
+        self.ndocs = ndocs
+        self.totalDocLength = total_length
+        self.version += 1
 
     def load_stopwords(self, stop_word_path):
         """
@@ -182,10 +571,45 @@ class NewsCollection():
         """
         df = Counter()
         for nd in self.newscollectiondict.values():
-            for term in nd["news_item"].terms:
+            for term, _ in nd["news_item"].iter_terms():
                 df[term] += 1
         return df
 
+    def build_postings(self):
+        """
+        Build the inverted index: for each term, the documents containing it.
+        Returns a dict {term: {newsID: tf}} whose postings follow collection order,
+        or the same mapping as CompressedPostings if compress_postings is set.
+        """
+        if getattr(self, "compress_postings", False):
+            return CompressedPostings.from_documents(
+                self.doc_ids, ((nid, nd["news_item"].iter_terms()) for nid, nd in self.newscollectiondict.items()))
+        postings = {}
+        for nid, nd in self.newscollectiondict.items():
+            for term, freq in nd["news_item"].iter_terms():
+                postings.setdefault(term, {})[nid] = freq
+        return postings
+
+    def rank_scores(self, scores, top_k=None):
+        """
+        Order accumulated {newsID: score} pairs the way a full scan would:
+        scores descending, ties in collection order, then every document
+        that scored nothing with a score of zero.
+        If top_k is given only the best top_k are kept, selected with a bounded heap.
+        """
+        hits = ((nid, s) for nid, s in scores.items() if s > 0)
+        order = lambda kv: (-kv[1], self.doc_ids[kv[0]])
+        if top_k is None:
+            ranked = dict(sorted(hits, key=order))
+        else:
+            ranked = dict(heapq.nsmallest(top_k, hits, key=order))
+        for nid in self.newscollectiondict:
+            if top_k is not None and len(ranked) >= top_k:
+                break
+            if nid not in ranked:
+                ranked[nid] = scores.get(nid, 0.0)
+        return ranked
+
     def my_tfidf(self, doc, d_f, ndocs):
         """
         Compute L2-normalized TF-IDF for a single document.
@@ -193,37 +617,109 @@ class NewsCollection():
           doc   - NewsItem or dict(term: freq)
           d_f   - document frequencies
           ndocs - total number of documents
+        Uses the cached idf table when called with the collection's own df and ndocs.
         Returns a dict of normalised tf-idf weights sorted descending.
         """
-        freqs = doc.terms if hasattr(doc, 'terms') else doc
-        idf = {t: math.log10(ndocs / d_f[t]) for t in d_f} # Compute IDF
-        tf = {t: 1 + math.log10(f) for t, f in freqs.items() if f > 0} # Compute TF
+        freqs = doc.iter_terms() if hasattr(doc, 'iter_terms') else doc.items()
+        if d_f is self.df and ndocs == self.ndocs:
+            idf = self.idf_table()
+        else:
+            idf = {t: math.log10(ndocs / d_f[t]) for t in d_f} # Compute IDF
+        raw = self.tfidf_weights(freqs, idf)
+        return dict(sorted(raw.items(), key=lambda kv: kv[1], reverse=True))
+
+    def idf_table(self):
+        """
+        Return {term: log10(ndocs / df)} for the whole vocabulary, computed
+        once per collection version and shared by all documents and queries.
+        """
+        cached = getattr(self, "idf_cache", None)
+        if cached is None or cached[0] != self.version:
+            cached = (self.version, {t: math.log10(self.ndocs / d) for t, d in self.df.items()})
+            self.idf_cache = cached
+        return cached[1]
+
+    def tfidf_weights(self, freqs, idf):
+        """
+        L2-normalised tf-idf weights of (term, freq) pairs against an idf table.
+        Returns an unsorted {term: weight} dict.
+        """
+        tf = {t: 1 + math.log10(f) for t, f in freqs if f > 0} # Compute TF
         raw = {t: tf[t] * idf[t] for t in tf if t in idf} # Compute TF*IDF Numerator
         norm = math.sqrt(sum(v*v for v in raw.values())) # Compute Normalisation
         if norm > 0:
             for t in raw:
                 raw[t] /= norm # Apply Normalisation for each Term
-        return dict(sorted(raw.items(), key=lambda kv: kv[1], reverse=True))
+        return raw
 
     def all_tfidf(self):
         """
-        Compute and store tf-idf vectors for every NewsItem in the collection.
+        Attach a lazy TfidfVector to every NewsItem in the collection.
+        Weights are computed on first access, not here.
         """
         # nd stands for news dictionary {"news_item" : NewsItem, "tf_idf": TF*IDF}
         for nd in self.newscollectiondict.values():
-            nd["tf_idf"] = self.my_tfidf(nd["news_item"], self.df, self.ndocs)
+            nd["tf_idf"] = TfidfVector(self, nd["news_item"])
 
-    def rank_tfidf(self, q_tfidf):
+    def rank_tfidf(self, q_tfidf, top_k=None, exact=False):
         """
         Score each document by abstract ranking model (dot product) to the query tf-idf vector.
-        Returns a dict of {newsID: score} sorted descending.
+        Scores term-at-a-time over the postings of the query terms only, or over
+        the kept postings of the pruned index if prune_tfidf was called and exact is not set.
+        Returns a dict of {newsID: score} sorted descending, cut to top_k if given.
         """
         # nid stands for newsID and nd is same as above
-        scores = {nid: 0 for nid in self.newscollectiondict}
-        for nid, nd in self.newscollectiondict.items():
-            for term, weight in q_tfidf.items():
-                scores[nid] += weight * nd["tf_idf"].get(term, 0)
-        return dict(sorted(scores.items(), key=lambda kv: kv[1], reverse=True))
+        check_top_k(top_k)
+        stats = self.stats
+        start = time.perf_counter() if stats.enabled else 0.0
+        pruned = None if exact else getattr(self, "pruned_tfidf", None)
+        if pruned is not None:
+            if pruned.version != self.version:
+                pruned.build()
+            scores = pruned.scores(q_tfidf)
+            ranked = self.rank_scores(scores, top_k)
+            if stats.enabled:
+                stats.record_query("tfidf_pruned", time.perf_counter() - start, len(q_tfidf), len(scores),
+                                   len(ranked))
+            return ranked
+        scores = {}
+        docs = self.newscollectiondict
+        for term, weight in q_tfidf.items():
+            plist = self.postings.get(term)
+            if plist is None:
+                continue
+            for nids, _ in posting_blocks(plist):
+                for nid in nids:
+                    scores[nid] = scores.get(nid, 0) + weight * docs[nid]["tf_idf"].get(term, 0)
+        ranked = self.rank_scores(scores, top_k)
+        if stats.enabled:
+            stats.record_query("tfidf", time.perf_counter() - start, len(q_tfidf), len(scores), len(ranked))
+        return ranked
+
+    def prune_tfidf(self, top_n=None, threshold=None, budget=None, by="document"):
+        """
+        Statically prune the tf-idf index: keep the top_n weights per document
+        (by="document") or per term (by="term"), only weights >= threshold, and
+        at most budget bytes of postings; see PrunedTfidf. rank_tfidf (and so
+        Q_Collection) then scores from the pruned index; pass exact=True for the
+        full one. The cached full vectors are released.
+        Returns the PrunedTfidf, also kept as self.pruned_tfidf; its report()
+        gives the resulting size.
+        """
+        self.pruned_tfidf = PrunedTfidf(self, top_n, threshold, budget, by)
+        if self.query_cache is not None:
+            self.query_cache.clear()
+        return self.pruned_tfidf
+
+    def document_lengths(self):
+        """
+        {newsID: word count} in collection order. A loaded index reads them
+        from the file without materializing its documents.
+        """
+        docs = self.newscollectiondict
+        if hasattr(docs, "document_lengths"):
+            return docs.document_lengths()
+        return {nid: nd["news_item"].get_size() for nid, nd in docs.items()}
 
     def avg_length(self):
         """
@@ -231,29 +727,370 @@ class NewsCollection():
         """
         return self.totalDocLength / self.ndocs if self.ndocs else 0
 
-    def my_bm25(self, q, df):
+    def my_bm25(self, q, df, top_k=None):
         """
         Compute BM25 scores for query q against all documents.
-        Clamps negative IDF to zero.
-        Returns a dict {newsID: score} sorted descending.
+        Clamps negative IDF to zero. Only documents in the postings of a
+        query term are scored; the rest score zero.
+        With top_k, MaxScore pruning skips documents that cannot enter the top k.
+        Results are served from the query cache, if any, when df is the collection's own.
+        Returns a dict {newsID: score} sorted descending, cut to top_k if given.
+        """
+        query_tf = self.query_parser.parse(q)
+        cache = self.query_cache
+        if cache is None or df is not self.df:
+            return self.bm25_rank(query_tf, df, top_k)
+        return cache.get_or_compute(self.version, "bm25", query_tf, (top_k,),
+                                    lambda: self.bm25_rank(query_tf, df, top_k))
+
+    def bm25_rank(self, query_tf, df, top_k=None):
         """
+        BM25 ranking of an already parsed query (term -> qf), see my_bm25.
+        """
+        check_top_k(top_k)
+        stats = self.stats
+        start = time.perf_counter() if stats.enabled else 0.0
         scores = {}
         k1, k2, b = 1.2, 100, 0.75
-        query_tf = Q_Parser(q, self.stopwordList)
-        for nid, nd in self.newscollectiondict.items():
-            score = 0
-            d = nd["news_item"]
+        impacts = getattr(self, "bm25_impacts", None)
+        if impacts is not None and df is self.df:
+            if impacts.version != self.version:
+                impacts.build()
+            scores = impacts.scores(query_tf, k2)
+            ranked = self.rank_scores(scores, top_k)
+            if stats.enabled:
+                stats.record_query("bm25_impacts", time.perf_counter() - start, len(query_tf), len(scores),
+                                   len(ranked))
+            return ranked
+        avg_length = self.avg_length()
+        query_terms = [(term, max(0, math.log10((self.ndocs - df[term] + 0.5) / (df[term] + 0.5))), qf)
+                       for term, qf in query_tf.items()]
+        if top_k is not None:
+            scores = self.bm25_maxscore(query_terms, top_k, avg_length, k1, k2, b)
+        else:
+            length_factors = self.bm25_length_factors(k1, b)
+            for term, idf, qf in query_terms:
+                plist = self.postings.get(term)
+                if plist is None:
+                    continue
+                for nids, tfs in posting_blocks(plist):
+                    for nid, f in zip(nids, tfs):
+                        K = length_factors[nid]
+                        scores[nid] = scores.get(nid, 0) + idf * ((k1 + 1) * f) / (K + f) * ((k2 + 1) * qf) / (k2 + qf)
+        ranked = self.rank_scores(scores, top_k)
+        if stats.enabled:
+            stats.record_query("bm25", time.perf_counter() - start, len(query_terms), len(scores), len(ranked))
+        return ranked
+
+    def rank_tfidf_many(self, q_tfidfs, top_k=None):
+        """
+        Batch equivalent of rank_tfidf. The postings of each distinct query term
+        are walked once for the whole batch and their document weights shared;
+        every query then accumulates its own terms in its own order, so scores
+        equal rank_tfidf's. A pruned index is used per query as in rank_tfidf.
+        Returns a list of {newsID: score} rankings in query order.
+        """
+        check_top_k(top_k)
+        if getattr(self, "pruned_tfidf", None) is not None:
+            return [self.rank_tfidf(q_tfidf, top_k) for q_tfidf in q_tfidfs]
+        stats = self.stats
+        docs = self.newscollectiondict
+        shared = {}
+        rankings = []
+        for q_tfidf in q_tfidfs:
+            start = time.perf_counter() if stats.enabled else 0.0
+            scores = {}
+            for term, weight in q_tfidf.items():
+                doc_weights = shared.get(term)
+                if doc_weights is None:
+                    doc_weights = shared[term] = [(nid, docs[nid]["tf_idf"].get(term, 0))
+                                                  for nids, _ in posting_blocks(self.postings.get(term, {}))
+                                                  for nid in nids]
+                for nid, value in doc_weights:
+                    scores[nid] = scores.get(nid, 0) + weight * value
+            ranked = self.rank_scores(scores, top_k)
+            rankings.append(ranked)
+            if stats.enabled:
+                stats.record_query("tfidf_batch", time.perf_counter() - start, len(q_tfidf), len(scores),
+                                   len(ranked))
+        return rankings
+
+    def rank_bm25_many(self, query_tfs, top_k=None):
+        """
+        Batch equivalent of bm25_rank over the collection's own df. The postings
+        of each distinct query term are walked once for the whole batch, keeping
+        idf * (k1 + 1) * f / (K + f) per document; every query then applies its
+        own qf factor in its own term order, so scores equal the exhaustive
+        bm25_rank's. With top_k the best are selected from the full scores
+        instead of by MaxScore. Impacts, if built, are used per query.
+        Returns a list of {newsID: score} rankings in query order.
+        """
+        check_top_k(top_k)
+        if getattr(self, "bm25_impacts", None) is not None:
+            return [self.bm25_rank(query_tf, self.df, top_k) for query_tf in query_tfs]
+        stats = self.stats
+        k1, k2, b = 1.2, 100, 0.75
+        length_factors = self.bm25_length_factors(k1, b)
+        shared = {}
+        rankings = []
+        for query_tf in query_tfs:
+            start = time.perf_counter() if stats.enabled else 0.0
+            scores = {}
             for term, qf in query_tf.items():
-                f = d.ordered_terms.get(term, 0)
-                idf = max(0, math.log10((self.ndocs - df[term] + 0.5) / (df[term] + 0.5)))
-                K = k1 * ((1 - b) + b * (d.get_size() / self.avg_length()))
-                score += idf * ((k1 + 1) * f) / (K + f) * ((k2 + 1) * qf) / (k2 + qf)
-            scores[nid] = score
-        return dict(sorted(scores.items(), key=lambda kv: kv[1], reverse=True))
+                impacts = shared.get(term)
+                if impacts is None:
+                    d = self.df[term]
+                    idf = max(0, math.log10((self.ndocs - d + 0.5) / (d + 0.5)))
+                    impacts = shared[term] = [(nid, idf * ((k1 + 1) * f) / (length_factors[nid] + f))
+                                              for nids, tfs in posting_blocks(self.postings.get(term, {}))
+                                              for nid, f in zip(nids, tfs)]
+                for nid, impact in impacts:
+                    scores[nid] = scores.get(nid, 0) + impact * ((k2 + 1) * qf) / (k2 + qf)
+            ranked = self.rank_scores(scores, top_k)
+            rankings.append(ranked)
+            if stats.enabled:
+                stats.record_query("bm25_batch", time.perf_counter() - start, len(query_tf), len(scores),
+                                   len(ranked))
+        return rankings
+
+    def bm25_length_factors(self, k1, b):
+        """
+        Per-document BM25 length normaliser K = k1 * ((1 - b) + b * length / avg_length),
+        as a {newsID: K} dict computed once per collection version and k1/b.
+        """
+        key = (self.version, k1, b)
+        cached = getattr(self, "_bm25_length_factors", None)
+        if cached is None or cached[0] != key:
+            avg_length = self.avg_length()
+            cached = (key, {nid: k1 * ((1 - b) + b * (length / avg_length))
+                            for nid, length in self.document_lengths().items()})
+            self._bm25_length_factors = cached
+        return cached[1]
+
+    def build_bm25_impacts(self, k1=1.2, b=0.75, bits=8):
+        """
+        Precompute the BM25 impact idf * (k1 + 1) * f / (K + f) of every posting,
+        quantized to bits (None keeps exact doubles). my_bm25 then scores by summing
+        stored impacts; see BM25Impacts for the error bound. k1 and b are fixed by
+        this build and replace the defaults of my_bm25.
+        Returns the BM25Impacts, also kept as self.bm25_impacts.
+        """
+        self.bm25_impacts = BM25Impacts(self, k1, b, bits)
+        # Cached rankings were scored without these impacts
+        if self.query_cache is not None:
+            self.query_cache.clear()
+        return self.bm25_impacts
+
+    def bm25_term_bound(self, term, avg_length, k1, b):
+        """
+        Largest saturated tf component (k1 + 1) * f / (K + f) over the postings of a term.
+        Cached per term for a given collection version, average length and k1/b.
+        """
+        key = (self.version, avg_length, k1, b)
+        if getattr(self, "_bm25_bounds_key", None) != key:
+            self._bm25_bounds_key = key
+            self._bm25_bounds = {}
+        bound = self._bm25_bounds.get(term)
+        if bound is None:
+            bound = 0.0
+            length_factors = self.bm25_length_factors(k1, b)
+            for nids, tfs in posting_blocks(self.postings.get(term, {})):
+                for nid, f in zip(nids, tfs):
+                    K = length_factors[nid]
+                    bound = max(bound, ((k1 + 1) * f) / (K + f))
+            self._bm25_bounds[term] = bound
+        return bound
+
+    def bm25_maxscore(self, query_terms, top_k, avg_length, k1, k2, b):
+        """
+        Document-at-a-time BM25 with MaxScore dynamic pruning.
+        Terms are ordered by their score upper bound; once the top_k heap is
+        full, the low-bound terms whose summed bounds cannot beat its minimum
+        become non-essential and are only probed for documents drawn from the
+        essential postings. Partial scores only drive pruning: surviving
+        documents are rescored in query-term order so scores match the
+        exhaustive path exactly.
+        Returns a dict {newsID: score} of at most top_k documents.
+        """
+        length_factors = self.bm25_length_factors(k1, b)
+
+        def contribution(nid, f, idf, qf):
+            K = length_factors[nid]
+            return idf * ((k1 + 1) * f) / (K + f) * ((k2 + 1) * qf) / (k2 + qf)
+
+        lists = []
+        for pos, (term, idf, qf) in enumerate(query_terms):
+            plist = self.postings.get(term)
+            if not plist or idf <= 0:
+                continue
+            # Slightly inflate the bound so float rounding never prunes a true hit
+            bound = idf * self.bm25_term_bound(term, avg_length, k1, b) * ((k2 + 1) * qf) / (k2 + qf) * (1 + 1e-9)
+            lists.append((bound, plist, idf, qf, pos))
+        lists.sort(key=lambda entry: entry[0])
+        # Exact rescoring adds contributions back in query-term order
+        rescore_order = sorted(range(len(lists)), key=lambda i: lists[i][4])
+        prefix = []
+        total = 0.0
+        for bound, _, _, _, _ in lists:
+            total += bound
+            prefix.append(total)
+
+        # Cursors hold (ordinal, newsID) of the next unread posting of each list, freqs its tf
+        iterators = [posting_cursor(plist, self.doc_ids) for _, plist, _, _, _ in lists]
+        # Non-essential lists are probed in increasing ordinal order
+        probes = [posting_probe(plist) for _, plist, _, _, _ in lists]
+        cursors = []
+        freqs = []
+        for it in iterators:
+            ordinal, nid, f = next(it, (None, None, 0))
+            cursors.append((ordinal, nid) if nid is not None else None)
+            freqs.append(f)
+
+        heap = []  # (score, -ordinal, newsID) min-heap holding the current top_k
+        threshold = 0.0
+        first_essential = 0
+        while True:
+            current = min((c for c in cursors[first_essential:] if c is not None), default=None)
+            if current is None:
+                break
+            ordinal, nid = current
+            partial = 0.0
+            found = [0] * len(lists)  # tf of nid in each list, once probed
+            for i in range(first_essential, len(lists)):
+                if cursors[i] == current:
+                    _, _, idf, qf, _ = lists[i]
+                    found[i] = freqs[i]
+                    partial += contribution(nid, freqs[i], idf, qf)
+                    nxt_ordinal, nxt, freqs[i] = next(iterators[i], (None, None, 0))
+                    cursors[i] = (nxt_ordinal, nxt) if nxt is not None else None
+            pruned = False
+            for i in range(first_essential - 1, -1, -1):
+                if partial + prefix[i] <= threshold:
+                    pruned = True
+                    break
+                _, _, idf, qf, _ = lists[i]
+                f = found[i] = probes[i](ordinal, nid)
+                if f:
+                    partial += contribution(nid, f, idf, qf)
+            if pruned or partial <= threshold:
+                continue
+
+            # Every list has been probed here; terms without a list contribute nothing
+            score = 0
+            for i in rescore_order:
+                f = found[i]
+                if f:
+                    _, _, idf, qf, _ = lists[i]
+                    score += contribution(nid, f, idf, qf)
+            if score <= threshold:
+                continue
+            if len(heap) < top_k:
+                heapq.heappush(heap, (score, -ordinal, nid))
+            else:
+                heapq.heapreplace(heap, (score, -ordinal, nid))
+            if len(heap) == top_k:
+                threshold = heap[0][0]
+                while first_essential < len(lists) and prefix[first_essential] <= threshold:
+                    first_essential += 1
+        return {nid: score for score, _, nid in heap}
+
+    def rank_positional(self, query, model="bm25", top_k=None, stop_words=None):
+        """
+        Rank a query with "quoted phrases" and near/N(words) operators.
+        Documents must contain every phrase (matched on word positions, stop-words
+        leaving gaps) and have the words of every near group within N words of
+        each other; they are ranked by TF-IDF or BM25 on all the query's words.
+        Requires a collection built with positions=True.
+
+        Parameters:
+            query (str): E.g. '"West Bank" near/5(rocket attack)'.
+            model (str): "bm25" (as my_bm25) or "tfidf" (as Q_Collection).
+            top_k (int, optional): Only return the top_k highest scoring matches.
+            stop_words (QueryParser or str, optional): Parser for "tfidf" queries;
+                defaults to the collection's query parser.
+
+        Returns:
+            sorted dict: {newsID: score} of the matching documents.
+        """
+        if self.positions is None:
+            raise ValueError("Collection was built without positions")
+        check_top_k(top_k)
+        free_text, _, _ = parse_positional_query(query)
+        matched = self.positions.match(query, self.analyzer)
+        limit = top_k if matched is None else None
+        if model == "bm25":
+            ranked = self.my_bm25(free_text, self.df, limit)
+        elif model == "tfidf":
+            if stop_words is None:
+                parser = self.query_parser
+            else:
+                parser = stop_words if isinstance(stop_words, QueryParser) else QueryParser(stop_words)
+            ranked = self.rank_tfidf(self.my_tfidf(parser.parse(free_text), self.df, self.ndocs), limit)
+        else:
+            raise ValueError(f"Unknown ranking model: {model}")
+        if matched is None:
+            return ranked
+        result = {}
+        for nid, score in ranked.items():
+            if nid in matched:
+                result[nid] = score
+                if top_k is not None and len(result) >= top_k:
+                    break
+        return result
+
+    def rank_bm25f(self, q, top_k=None, k1=1.2, k2=100):
+        """
+        Rank query q with BM25F over the fields of the collection's schema,
+        weighting and length-normalising every field on its own (see FieldIndex.bm25f).
+        Requires a collection built with a schema.
+        Returns a dict {newsID: score} sorted descending, cut to top_k if given.
+        """
+        if self.fields is None:
+            raise ValueError("Collection was built without a field schema")
+        check_top_k(top_k)
+        stats = self.stats
+        start = time.perf_counter() if stats.enabled else 0.0
+        query_tf = self.query_parser.parse(q)
+        scores = self.fields.bm25f(query_tf, self.df, self.ndocs, k1, k2)
+        ranked = self.rank_scores(scores, top_k)
+        if stats.enabled:
+            stats.record_query("bm25f", time.perf_counter() - start, len(query_tf), len(scores), len(ranked))
+        return ranked
+
+    def result_snippets(self, ranked, query, width=30):
+        """
+        Headline and query-highlighted snippet of each ranked document, read
+        from the document store. Requires a collection built with doc_store.
+
+        Parameters:
+            ranked (dict): {newsID: score}, e.g. from my_bm25 or Q_Collection.
+            query (str): The raw query, used to pick and highlight the snippet.
+            width (int): Words per snippet.
+
+        Returns:
+            list of dict: {"newsID", "score", "headline", "snippet"} in ranked order.
+        """
+        if self.documents is None:
+            raise ValueError("Collection was built without a document store")
+        terms = self.query_parser.parse(query)
+        return [{"newsID": nid, "score": score, "headline": self.documents.headline(nid),
+                 "snippet": self.documents.snippet(nid, terms, self.analyzer, width)}
+                for nid, score in ranked.items()]
+
+    def save_index(self, path, manifest=None):
+        """
+        Save the collection to a binary index file that load_index can memory-map.
+        See src/IndexFile.py for the layout.
+        """
+        from .IndexFile import save_index
+        save_index(self, path, manifest)
 
     def __str__(self):
         """
         Concatenate the string representations of all NewsItems.
+        Use Export.write_term_stats to stream the same text to a file.
         """
-        return "\n".join(str(nd["news_item"]) for nd in self.newscollectiondict.values())
+        out = io.StringIO()
+        write_term_stats(self, out)
+        return out.getvalue()
 
@@ -1,48 +1,145 @@
 import Stemmer
 from .NewsItem import NewsCollection
-from .Q_Parser import Q_Parser
+from .Q_Parser import QueryParser
+from .IndexFile import index_is_fresh, load_index, source_manifest
+from .DocStore import DocStore
 
+import os
 
-def Rev1_Parser(stop_words, inputfolder):
+
+def Rev1_Parser(stop_words, inputfolder, index_path=None, workers=1, stats=None, query_cache=None,
+                compress_postings=False, positions=False, doc_store=None, schema=None):
     """
     Initialise a NewsCollection from raw documents.
 
     Parameters:
         stop_words (str): Filename of comma seperated words to exclude during tokenization.
         inputfolder (str): Filesystem path containing news article files.
+        index_path (str, optional): Binary index file. If it is up to date with the
+            files in inputfolder it is memory-mapped instead of re-parsing the corpus,
+            otherwise the collection is rebuilt and the index rewritten.
+        workers (int, optional): Number of processes used to parse and stem documents.
+        stats (Instrumentation, optional): Records per-stage timings and counters of the
+            build and of later queries.
+        query_cache (QueryCache, optional): Caches rankings of repeated queries.
+        compress_postings (bool, optional): Keep the postings gap-encoded with skip
+            entries instead of as dicts, trading some query speed for memory.
+        positions (bool, optional): Also build a positional index for
+            NewsCollection.rank_positional.
+        doc_store (str, optional): Packed raw-document file written while building and
+            opened (if present) next to a loaded index, for result_snippets.
+        schema (FieldSchema, optional): Parse and index only the schema's fields, with
+            per-field statistics for rank_bm25f.
+        A fresh index also serves compress_postings, its postings being encoded
+        while loading. It holds neither positions nor field statistics, so with
+        positions or a schema the collection is always built from inputfolder;
+        a fresh index is then left as it is, and a stale one is rewritten only
+        without a schema, whose field-limited terms would not suit other runs.
 
     Returns:
         NewsCollection: An object representing the parsed and preprocessed corpus.
     """
     # Set up an English stemmer for term normalization
     stemmer = Stemmer.Stemmer('english')
+    fresh = bool(index_path) and index_is_fresh(index_path, inputfolder, stop_words)
+    if fresh and not positions and schema is None:
+        Rev1_Coll = load_index(index_path, stemmer, compress_postings, stats)
+        Rev1_Coll.query_cache = query_cache
+        if doc_store and os.path.exists(doc_store):
+            Rev1_Coll.documents = DocStore(doc_store)
+        return Rev1_Coll
     # Build the collection, applying stop word filtering and stemming
-    Rev1_Coll = NewsCollection(inputfolder, stop_words, stemmer)
+    Rev1_Coll = NewsCollection(inputfolder, stop_words, stemmer, workers, stats=stats, query_cache=query_cache,
+                               compress_postings=compress_postings, positions=positions, doc_store=doc_store,
+                               schema=schema)
+    if index_path and not fresh and schema is None:
+        Rev1_Coll.save_index(index_path, source_manifest(inputfolder, stop_words))
     return Rev1_Coll
 
 
-def Q_Collection(query, collection, stop_words):
+def Q_Collection(query, collection, stop_words, top_k=None):
     """
     Rank documents in a NewsCollection according to a search query.
 
     This function parses the input query into term frequencies,
     weights them by collection-level IDF, and returns documents
-    sorted by their TF-IDF relevance scores.
+    sorted by their TF-IDF relevance scores. If the collection has a
+    query cache, repeated queries are answered from it.
 
     Parameters:
         query (str): The raw search string.
         collection (NewsCollection): The corpus to search.
-        stop_words (iterable of str): Filename of comma seperated words to exclude during tokenization.
+        stop_words (iterable of str or QueryParser): Filename of comma seperated words to exclude
+            during tokenization, or an already built QueryParser.
+        top_k (int, optional): Only return the top_k highest scoring documents.
 
     Returns:
        sorted dict: Ranked list of (document_id, score) pairs.
     """
+    parser = stop_words if isinstance(stop_words, QueryParser) else QueryParser(stop_words)
     # Convert query text into term-frequency mapping
-    query_tf = Q_Parser(query, stop_words)
-    # Weight by inverse document frequency
-    query_idf = collection.my_tfidf(query_tf, collection.df, collection.ndocs)
+    query_tf = parser.parse(query)
+
+    def rank():
+        # Weight by inverse document frequency
+        query_idf = collection.my_tfidf(query_tf, collection.df, collection.ndocs)
+        # Score and rank each document by TF-IDF similarity
+        return collection.rank_tfidf(query_idf, top_k)
+
+    cache = getattr(collection, "query_cache", None)
+    if cache is None:
+        return rank()
+    return cache.get_or_compute(collection.version, "tfidf", query_tf, (top_k,), rank)
+
+
+def rank_many(queries, collection, stop_words, top_k=None, model="tfidf", engine=None):
+    """
+    Rank documents for a batch of queries, paying the query parser setup
+    (stop-word file, stemmer) once for the whole batch and scoring the queries
+    the cache cannot answer together, with shared term-at-a-time accumulation
+    (NewsCollection.rank_tfidf_many and rank_bm25_many) or a SparseEngine.
 
-    # Score and rank each document by TF-IDF similarity
-    scores = collection.rank_tfidf(query_idf)
-    return scores
+    Parameters:
+        queries (iterable of str): The raw search strings.
+        collection (NewsCollection): The corpus to search.
+        stop_words (iterable of str or QueryParser): As for Q_Collection. Only used by
+            the "tfidf" model; "bm25" uses the collection's own query parser like my_bm25.
+        top_k (int, optional): Only return the top_k highest scoring documents per query.
+        model (str): "tfidf" (as Q_Collection) or "bm25" (as NewsCollection.my_bm25).
+        engine (SparseEngine, optional): Scores the batch as one sparse matrix product;
+            scores then match up to floating point summation order. The engine always
+            scores the full index, ignoring pruning and BM25 impacts, so its rankings
+            are cached apart from those of Q_Collection and my_bm25.
+
+    Returns:
+        list of sorted dict: One ranking per query, in query order.
+    """
+    if model == "bm25":
+        parser = collection.query_parser
+    elif model == "tfidf":
+        parser = stop_words if isinstance(stop_words, QueryParser) else QueryParser(stop_words)
+    else:
+        raise ValueError(f"Unknown ranking model: {model}")
+    query_tfs = parser.parse_many(queries)
+    cache = getattr(collection, "query_cache", None)
+    version = collection.version
+    params = (top_k,) if engine is None else (top_k, "sparse")
+    rankings = [None] * len(query_tfs)
+    missed = []
+    for i, query_tf in enumerate(query_tfs):
+        if cache is not None:
+            rankings[i] = cache.lookup(version, model, query_tf, params)
+        if rankings[i] is None:
+            missed.append(i)
+    if not missed:
+        return rankings
 
+    scorer = engine if engine is not None else collection
+    if model == "bm25":
+        scored = scorer.rank_bm25_many([query_tfs[i] for i in missed], top_k)
+    else:
+        scored = scorer.rank_tfidf_many(
+            [collection.my_tfidf(query_tfs[i], collection.df, collection.ndocs) for i in missed], top_k)
+    for i, ranked in zip(missed, scored):
+        rankings[i] = cache.store(version, model, query_tfs[i], params, ranked) if cache is not None else ranked
+    return rankings
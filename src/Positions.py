@@ -0,0 +1,222 @@
+from array import array
+from itertools import accumulate
+from .Postings import pack_ints, WIDTHS
+
+import re
+import heapq
+
+# "quoted phrase" and near/N(words) operators of a positional query
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+NEAR_PATTERN = re.compile(r'\bnear/(\d+)\s*\(([^)]*)\)', re.IGNORECASE)
+# Positions skipped between two XML elements, so phrases and near windows
+# shorter than this never match across an element boundary
+ELEMENT_GAP = 100
+
+
+def encode_positions(positions):
+    """
+    Encode increasing word positions as gaps packed at the smallest byte width,
+    behind one width byte.
+    """
+    gaps = [positions[0]]
+    gaps.extend(b - a for a, b in zip(positions, positions[1:]))
+    width, data = pack_ints(gaps)
+    return bytes((width,)) + data
+
+
+def decode_positions(data):
+    """
+    Inverse of encode_positions. Returns a list of positions.
+    """
+    gaps = array(WIDTHS[data[0]])
+    gaps.frombytes(data[1:])
+    return list(accumulate(gaps))
+
+
+def document_positions(xml_collection, analyzer):
+    """
+    Analyze a parsed document keeping word positions, walking the elements the
+    way NewsItem does so counts and term order are identical.
+
+    Returns:
+        tuple: (newsID, {term: [positions]} in first-seen order, word count).
+    """
+    newsID = ""
+    size = 0
+    offset = 0
+    positions = {}
+    for element in xml_collection.elements:
+        if element.tag == "newsitem":
+            newsID = element.properties.get("itemid", "")
+        if element.content:
+            stems, words = analyzer.positions(element.content)
+            for term, i in stems:
+                plist = positions.get(term)
+                if plist is None:
+                    positions[term] = [offset + i]
+                else:
+                    plist.append(offset + i)
+            size += words
+            offset += words + ELEMENT_GAP
+    return newsID, positions, size
+
+
+def shifted_intersection(starts, positions, shift):
+    """
+    Merge two sorted position lists: the starts s for which s + shift is in positions.
+    """
+    out = []
+    i, j = 0, 0
+    while i < len(starts) and j < len(positions):
+        target = starts[i] + shift
+        if positions[j] < target:
+            j += 1
+        elif positions[j] > target:
+            i += 1
+        else:
+            out.append(starts[i])
+            i += 1
+            j += 1
+    return out
+
+
+def parse_positional_query(query):
+    """
+    Split a query into its free text, "quoted phrases" and near/N(...) groups.
+
+    Returns:
+        tuple: (free text with the operators' words kept, list of phrase strings,
+        list of (window, text) proximity groups).
+    """
+    phrases = PHRASE_PATTERN.findall(query)
+    nears = [(int(window), text) for window, text in NEAR_PATTERN.findall(query)]
+    free_text = NEAR_PATTERN.sub(lambda m: " " + m.group(2) + " ", query).replace('"', " ")
+    return free_text, phrases, nears
+
+
+class PositionalIndex():
+    """
+    Optional positional index: {term: {newsID: encoded positions}} with the
+    word positions of every posting gap-encoded (see encode_positions).
+    Phrase and proximity matching merge the decoded position lists of the
+    candidate documents; the text is never scanned again.
+    """
+
+    def __init__(self):
+        self.lists = {}
+
+    def add(self, newsID, positions):
+        """
+        Index the {term: [positions]} of one document.
+        """
+        for term, plist in positions.items():
+            self.lists.setdefault(term, {})[newsID] = encode_positions(plist)
+
+    def remove(self, newsID, terms):
+        """
+        Drop a document from the postings of the given terms.
+        """
+        for term in terms:
+            plist = self.lists.get(term)
+            if plist is not None:
+                plist.pop(newsID, None)
+                if not plist:
+                    del self.lists[term]
+
+    def positions(self, term, newsID):
+        """
+        Word positions of term in a document (empty if absent).
+        """
+        data = self.lists.get(term, {}).get(newsID)
+        return decode_positions(data) if data is not None else []
+
+    def candidates(self, terms):
+        """
+        newsIDs whose postings contain every term, walking the shortest list.
+        """
+        plists = [self.lists.get(term) for term in terms]
+        if not plists or any(plist is None for plist in plists):
+            return []
+        plists.sort(key=len)
+        return [nid for nid in plists[0] if all(nid in plist for plist in plists[1:])]
+
+    def phrase(self, query_positions):
+        """
+        Documents containing a phrase.
+
+        Parameters:
+            query_positions (list of (stem, position)): The analyzed phrase, as from
+                Analyzer.positions; relative positions (stop-word gaps) must match.
+
+        Returns:
+            dict: {newsID: number of occurrences of the phrase}.
+        """
+        if not query_positions:
+            return {}
+        first = query_positions[0][1]
+        terms = [(term, pos - first) for term, pos in query_positions]
+        matches = {}
+        for nid in self.candidates({term for term, _ in terms}):
+            starts = self.positions(terms[0][0], nid)
+            for term, shift in terms[1:]:
+                starts = shifted_intersection(starts, self.positions(term, nid), shift)
+                if not starts:
+                    break
+            if starts:
+                matches[nid] = len(starts)
+        return matches
+
+    def near(self, terms, window):
+        """
+        Documents where all terms occur within window words of each other.
+
+        Parameters:
+            terms (iterable of str): Stems; repeats are ignored.
+            window (int): Largest allowed distance between the first and last term.
+
+        Returns:
+            dict: {newsID: number of positions closing such a window}.
+        """
+        terms = list(dict.fromkeys(terms))
+        if not terms:
+            return {}
+        matches = {}
+        for nid in self.candidates(terms):
+            merged = heapq.merge(*([(p, i) for p in self.positions(term, nid)] for i, term in enumerate(terms)))
+            last = [None] * len(terms)
+            covered = 0
+            count = 0
+            for p, i in merged:
+                if last[i] is None:
+                    covered += 1
+                last[i] = p
+                if covered == len(terms) and p - min(last) <= window:
+                    count += 1
+            if count:
+                matches[nid] = count
+        return matches
+
+    def match(self, query, analyzer):
+        """
+        Documents satisfying every phrase and near/N(...) group of a query.
+        Returns a set of newsIDs, or None if the query has no usable operators.
+        """
+        _, phrases, nears = parse_positional_query(query)
+        matched = None
+        for text in phrases:
+            query_positions, _ = analyzer.positions(text)
+            if query_positions:
+                hits = self.phrase(query_positions)
+                matched = set(hits) if matched is None else matched & hits.keys()
+        for window, text in nears:
+            stems = [term for term, _ in analyzer.positions(text)[0]]
+            if stems:
+                hits = self.near(stems, window)
+                matched = set(hits) if matched is None else matched & hits.keys()
+        return matched
+
+    def nbytes(self):
+        """
+        Bytes of encoded position data.
+        """
+        return sum(len(data) for plist in self.lists.values() for data in plist.values())
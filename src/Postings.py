@@ -0,0 +1,403 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, MutableMapping
+from itertools import accumulate, islice
+
+# Postings per block; each block has one skip entry
+BLOCK_SIZE = 128
+# Unsigned array typecodes of 1, 2, 4 and 8 bytes
+WIDTHS = ["B", "H", "I", "Q"]
+OFFSET_BITS = 32
+
+
+def pack_ints(values):
+    """
+    Encode non-negative ints at the smallest byte width that fits them all.
+    Returns (width index, bytes).
+    """
+    top = max(values)
+    for i, code in enumerate(WIDTHS):
+        if top < 1 << (8 * array(code).itemsize):
+            return i, array(code, values).tobytes()
+    raise OverflowError("posting value too large")
+
+
+class PostingList(Mapping):
+    """
+    Compressed {newsID: tf} postings of one term.
+
+    Documents are kept as ordinals (collection order, see NewsCollection.doc_ids),
+    stored as gaps. Postings are split into blocks of BLOCK_SIZE; each block holds
+    a width byte and then its gaps and tfs packed at the smallest byte width (1, 2,
+    4 or 8) that fits the block, so a whole block decodes in C with
+    array.frombytes and itertools.accumulate. One skip entry per block packs the
+    block's last ordinal with its byte offset, so a lookup bisects the skips and
+    decodes a single block.
+
+    Appending a document later in collection order (add_document) re-encodes only
+    the last block; any other update re-encodes the list.
+
+    Scoring loops walk whole decoded blocks (posting_blocks, posting_cursor) and
+    MaxScore probes a list in increasing ordinal order (posting_probe), so each
+    block is decoded at most once per term and query. Decoding still costs
+    time, so queries run around 10% slower than over dicts; compression is
+    therefore opt-in (NewsCollection's compress_postings).
+    """
+    __slots__ = ("table", "data", "skips", "count", "cached")
+
+    def __init__(self, table, ordinals=(), tfs=()):
+        """
+        Parameters:
+            table (CompressedPostings): Owner, mapping newsIDs to ordinals and back.
+            ordinals (sequence of int): Increasing document ordinals.
+            tfs (sequence of int): Term frequency of each document.
+        """
+        self.table = table
+        self.encode(ordinals, tfs)
+
+    def encode(self, ordinals, tfs):
+        """
+        Replace the postings with (ordinals, tfs), encoding every block.
+        """
+        self.data = bytearray()
+        self.skips = array("Q")
+        self.count = 0
+        self.cached = None
+        for start in range(0, len(ordinals), BLOCK_SIZE):
+            self.append_block(ordinals[start:start + BLOCK_SIZE], tfs[start:start + BLOCK_SIZE])
+
+    def append_block(self, ordinals, tfs):
+        """
+        Encode one block after the existing ones.
+        """
+        base = self.skips[-1] >> OFFSET_BITS if self.skips else 0
+        gaps = [ordinals[0] - base]
+        gaps.extend(b - a for a, b in zip(ordinals, ordinals[1:]))
+        gap_width, gap_bytes = pack_ints(gaps)
+        tf_width, tf_bytes = pack_ints(tfs)
+        self.skips.append(ordinals[-1] << OFFSET_BITS | len(self.data))
+        self.data.append(gap_width | tf_width << 4)
+        self.data += gap_bytes
+        self.data += tf_bytes
+        self.count += len(ordinals)
+
+    def block(self, b):
+        """
+        Decode block b. Returns (list of ordinals, array of tfs); the most
+        recently decoded block is cached for repeated probes.
+        """
+        cached = self.cached
+        if cached is not None and cached[0] == b:
+            return cached[1], cached[2]
+        n = min(BLOCK_SIZE, self.count - b * BLOCK_SIZE)
+        offset = self.skips[b] & ((1 << OFFSET_BITS) - 1)
+        widths = self.data[offset]
+        gaps = array(WIDTHS[widths & 0xF])
+        tfs = array(WIDTHS[widths >> 4])
+        start = offset + 1
+        end = start + n * gaps.itemsize
+        gaps.frombytes(self.data[start:end])
+        tfs.frombytes(self.data[end:end + n * tfs.itemsize])
+        base = self.skips[b - 1] >> OFFSET_BITS if b else 0
+        ordinals = list(accumulate(gaps, initial=base))
+        del ordinals[0]
+        self.cached = (b, ordinals, tfs)
+        return ordinals, tfs
+
+    def decode(self):
+        """
+        Decode the whole list. Returns (list of ordinals, list of tfs).
+        """
+        ordinals, tfs = [], []
+        for b in range(len(self.skips)):
+            block_ordinals, block_tfs = self.block(b)
+            ordinals += block_ordinals
+            tfs += block_tfs
+        return ordinals, tfs
+
+    def iter_ordinals(self):
+        """
+        Yield (ordinal, tf) pairs in collection order.
+        """
+        for b in range(len(self.skips)):
+            yield from zip(*self.block(b))
+
+    def blocks(self):
+        """
+        Yield (list of newsIDs, array of tfs) for each decoded block, in
+        collection order, so scoring loops run over whole blocks.
+        """
+        nids = self.table.nids
+        skips = self.skips
+        data = self.data
+        base = 0
+        remaining = self.count
+        for skip in skips:
+            # Gaps map straight to newsIDs, without the list of ordinals block() keeps
+            n = min(BLOCK_SIZE, remaining)
+            offset = skip & ((1 << OFFSET_BITS) - 1)
+            widths = data[offset]
+            gaps = array(WIDTHS[widths & 0xF])
+            tfs = array(WIDTHS[widths >> 4])
+            start = offset + 1
+            end = start + n * gaps.itemsize
+            gaps.frombytes(data[start:end])
+            tfs.frombytes(data[end:end + n * tfs.itemsize])
+            yield list(map(nids.__getitem__, islice(accumulate(gaps, initial=base), 1, None))), tfs
+            base = skip >> OFFSET_BITS
+            remaining -= n
+
+    def cursor(self):
+        """
+        Yield (ordinal, newsID, tf) triples in collection order.
+        """
+        nids = self.table.nids
+        for b in range(len(self.skips)):
+            ordinals, tfs = self.block(b)
+            yield from zip(ordinals, map(nids.__getitem__, ordinals), tfs)
+
+    def tf_at(self, ordinal):
+        """
+        Term frequency of the document with this ordinal, or 0. Uses the skip
+        entries to decode only the block that can hold it.
+        """
+        b = bisect_left(self.skips, ordinal << OFFSET_BITS)
+        if b == len(self.skips):
+            return 0
+        ordinals, tfs = self.block(b)
+        i = bisect_left(ordinals, ordinal)
+        return tfs[i] if i < len(ordinals) and ordinals[i] == ordinal else 0
+
+    def prober(self):
+        """
+        Return probe(ordinal) -> tf (0 if absent) for ordinals given in
+        increasing order. The current block stays decoded until an ordinal
+        passes its end, and only the skips after it are bisected.
+        """
+        skips = self.skips
+        b = -1
+        ordinals, tfs = [], ()
+        last = -1
+
+        def probe(ordinal):
+            nonlocal b, ordinals, tfs, last
+            if ordinal > last:
+                b = bisect_left(skips, ordinal << OFFSET_BITS, b + 1)
+                if b == len(skips):
+                    last = float("inf")
+                    ordinals, tfs = [], ()
+                    return 0
+                ordinals, tfs = self.block(b)
+                last = ordinals[-1]
+            i = bisect_left(ordinals, ordinal)
+            return tfs[i] if i < len(ordinals) and ordinals[i] == ordinal else 0
+        return probe
+
+    def last_ordinal(self):
+        return self.skips[-1] >> OFFSET_BITS if self.skips else -1
+
+    def __getitem__(self, nid):
+        ordinal = self.table.doc_ids.get(nid)
+        f = self.tf_at(ordinal) if ordinal is not None else 0
+        if not f:
+            raise KeyError(nid)
+        return f
+
+    def get(self, nid, default=None):
+        ordinal = self.table.doc_ids.get(nid)
+        f = self.tf_at(ordinal) if ordinal is not None else 0
+        return f if f else default
+
+    def __contains__(self, nid):
+        return self.get(nid) is not None
+
+    def __iter__(self):
+        nids = self.table.nids
+        for b in range(len(self.skips)):
+            yield from map(nids.__getitem__, self.block(b)[0])
+
+    def items(self):
+        """
+        Iterate (newsID, tf) pairs in collection order, one decoded block at a time.
+        """
+        nids = self.table.nids
+        for b in range(len(self.skips)):
+            ordinals, tfs = self.block(b)
+            yield from zip(map(nids.__getitem__, ordinals), tfs)
+
+    def values(self):
+        for b in range(len(self.skips)):
+            yield from self.block(b)[1]
+
+    def __len__(self):
+        return self.count
+
+    def __setitem__(self, nid, tf):
+        """
+        Set the tf of a document. Appending past the last ordinal only
+        re-encodes the last block.
+        """
+        ordinal = self.table.register(nid)
+        if ordinal > self.last_ordinal():
+            if self.count % BLOCK_SIZE:
+                b = len(self.skips) - 1
+                ordinals, tfs = self.block(b)
+                ordinals = ordinals + [ordinal]
+                tfs = list(tfs) + [tf]
+                offset = self.skips.pop() & ((1 << OFFSET_BITS) - 1)
+                del self.data[offset:]
+                self.count -= len(ordinals) - 1
+                self.cached = None
+                self.append_block(ordinals, tfs)
+            else:
+                self.append_block([ordinal], [tf])
+            return
+        ordinals, tfs = self.decode()
+        i = bisect_left(ordinals, ordinal)
+        if i < len(ordinals) and ordinals[i] == ordinal:
+            tfs[i] = tf
+        else:
+            ordinals.insert(i, ordinal)
+            tfs.insert(i, tf)
+        self.encode(ordinals, tfs)
+
+    def __delitem__(self, nid):
+        """
+        Remove a document; the list is re-encoded.
+        """
+        ordinal = self.table.doc_ids.get(nid)
+        ordinals, tfs = self.decode()
+        i = bisect_left(ordinals, ordinal) if ordinal is not None else len(ordinals)
+        if i == len(ordinals) or ordinals[i] != ordinal:
+            raise KeyError(nid)
+        del ordinals[i]
+        del tfs[i]
+        self.encode(ordinals, tfs)
+
+    def nbytes(self):
+        """
+        Bytes used by the encoded postings and skip entries.
+        """
+        return len(self.data) + len(self.skips) * self.skips.itemsize
+
+
+class CompressedPostings(MutableMapping):
+    """
+    {term: PostingList} inverted index, a drop-in replacement for the
+    {term: {newsID: tf}} dict of NewsCollection.build_postings.
+    Assigning a plain {newsID: tf} dict to a term encodes it.
+    """
+
+    def __init__(self, doc_ids):
+        """
+        Parameters:
+            doc_ids (dict): The collection's {newsID: ordinal} table, shared, not copied.
+        """
+        self.doc_ids = doc_ids
+        self.nids = []  # ordinal -> newsID
+        self.lists = {}
+
+    @classmethod
+    def from_documents(cls, doc_ids, documents):
+        """
+        Build the index from (newsID, iterable of (term, tf)) pairs given in collection order.
+        """
+        table = cls(doc_ids)
+        ordinals, tfs = {}, {}
+        for nid, terms in documents:
+            ordinal = table.register(nid)
+            for term, freq in terms:
+                plist = ordinals.get(term)
+                if plist is None:
+                    ordinals[term] = plist = array("I")
+                    tfs[term] = array("I")
+                plist.append(ordinal)
+                tfs[term].append(freq)
+        for term in ordinals:
+            table.lists[term] = PostingList(table, ordinals[term], tfs[term])
+        return table
+
+    @classmethod
+    def from_arrays(cls, doc_ids, nids, terms, offsets, docs, tfs):
+        """
+        Build the index from flat postings, as stored in an index file: the
+        postings of terms[i] are docs[offsets[i]:offsets[i + 1]] (ordinals into
+        nids, increasing) with their tfs. Terms without postings are left out.
+        """
+        table = cls(doc_ids)
+        table.nids = list(nids)
+        for i, term in enumerate(terms):
+            start, end = offsets[i], offsets[i + 1]
+            if end > start:
+                table.lists[term] = PostingList(table, docs[start:end].tolist(), tfs[start:end].tolist())
+        return table
+
+    def register(self, nid):
+        """
+        Record the ordinal -> newsID mapping of a document. Returns its ordinal.
+        """
+        ordinal = self.doc_ids[nid]
+        if ordinal >= len(self.nids):
+            self.nids.extend([None] * (ordinal + 1 - len(self.nids)))
+        self.nids[ordinal] = nid
+        return ordinal
+
+    def __getitem__(self, term):
+        return self.lists[term]
+
+    def __setitem__(self, term, plist):
+        if not isinstance(plist, PostingList):
+            pairs = sorted((self.register(nid), f) for nid, f in plist.items())
+            plist = PostingList(self, [o for o, _ in pairs], [f for _, f in pairs])
+        self.lists[term] = plist
+
+    def __delitem__(self, term):
+        del self.lists[term]
+
+    def __contains__(self, term):
+        return term in self.lists
+
+    def __iter__(self):
+        return iter(self.lists)
+
+    def __len__(self):
+        return len(self.lists)
+
+    def nbytes(self):
+        """
+        Bytes used by all encoded posting lists and their skip entries.
+        """
+        return sum(plist.nbytes() for plist in self.lists.values())
+
+
+def posting_blocks(plist):
+    """
+    (newsIDs, tfs) runs covering a posting list in collection order: the
+    decoded blocks of a PostingList, or a {newsID: tf} dict as a single run.
+    Scoring loops zip each run instead of stepping a generator per posting.
+    """
+    if isinstance(plist, PostingList):
+        return plist.blocks()
+    return ((plist.keys(), plist.values()),)
+
+
+def posting_cursor(plist, doc_ids):
+    """
+    Iterate (ordinal, newsID, tf) over a PostingList or a {newsID: tf} dict,
+    in collection order; doc_ids maps newsIDs to ordinals for dicts.
+    """
+    if isinstance(plist, PostingList):
+        return plist.cursor()
+    return ((doc_ids[nid], nid, f) for nid, f in plist.items())
+
+
+def posting_probe(plist):
+    """
+    probe(ordinal, newsID) -> tf (0 if absent) over a PostingList or a
+    {newsID: tf} dict, for documents probed in increasing collection order.
+    """
+    if isinstance(plist, PostingList):
+        probe = plist.prober()
+        return lambda ordinal, nid: probe(ordinal)
+    get = plist.get
+    return lambda ordinal, nid: get(nid, 0)
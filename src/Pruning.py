@@ -0,0 +1,207 @@
+from array import array
+from operator import itemgetter
+from .Q_Parser import QueryParser
+
+import time
+import heapq
+
+# Bytes of one kept posting: a uint32 document number and a float64 weight
+ENTRY_BYTES = 12
+
+
+class PrunedTfidf():
+    """
+    Statically pruned tf-idf index of a NewsCollection.
+
+    Starting from every document's full tf-idf vector, only the postings
+    that pass the pruning rules are kept as {term: (document numbers,
+    weights)} arrays:
+        by="document": the top_n largest weights of each document,
+        by="term": the top_n largest weights in each term's posting list,
+    and in both cases only weights >= threshold. With a budget in bytes the
+    smallest remaining weights of the whole collection are dropped until
+    the kept postings fit (ENTRY_BYTES each).
+
+    Kept postings have their exact weights, so a pruned ranking only loses
+    the contributions of dropped postings; overlap_report measures the effect.
+    With no rule given nothing is pruned and scores equal rank_tfidf.
+
+    The pruned index is a snapshot of one collection version; NewsCollection
+    rebuilds it on the next TF-IDF query after documents are added or removed.
+    """
+
+    def __init__(self, collection, top_n=None, threshold=None, budget=None, by="document", release=True):
+        """
+        Parameters:
+            collection (NewsCollection): The collection to prune.
+            top_n (int, optional): Postings kept per document or per term.
+            threshold (float, optional): Smallest weight kept.
+            budget (int, optional): Largest size of the kept postings in bytes.
+            by (str): "document" or "term", what top_n counts over.
+            release (bool): Drop the cached full vectors of the documents once
+                pruned; they are recomputed if anything reads them again.
+        """
+        if by not in ("document", "term"):
+            raise ValueError("by must be 'document' or 'term'")
+        self.collection = collection
+        self.top_n = top_n
+        self.threshold = threshold
+        self.budget = budget
+        self.by = by
+        self.release = release
+        self.build()
+
+    def build(self):
+        """
+        Select the kept postings from the current collection.
+        """
+        coll = self.collection
+        self.version = coll.version
+        self.nids = list(coll.newscollectiondict)
+        top_n, threshold = self.top_n, self.threshold
+        lists = {}
+        self.full_entries = 0
+        for ordinal, nd in enumerate(coll.newscollectiondict.values()):
+            vector = nd["tf_idf"]
+            weights = vector.current()
+            self.full_entries += len(weights)
+            items = weights.items()
+            if top_n is not None and self.by == "document":
+                items = heapq.nlargest(top_n, items, key=itemgetter(1))
+            for term, weight in items:
+                if threshold is None or weight >= threshold:
+                    lists.setdefault(term, []).append((ordinal, weight))
+            if self.release:
+                vector.release()
+        if top_n is not None and self.by == "term":
+            for term, plist in lists.items():
+                if len(plist) > top_n:
+                    lists[term] = sorted(heapq.nlargest(top_n, plist, key=itemgetter(1)))
+        if self.budget is not None:
+            self.fit_budget(lists, self.budget // ENTRY_BYTES)
+        self.lists = {term: (array("I", (o for o, _ in plist)), array("d", (w for _, w in plist)))
+                      for term, plist in lists.items() if plist}
+        self.entries = sum(len(docs) for docs, _ in self.lists.values())
+
+    def fit_budget(self, lists, max_entries):
+        """
+        Drop the smallest weights of the whole collection until at most
+        max_entries postings are left; ties at the cut-off are kept in
+        posting order while they fit.
+        """
+        count = sum(len(plist) for plist in lists.values())
+        if count <= max_entries:
+            return
+        if max_entries <= 0:
+            lists.clear()
+            return
+        weights = (w for plist in lists.values() for _, w in plist)
+        cutoff = heapq.nlargest(max_entries, weights)[-1]
+        ties = max_entries - sum(1 for plist in lists.values() for _, w in plist if w > cutoff)
+        for term, plist in lists.items():
+            kept = []
+            for ordinal, weight in plist:
+                if weight > cutoff:
+                    kept.append((ordinal, weight))
+                elif weight == cutoff and ties > 0:
+                    kept.append((ordinal, weight))
+                    ties -= 1
+            lists[term] = kept
+
+    def scores(self, q_tfidf):
+        """
+        Accumulate {newsID: score} term-at-a-time over the kept postings, in
+        query-term order like NewsCollection.rank_tfidf.
+        """
+        scores = {}
+        nids = self.nids
+        for term, weight in q_tfidf.items():
+            entry = self.lists.get(term)
+            if entry is None:
+                continue
+            for ordinal, value in zip(*entry):
+                nid = nids[ordinal]
+                scores[nid] = scores.get(nid, 0) + weight * value
+        return scores
+
+    def nbytes(self):
+        """
+        Bytes used by the kept document numbers and weights.
+        """
+        return sum(len(docs) * docs.itemsize + len(values) * values.itemsize
+                   for docs, values in self.lists.values())
+
+    def report(self):
+        """
+        Size of the pruned index against the full one.
+        """
+        full_bytes = self.full_entries * ENTRY_BYTES
+        return {"by": self.by, "top_n": self.top_n, "threshold": self.threshold, "budget": self.budget,
+                "entries": self.entries, "full_entries": self.full_entries,
+                "bytes": self.nbytes(), "full_bytes": full_bytes,
+                "kept_fraction": self.entries / self.full_entries if self.full_entries else 1.0}
+
+
+def positive_top(ranked, k):
+    """
+    newsIDs of the first k results that scored above zero.
+    """
+    top = []
+    for nid, score in ranked.items():
+        if len(top) >= k or score <= 0:
+            break
+        top.append(nid)
+    return top
+
+
+def overlap_report(collection, queries, stop_words, ks=(1, 5, 10)):
+    """
+    How far the pruned TF-IDF rankings of a collection diverge from exact ones.
+
+    overlap@k of a query is the fraction of the exact top k (documents with a
+    positive score) that the pruned top k also returns; queries matching
+    nothing are left out. Requires collection.prune_tfidf to have been called.
+
+    Parameters:
+        collection (NewsCollection): A pruned collection.
+        queries (list of str): Raw query strings.
+        stop_words (iterable of str or QueryParser): Parses the queries as
+            Q_Collection does: a stop-word filename or an already built QueryParser.
+        ks (iterable of int): Cut-offs to report.
+
+    Returns:
+        dict: {"index": PrunedTfidf.report(), "overlap": {k: mean overlap@k},
+        "queries": queries counted, "exact_ms", "pruned_ms": mean time per query}.
+        Exact rankings re-materialize the full vectors of the documents they touch.
+    """
+    if collection.pruned_tfidf is None:
+        raise ValueError("Collection has no pruned index")
+    parser = stop_words if isinstance(stop_words, QueryParser) else QueryParser(stop_words)
+    ks = sorted(ks)
+    depth = ks[-1]
+    totals = dict.fromkeys(ks, 0.0)
+    counted = 0
+    exact_seconds = pruned_seconds = 0.0
+    for query in queries:
+        q_tfidf = collection.my_tfidf(parser.parse(query), collection.df, collection.ndocs)
+        # The first exact run may recompute released vectors, so time the second
+        collection.rank_tfidf(q_tfidf, depth, exact=True)
+        start = time.perf_counter()
+        exact = collection.rank_tfidf(q_tfidf, depth, exact=True)
+        exact_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        pruned = collection.rank_tfidf(q_tfidf, depth)
+        pruned_seconds += time.perf_counter() - start
+        if not positive_top(exact, 1):
+            continue
+        counted += 1
+        for k in ks:
+            expected = positive_top(exact, k)
+            totals[k] += len(set(expected) & set(positive_top(pruned, k))) / len(expected)
+    return {
+        "index": collection.pruned_tfidf.report(),
+        "overlap": {k: totals[k] / counted if counted else 1.0 for k in ks},
+        "queries": counted,
+        "exact_ms": exact_seconds * 1000 / len(queries) if queries else 0.0,
+        "pruned_ms": pruned_seconds * 1000 / len(queries) if queries else 0.0,
+    }
@@ -0,0 +1,125 @@
+from collections import OrderedDict
+
+import time
+
+
+class QueryCache():
+    """
+    LRU cache of ranking results keyed on the canonical query: the model name,
+    the sorted (term, qf) pairs of the parsed query and the ranking parameters.
+    Queries that differ only in case, punctuation or stop words parse to the
+    same Counter and so share an entry.
+
+    Every lookup passes the collection version; when it differs from the
+    version the entries were computed against, the whole cache is dropped,
+    so adding or removing documents (which changes df) invalidates it.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, clock=time.monotonic):
+        """
+        Parameters:
+            max_entries (int): Entries kept before the least recently used is evicted.
+            ttl (float, optional): Seconds an entry stays valid; None keeps it until evicted.
+            clock (callable): Time source for the ttl, in seconds.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (expires_at, result)
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(model, query_tf, params=()):
+        """
+        Canonical cache key of a parsed query.
+        """
+        return (model, tuple(sorted(query_tf.items())), params)
+
+    def validate(self, version):
+        """
+        Drop every entry if the collection changed since they were stored.
+        """
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+                self.entries.clear()
+            self.version = version
+
+    def get_or_compute(self, version, model, query_tf, params, compute):
+        """
+        Return the cached ranking of the query, or call compute() and cache its result.
+        Each caller gets its own copy of the ranking dict.
+
+        Parameters:
+            version (int): Current collection version.
+            model (str): Ranking model name, e.g. "tfidf" or "bm25".
+            query_tf (Counter): Parsed query term frequencies.
+            params (tuple): Hashable ranking parameters, e.g. (top_k,).
+            compute (callable): Produces the ranking on a miss.
+        """
+        result = self.lookup(version, model, query_tf, params)
+        if result is None:
+            result = self.store(version, model, query_tf, params, compute())
+        return result
+
+    def lookup(self, version, model, query_tf, params):
+        """
+        Return a copy of the cached ranking of the query, or None on a miss,
+        counting the hit or miss. Arguments are as for get_or_compute.
+        """
+        self.validate(version)
+        key = self.key(model, query_tf, params)
+        entry = self.entries.get(key)
+        if entry is not None:
+            if entry[0] is None or self.clock() < entry[0]:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            del self.entries[key]
+            self.expirations += 1
+        self.misses += 1
+        return None
+
+    def store(self, version, model, query_tf, params, result):
+        """
+        Cache a ranking computed after a lookup miss; returns a copy of it.
+        """
+        self.validate(version)
+        expires_at = self.clock() + self.ttl if self.ttl is not None else None
+        self.entries[self.key(model, query_tf, params)] = (expires_at, result)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return dict(result)
+
+    def clear(self):
+        """
+        Drop all entries, keeping the counters.
+        """
+        self.entries.clear()
+
+    def info(self):
+        """
+        Return hit/miss statistics as a dict.
+        """
+        lookups = self.hits + self.misses
+        return {"entries": len(self.entries), "max_entries": self.max_entries, "ttl": self.ttl,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions, "expirations": self.expirations,
+                "invalidations": self.invalidations}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        info = self.info()
+        return (f"QueryCache: {info['entries']}/{info['max_entries']} entries, "
+                f"{info['hits']} hits, {info['misses']} misses ({info['hit_rate']:.1%}), "
+                f"{info['evictions']} evicted, {info['expirations']} expired, "
+                f"{info['invalidations']} invalidated")
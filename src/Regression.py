@@ -0,0 +1,302 @@
+from collections import Counter
+from importlib.metadata import version, PackageNotFoundError
+from .Parser import Rev1_Parser, Q_Collection
+from .Q_Parser import QueryParser
+from .Export import ordered_items
+from .Stats import Instrumentation
+
+import os
+import re
+import ast
+import json
+import math
+
+# The queries of task1.py, task2.py and task3.py, in the order they were written
+Q1_QUERIES = ["FRANCE: Reuters French Advertising & Media Digest - Aug 6",
+              "UK: Britain's Channel 5 to broadcast Fashion Awards.",
+              "ISRAEL: Shooting, protests spread in Gaza, West Bank"]
+Q2_QUERIES = ["FRANCE: Reuters French Advertising & Media Digest - Aug 6",
+              "UK: Britain's Channel 5 to broadcast Fashion Awards.",
+              "ISRAEL: Shooting, protests spread in Gaza, West Bank",
+              "ISRAEL: Death toll 33 Arabs, 10 Israelis at 1400 gmt."]
+Q3_QUERIES = ["The British-Fashion Awards", "Rocket attacks",
+              "FRANCE: Reuters French Advertising & Media Digest - Aug 6",
+              "US EPA ranks Geo Metro car most fuel-efficient 1997 car."]
+# PyStemmer release the ZachEdwards_Q*.txt golden files were written with;
+# other releases stem a few words (e.g. "international") differently
+GOLDEN_STEMMER_VERSION = "3.1.0"
+# Weights per document in the task 2 output and results in the task 3 top list
+TFIDF_LIMIT = 30
+TOP_N = 6
+
+Q1_DOCUMENT = re.compile(r"Document (\S+) contains (\d+) indexing terms and has a total (\d+) words\.$")
+Q2_DOCUMENT = re.compile(r"Document (\S+) contains (\d+) terms$")
+Q3_SCORE = re.compile(r"Document ID: (\S+), Doc Length: (\d+) -- BM25 Score: (\S+)$")
+Q3_TOP = re.compile(r'For query "(.*)", the top-\d+ relevant documents are:$')
+
+
+def parse_q1(text):
+    """
+    Parse task 1 output.
+
+    Returns:
+        tuple: ({newsID: {"indexing_terms", "words", "terms": {term: freq}}},
+        {query: {term: freq}}).
+    """
+    documents = {}
+    queries = {}
+    current = None
+    lines = iter(text.splitlines())
+    for line in lines:
+        match = Q1_DOCUMENT.match(line)
+        if match:
+            current = {"indexing_terms": int(match[2]), "words": int(match[3]), "terms": {}}
+            documents[match[1]] = current
+        elif line.startswith("Query: "):
+            next(lines)  # "The parsed query:"
+            parsed = next(lines)
+            queries[line[len("Query: "):]] = ast.literal_eval(parsed[len("Counter("):-1])
+            current = None
+        elif line and current is not None:
+            term, freq = line.rsplit(": ", 1)
+            current["terms"][term] = int(freq)
+    return documents, queries
+
+
+def parse_q2(text):
+    """
+    Parse task 2 output.
+
+    Returns:
+        tuple: ({newsID: {"size", "weights": {term: weight}}}, {query: {newsID: score}}).
+    """
+    tfidf = {}
+    rankings = {}
+    current = None
+    for line in text.splitlines():
+        match = Q2_DOCUMENT.match(line)
+        if match:
+            current = {}
+            tfidf[match[1]] = {"size": int(match[2]), "weights": current}
+        elif line.startswith("The Ranking Result for query: "):
+            current = rankings[line[len("The Ranking Result for query: "):]] = {}
+        elif line:
+            key, value = line.rsplit(" : ", 1)
+            current[key] = float(value)
+    return tfidf, rankings
+
+
+def parse_q3(text):
+    """
+    Parse task 3 output.
+
+    Returns:
+        tuple: (average document length, {query: {newsID: score}},
+        {query: {newsID: score}} of the top lists, {newsID: document length}).
+    """
+    avg_length = None
+    bm25 = {}
+    top = {}
+    lengths = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith("Average document length for this collection is: "):
+            avg_length = float(line.rsplit(": ", 1)[1])
+        elif line.startswith("The query is: "):
+            current = bm25[line[len("The query is: "):]] = {}
+        elif Q3_SCORE.match(line):
+            nid, length, score = Q3_SCORE.match(line).groups()
+            current[nid] = float(score)
+            lengths[nid] = int(length)
+        elif Q3_TOP.match(line):
+            current = top[Q3_TOP.match(line)[1]] = {}
+        elif line and not line.startswith("The following are"):
+            nid, score = line.split(" ")
+            current[nid] = float(score)
+    return avg_length, bm25, top, lengths
+
+
+def stemmer_version():
+    """
+    Installed PyStemmer version, or None if it cannot be determined.
+    """
+    try:
+        return version("PyStemmer")
+    except PackageNotFoundError:
+        return None
+
+
+def load_golden(golden_dir, prefix="ZachEdwards"):
+    """
+    Read the checked-in task outputs <prefix>_Q1.txt, _Q2.txt and _Q3.txt.
+    Document frequencies are derived from the task 1 term lists.
+
+    Returns:
+        dict: The same keys as run_pipelines.
+    """
+    def read(n):
+        with open(os.path.join(golden_dir, f"{prefix}_Q{n}.txt"), encoding="utf-8") as f:
+            return f.read()
+
+    documents, queries = parse_q1(read(1))
+    tfidf, rankings = parse_q2(read(2))
+    avg_length, bm25, top, lengths = parse_q3(read(3))
+    df = Counter()
+    for doc in documents.values():
+        df.update(doc["terms"].keys())
+    return {"documents": documents, "queries": queries, "df": dict(df), "tfidf": tfidf,
+            "rankings": rankings, "avg_length": avg_length, "bm25": bm25, "top": top, "lengths": lengths}
+
+
+def save_results(results, path):
+    """
+    Write run_pipelines results as JSON, e.g. a baseline recorded on one machine
+    before optimizing. Floats are written exactly.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+
+def load_results(path):
+    """
+    Read results written by save_results; usable wherever load_golden's are.
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_pipelines(data_dir, stop_word_path, stats=None, repeat=1, workers=1, index_path=None):
+    """
+    Run the task 1-3 pipelines in-process, timing every phase.
+
+    Parameters:
+        data_dir (str): Corpus directory.
+        stop_word_path (str): Stop-word file.
+        stats (Instrumentation, optional): Receives the ingestion stages and one
+            "task<n>.<phase>" stage per phase; a new one is made if not given.
+        repeat (int): Times each query phase is run, for steadier timings.
+        workers (int): Ingestion worker processes.
+        index_path (str, optional): Binary index to load or build, as Rev1_Parser.
+
+    Returns:
+        tuple: (results in load_golden's layout, the Instrumentation).
+    """
+    stats = stats if stats is not None else Instrumentation()
+    with stats.stage("ingest"):
+        collection = Rev1_Parser(stop_word_path, data_dir, index_path, workers, stats=stats)
+    ndocs = collection.ndocs
+    parser = QueryParser(stop_word_path)
+
+    with stats.stage("task1.term_stats", docs=ndocs):
+        documents = {}
+        for nid, nd in collection.newscollectiondict.items():
+            item = nd["news_item"]
+            documents[nid] = {"indexing_terms": sum(item.freqs), "words": item.get_size(),
+                              "terms": dict(item.iter_terms())}
+    for _ in range(repeat):
+        with stats.stage("task1.parse_queries"):
+            queries = {query: dict(parser.parse(query)) for query in Q1_QUERIES}
+
+    with stats.stage("task2.tfidf", docs=ndocs):
+        tfidf = {nid: {"size": nd["news_item"].get_size(),
+                       "weights": dict(ordered_items(nd["tf_idf"].current(), TFIDF_LIMIT))}
+                 for nid, nd in collection.newscollectiondict.items()}
+    for _ in range(repeat):
+        with stats.stage("task2.rank_tfidf"):
+            rankings = {query: Q_Collection(query, collection, parser) for query in Q2_QUERIES}
+
+    for _ in range(repeat):
+        with stats.stage("task3.bm25"):
+            bm25 = {query: collection.my_bm25(query, collection.df) for query in Q3_QUERIES}
+    top = {query: dict(list(scores.items())[:TOP_N]) for query, scores in bm25.items()}
+    lengths = {nid: doc["words"] for nid, doc in documents.items()}
+
+    results = {"documents": documents, "queries": queries, "df": dict(collection.df), "tfidf": tfidf,
+               "rankings": rankings, "avg_length": collection.avg_length(), "bm25": bm25, "top": top,
+               "lengths": lengths}
+    return results, stats
+
+
+def compare_scores(name, golden, actual, close, truncated=False):
+    """
+    Differences between two {key: score} rankings.
+
+    Scores of common keys must be close. Keys on one side only are allowed
+    in a truncated list when their score ties the cut-off score, since which
+    of the tied entries made the cut depends on document order. The actual
+    order must not rank a document above one with a higher golden score.
+
+    Returns:
+        list of str: One line per difference.
+    """
+    diffs = []
+    if len(golden) != len(actual):
+        diffs.append(f"{name}: {len(actual)} entries, expected {len(golden)}")
+    cutoff = min(golden.values()) if truncated and golden else None
+    for key, value in golden.items():
+        if key in actual:
+            if not close(actual[key], value):
+                diffs.append(f"{name}: {key} is {actual[key]!r}, expected {value!r}")
+        elif cutoff is None or not close(value, cutoff):
+            diffs.append(f"{name}: {key} missing")
+    for key, value in actual.items():
+        if key not in golden and (cutoff is None or not close(value, cutoff)):
+            diffs.append(f"{name}: {key} unexpected")
+    previous = None
+    for key, value in actual.items():
+        score = golden.get(key, value)
+        if previous is not None and score > previous and not close(score, previous):
+            diffs.append(f"{name}: {key} ranked below a document with a lower score")
+        previous = score
+    return diffs
+
+
+def compare(golden, actual, rel_tol=1e-9, abs_tol=1e-12):
+    """
+    Compare run_pipelines results with load_golden by key rather than by line,
+    so the order documents were read in does not matter; floats within tolerance.
+
+    Returns:
+        list of str: One line per difference; empty if the results match.
+    """
+    def close(a, b):
+        return math.isclose(a, b, rel_tol=rel_tol, abs_tol=abs_tol)
+
+    diffs = []
+    for nid, doc in golden["documents"].items():
+        got = actual["documents"].get(nid)
+        if got is None:
+            diffs.append(f"documents: {nid} missing")
+        elif got != doc:
+            for key in ("indexing_terms", "words"):
+                if got[key] != doc[key]:
+                    diffs.append(f"documents: {nid} {key} is {got[key]}, expected {doc[key]}")
+            if got["terms"] != doc["terms"]:
+                changed = sorted(doc["terms"].items() ^ got["terms"].items())
+                diffs.append(f"documents: {nid} term counts differ: {changed[:5]}")
+    for nid in actual["documents"].keys() - golden["documents"].keys():
+        diffs.append(f"documents: {nid} unexpected")
+    for query, terms in golden["queries"].items():
+        if actual["queries"].get(query) != terms:
+            diffs.append(f"queries: {query!r} parsed as {actual['queries'].get(query)}, expected {terms}")
+    if actual["df"] != golden["df"]:
+        changed = sorted(golden["df"].items() ^ actual["df"].items())
+        diffs.append(f"df: {len(changed)} entries differ: {changed[:5]}")
+    for nid, doc in golden["tfidf"].items():
+        got = actual["tfidf"].get(nid, {"size": None, "weights": {}})
+        if got["size"] != doc["size"]:
+            diffs.append(f"tfidf: {nid} size is {got['size']}, expected {doc['size']}")
+        truncated = len(doc["weights"]) == TFIDF_LIMIT
+        diffs += compare_scores(f"tfidf {nid}", doc["weights"], got["weights"], close, truncated)
+    for query, scores in golden["rankings"].items():
+        diffs += compare_scores(f"tfidf ranking {query!r}", scores, actual["rankings"].get(query, {}), close)
+    if golden["avg_length"] is not None and not close(actual["avg_length"], golden["avg_length"]):
+        diffs.append(f"avg_length is {actual['avg_length']}, expected {golden['avg_length']}")
+    for query, scores in golden["bm25"].items():
+        diffs += compare_scores(f"bm25 ranking {query!r}", scores, actual["bm25"].get(query, {}), close)
+    for query, scores in golden["top"].items():
+        diffs += compare_scores(f"bm25 top {query!r}", scores, actual["top"].get(query, {}), close, True)
+    for nid, length in golden["lengths"].items():
+        if actual["lengths"].get(nid) != length:
+            diffs.append(f"lengths: {nid} is {actual['lengths'].get(nid)}, expected {length}")
+    return diffs
@@ -0,0 +1,315 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from .Q_Parser import QueryParser
+from .Parser import rank_many
+from .Benchmark import latency_summary
+
+import json
+import time
+import asyncio
+
+MODELS = ("tfidf", "bm25")
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SearchService():
+    """
+    Long-running search service over one loaded collection.
+
+    Requests are queued and a single batcher task drains the queue: the first
+    request opens a batch, which then collects everything arriving within
+    batch_window seconds (up to max_batch requests) and is scored in one pass
+    on the executor, so the event loop never blocks on ranking. Identical
+    requests in a batch (same model, parsed query and top_k) are scored once.
+
+    Served over HTTP/JSON on TCP or a Unix socket:
+        GET  /search?q=...&model=bm25&k=10
+        POST /search  {"query": ..., "model": ..., "top_k": ...}
+        POST /batch   {"queries": [...], "model": ..., "top_k": ...}
+        GET  /metrics, GET /health
+    """
+
+    def __init__(self, collection, stop_word_path, batch_window=0.002, max_batch=64, max_concurrency=256,
+                 max_queue=1024, default_top_k=10, executor=None, latency_window=10000, engine=None):
+        """
+        Parameters:
+            collection (NewsCollection or ShardedCollection): The corpus to search.
+            stop_word_path (str): Stop-word file, used to parse TF-IDF queries as Q_Collection does.
+            batch_window (float): Seconds a batch stays open for more requests.
+            max_batch (int): Most requests scored in one batch.
+            max_concurrency (int): Most requests handled at once; further ones wait.
+            max_queue (int): Most requests waiting for a slot or to be scored; beyond it
+                new requests get 503 at once.
+            default_top_k (int): top_k used when a request does not give one.
+            executor (Executor, optional): Where batches are scored; defaults to one thread.
+            latency_window (int): Recent request latencies kept for the metrics.
+            engine (SparseEngine, optional): Scores each batch as one sparse matrix
+                product instead of term-at-a-time; not used with a sharded collection.
+        """
+        self.collection = collection
+        self.tfidf_parser = QueryParser(stop_word_path, getattr(collection, "stemmer", None))
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.default_top_k = default_top_k
+        self.engine = engine
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1)
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.queue = None
+        self.waiting = 0
+        self.batcher = None
+        self.started = time.time()
+        self.latencies = {model: deque(maxlen=latency_window) for model in MODELS}
+        self.counters = {"requests": 0, "errors": 0, "rejected": 0, "batches": 0,
+                         "batched_requests": 0, "deduplicated": 0}
+
+    def rank_batch(self, batch):
+        """
+        Score a batch of (query, model, top_k) requests. Runs on the executor.
+        Requests are grouped by model and top_k and each group is ranked with
+        rank_many, which walks every distinct query term's postings once for
+        the group or, with an engine, scores it as one matrix product; a
+        sharded collection is searched per query instead.
+        Returns one ranking, or an exception, per request.
+        """
+        coll = self.collection
+        sharded = hasattr(coll, "search")
+        results = [None] * len(batch)
+        groups = {}  # (model, top_k) -> {canonical parsed query: request indexes}
+        for i, (query, model, top_k) in enumerate(batch):
+            try:
+                if sharded:
+                    parser = coll.tfidf_parser if model == "tfidf" else coll.query_parser
+                else:
+                    parser = self.tfidf_parser if model == "tfidf" else coll.query_parser
+                key = tuple(sorted(parser.parse(query).items()))
+            except Exception as exc:
+                results[i] = exc
+                continue
+            group = groups.setdefault((model, top_k), {})
+            if key in group:
+                self.counters["deduplicated"] += 1
+                group[key].append(i)
+            else:
+                group[key] = [i]
+
+        for (model, top_k), group in groups.items():
+            requests = list(group.values())
+            queries = [batch[indexes[0]][0] for indexes in requests]
+            if sharded:
+                rankings = []
+                for query in queries:
+                    try:
+                        rankings.append(coll.search(query, model, top_k))
+                    except Exception as exc:
+                        rankings.append(exc)
+            else:
+                try:
+                    rankings = rank_many(queries, coll, self.tfidf_parser, top_k, model, self.engine)
+                except Exception as exc:
+                    rankings = [exc] * len(queries)
+            for indexes, ranked in zip(requests, rankings):
+                if not isinstance(ranked, Exception):
+                    ranked = list(ranked.items())
+                for i in indexes:
+                    results[i] = ranked
+        return results
+
+    async def run_batches(self):
+        """
+        Batcher task: collect queued requests into batches and score them off the loop.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.counters["batches"] += 1
+            self.counters["batched_requests"] += len(batch)
+            try:
+                results = await loop.run_in_executor(self.executor, self.rank_batch,
+                                                     [request for request, _ in batch])
+            except Exception as exc:
+                results = [exc] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def start(self):
+        """
+        Start the batcher on the running event loop.
+        """
+        if self.batcher is None:
+            self.queue = asyncio.Queue()
+            self.batcher = asyncio.get_running_loop().create_task(self.run_batches())
+
+    async def search(self, query, model="tfidf", top_k=None):
+        """
+        Rank one query through the batcher.
+        Returns a list of (newsID, score) pairs.
+        """
+        if model not in MODELS:
+            raise HTTPError(400, f"Unknown ranking model: {model}")
+        if not isinstance(query, str):
+            raise HTTPError(400, "query must be a string")
+        if top_k is None:
+            top_k = self.default_top_k
+        self.start()
+        # Admission control: requests waiting for a slot count as queued too
+        if self.waiting + self.queue.qsize() >= self.max_queue:
+            self.counters["rejected"] += 1
+            raise HTTPError(503, "Too many queued requests")
+        self.counters["requests"] += 1
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.limit.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            future = asyncio.get_running_loop().create_future()
+            await self.queue.put(((query, model, top_k), future))
+            ranked = await future
+            self.latencies[model].append(time.perf_counter() - start)
+            return ranked
+        finally:
+            self.limit.release()
+
+    def metrics(self):
+        """
+        Request counters, batching efficiency and per-model latency percentiles.
+        """
+        batches = self.counters["batches"]
+        report = dict(self.counters)
+        report["uptime_seconds"] = time.time() - self.started
+        report["queued"] = self.waiting + (self.queue.qsize() if self.queue is not None else 0)
+        report["mean_batch_size"] = self.counters["batched_requests"] / batches if batches else 0.0
+        report["latency"] = {model: latency_summary(list(times)) for model, times in self.latencies.items()}
+        cache = getattr(self.collection, "query_cache", None)
+        if cache is not None:
+            report["query_cache"] = cache.info()
+        return report
+
+    async def handle(self, method, target, body):
+        """
+        Route one HTTP request. Returns (status, JSON-serialisable payload).
+        """
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if method == "POST":
+            try:
+                params.update(json.loads(body or b"{}"))
+            except (ValueError, TypeError):
+                raise HTTPError(400, "Body must be a JSON object")
+        model = params.get("model", "tfidf")
+        top_k = params.get("top_k", params.get("k"))
+        try:
+            top_k = int(top_k) if top_k is not None else None
+        except (ValueError, TypeError):
+            raise HTTPError(400, "top_k must be an integer")
+        if top_k is not None and top_k < 1:
+            raise HTTPError(400, "top_k must be at least 1")
+
+        if url.path == "/health":
+            return 200, {"status": "ok", "documents": self.collection.ndocs}
+        if url.path == "/metrics":
+            return 200, self.metrics()
+        if url.path == "/search":
+            if method not in ("GET", "POST"):
+                raise HTTPError(405, "Use GET or POST")
+            query = params.get("query", params.get("q"))
+            if query is None:
+                raise HTTPError(400, "Missing query")
+            start = time.perf_counter()
+            ranked = await self.search(query, model, top_k)
+            return 200, {"query": query, "model": model, "results": ranked,
+                         "took_ms": 1000 * (time.perf_counter() - start)}
+        if url.path == "/batch":
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            queries = params.get("queries")
+            if not isinstance(queries, list):
+                raise HTTPError(400, "queries must be a list")
+            start = time.perf_counter()
+            rankings = await asyncio.gather(*(self.search(query, model, top_k) for query in queries))
+            return 200, {"model": model, "results": [{"query": q, "results": r} for q, r in zip(queries, rankings)],
+                         "took_ms": 1000 * (time.perf_counter() - start)}
+        raise HTTPError(404, f"No route for {url.path}")
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve HTTP/1.1 requests on one connection until the client closes it.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0) or 0)
+                try:
+                    if length > 1 << 20:
+                        raise HTTPError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.handle(method, target, body)
+                except HTTPError as exc:
+                    status, payload = exc.status, {"error": str(exc)}
+                except Exception as exc:
+                    status, payload = 500, {"error": str(exc)}
+                if status != 200:
+                    self.counters["errors"] += 1
+                data = json.dumps(payload).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8080, unix_path=None):
+        """
+        Serve until cancelled, on a Unix socket if unix_path is given, else on host:port.
+        """
+        self.start()
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
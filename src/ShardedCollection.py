@@ -0,0 +1,204 @@
+import Stemmer
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from .NewsItem import NewsCollection
+from .Q_Parser import QueryParser
+
+import os
+import heapq
+
+# The shard owned by a shard worker process, set by init_shard_worker
+_worker_shard = None
+
+
+def build_shard(paths, stop_word_path, stemmer_language, compress_postings):
+    """
+    Build the NewsCollection of one shard from its list of document files.
+    """
+    return NewsCollection(paths, stop_word_path, Stemmer.Stemmer(stemmer_language),
+                          stemmer_language=stemmer_language, compress_postings=compress_postings)
+
+
+def shard_summary(shard):
+    """
+    Local statistics of a shard: df, ndocs, total length, its newsIDs in
+    collection order and the stop-word list its query parser uses.
+    """
+    return {"df": shard.df, "ndocs": shard.ndocs, "total_length": shard.totalDocLength,
+            "nids": list(shard.newscollectiondict), "stop_words": shard.stopwordList}
+
+
+def shard_rank(shard, model, query_tf, top_k):
+    """
+    Rank a parsed query on one shard. Returns a list of (newsID, score) pairs
+    ordered like NewsCollection.rank_scores.
+    """
+    if model == "bm25":
+        ranked = shard.bm25_rank(query_tf, shard.df, top_k)
+    elif model == "tfidf":
+        ranked = shard.rank_tfidf(shard.my_tfidf(query_tf, shard.df, shard.ndocs), top_k)
+    else:
+        raise ValueError(f"Unknown ranking model: {model}")
+    return list(ranked.items())
+
+
+def init_shard_worker(paths, stop_word_path, stemmer_language, compress_postings):
+    """
+    Process pool initializer: build this worker's shard once.
+    """
+    global _worker_shard
+    _worker_shard = build_shard(paths, stop_word_path, stemmer_language, compress_postings)
+
+
+def worker_summary():
+    return shard_summary(_worker_shard)
+
+
+def worker_apply_global_stats(df, ndocs, total_length):
+    _worker_shard.apply_global_stats(df, ndocs, total_length)
+
+
+def worker_rank(model, query_tf, top_k):
+    return shard_rank(_worker_shard, model, query_tf, top_k)
+
+
+class ShardedCollection():
+    """
+    A news collection partitioned into shards, each a NewsCollection with its
+    own postings, optionally living in its own worker process.
+
+    Files are split into contiguous runs of the directory order, so shard
+    order followed by local order is the collection order of a single build.
+    After the shards are built their df, ndocs and document lengths are
+    summed and pushed back to every shard (apply_global_stats), so idf and
+    average length are collection-wide and scores are identical to a single
+    NewsCollection. A query is parsed once, scattered to all shards, and the
+    per-shard rankings are merged with the same ordering as rank_scores:
+    scores descending, ties and zero-score documents in collection order.
+
+    The shards are a read-only snapshot; rebuild to pick up new documents.
+    """
+
+    def __init__(self, data_dir, stop_word_path, nshards=2, processes=True, stemmer_language="english",
+                 compress_postings=False):
+        """
+        Parameters:
+            data_dir (str): Directory of news item files.
+            stop_word_path (str): Stop-word .txt file.
+            nshards (int): Number of shards.
+            processes (bool): Run each shard in its own worker process; otherwise
+                all shards are built and queried in this process.
+            stemmer_language (str): Snowball stemmer language of every shard.
+            compress_postings (bool): Use compressed postings in the shards.
+        """
+        paths = [entry.path for entry in os.scandir(data_dir) if entry.is_file()]
+        nshards = max(1, min(nshards, len(paths)))
+        bounds = [len(paths) * i // nshards for i in range(nshards + 1)]
+        parts = [paths[bounds[i]:bounds[i + 1]] for i in range(nshards)]
+        args = (stop_word_path, stemmer_language, compress_postings)
+
+        self.pools = []
+        self.shards = []
+        if processes:
+            self.pools = [ProcessPoolExecutor(max_workers=1, initializer=init_shard_worker,
+                                              initargs=(part,) + args) for part in parts]
+        else:
+            self.shards = [build_shard(part, *args) for part in parts]
+        self.nshards = nshards
+
+        summaries = self.scatter(worker_summary, shard_summary)
+        self.df = Counter()
+        self.ndocs = 0
+        self.totalDocLength = 0
+        self.doc_ids = {}
+        for summary in summaries:
+            self.df.update(summary["df"])
+            self.ndocs += summary["ndocs"]
+            self.totalDocLength += summary["total_length"]
+            for nid in summary["nids"]:
+                self.doc_ids[nid] = len(self.doc_ids)
+        self.scatter(worker_apply_global_stats, NewsCollection.apply_global_stats,
+                     self.df, self.ndocs, self.totalDocLength)
+
+        # Parse as Q_Collection (stop-word file) and my_bm25 (collection's stop-word list) do
+        self.stopwordList = summaries[0]["stop_words"]
+        self.query_parser = QueryParser(self.stopwordList, Stemmer.Stemmer(stemmer_language))
+        self.tfidf_parser = QueryParser(stop_word_path, self.query_parser.stemmer)
+
+    def scatter(self, worker_func, local_func, *args):
+        """
+        Run a call on every shard, in parallel when shards are processes.
+        Returns the results in shard order.
+        """
+        if self.pools:
+            futures = [pool.submit(worker_func, *args) for pool in self.pools]
+            return [future.result() for future in futures]
+        return [local_func(shard, *args) for shard in self.shards]
+
+    def avg_length(self):
+        """
+        Collection-wide average document length (in raw words).
+        """
+        return self.totalDocLength / self.ndocs if self.ndocs else 0
+
+    def merge(self, rankings, top_k=None):
+        """
+        Merge per-shard rankings into one dict {newsID: score}: positive scores
+        descending with ties in collection order, then zero-score documents in
+        collection order, cut to top_k if given.
+        """
+        hits = ((nid, s) for ranking in rankings for nid, s in ranking if s > 0)
+        order = lambda kv: (-kv[1], self.doc_ids[kv[0]])
+        if top_k is None:
+            ranked = dict(sorted(hits, key=order))
+        else:
+            ranked = dict(heapq.nsmallest(top_k, hits, key=order))
+        for ranking in rankings:
+            for nid, s in ranking:
+                if top_k is not None and len(ranked) >= top_k:
+                    return ranked
+                if s <= 0:
+                    ranked[nid] = s
+        return ranked
+
+    def search(self, query, model="tfidf", top_k=None):
+        """
+        Rank the whole collection for a query.
+
+        Parameters:
+            query (str): The raw search string.
+            model (str): "tfidf" (as Q_Collection) or "bm25" (as NewsCollection.my_bm25).
+            top_k (int, optional): Only return the top_k highest scoring documents;
+                each shard then only returns its own top_k.
+
+        Returns:
+            sorted dict: {newsID: score}, identical to a single-collection ranking.
+        """
+        if model == "tfidf":
+            query_tf = self.tfidf_parser.parse(query)
+        elif model == "bm25":
+            query_tf = self.query_parser.parse(query)
+        else:
+            raise ValueError(f"Unknown ranking model: {model}")
+        return self.merge(self.scatter(worker_rank, shard_rank, model, query_tf, top_k), top_k)
+
+    def my_bm25(self, q, top_k=None):
+        """
+        BM25 ranking of q over all shards; see NewsCollection.my_bm25.
+        """
+        return self.search(q, "bm25", top_k)
+
+    def close(self):
+        """
+        Shut the shard worker processes down.
+        """
+        for pool in self.pools:
+            pool.shutdown()
+        self.pools = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
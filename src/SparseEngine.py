@@ -0,0 +1,198 @@
+from .NewsItem import check_top_k
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # optional dependency, only needed for SparseEngine
+    np = None
+    sparse = None
+
+
+class SparseEngine():
+    """
+    Optional vectorised scoring engine for a NewsCollection.
+
+    Keeps the collection as CSR document-term matrices: the L2-normalised
+    tf-idf weights, and BM25 document-side weights with the idf and length
+    normalisation already applied. A query (or a whole batch) is scored as
+    one sparse matrix product and the top-k documents of each query are
+    picked with argpartition over its stored scores only. Scores equal
+    rank_tfidf and my_bm25 up to floating point summation order, and
+    rankings use the same tie order (collection order).
+
+    The engine is a snapshot: it rebuilds itself on the next query after the
+    collection is updated. Requires numpy and scipy.
+    """
+
+    def __init__(self, collection, k1=1.2, k2=100, b=0.75):
+        """
+        Parameters:
+            collection (NewsCollection): The corpus to index.
+            k1, k2, b (float): BM25 parameters, as in NewsCollection.my_bm25.
+        """
+        if np is None:
+            raise ImportError("SparseEngine requires numpy and scipy")
+        self.collection = collection
+        self.k1, self.k2, self.b = k1, k2, b
+        self.build()
+
+    def build(self):
+        """
+        Build the tf-idf and BM25 CSR matrices from the collection.
+        """
+        coll = self.collection
+        self.version = coll.version
+        self.nids = list(coll.newscollectiondict)
+        self.term_ids = {term: i for i, term in enumerate(coll.df)}
+        ndocs, nterms = len(self.nids), len(self.term_ids)
+
+        df = np.array([coll.df[t] for t in self.term_ids], dtype=np.float64)
+        # BM25 idf, clamped at zero like my_bm25
+        self.bm25_idf = np.maximum(0.0, np.log10((coll.ndocs - df + 0.5) / (df + 0.5)))
+        lengths = np.array([nd["news_item"].get_size() for nd in coll.newscollectiondict.values()],
+                           dtype=np.float64)
+        avg_length = coll.avg_length() or 1.0
+        # Per-document BM25 length normalisation K
+        self.length_norm = self.k1 * ((1 - self.b) + self.b * (lengths / avg_length))
+
+        indptr = [0]
+        indices = []
+        tfs = []
+        weights = []
+        for nd in coll.newscollectiondict.values():
+            tf_idf = nd["tf_idf"]
+            for term, freq in nd["news_item"].iter_terms():
+                indices.append(self.term_ids[term])
+                tfs.append(freq)
+                weights.append(tf_idf.get(term, 0.0))
+            indptr.append(len(indices))
+        indptr = np.array(indptr, dtype=np.int64)
+        indices = np.array(indices, dtype=np.int64)
+        tfs = np.array(tfs, dtype=np.float64)
+        self.tfidf_matrix = sparse.csr_matrix((np.array(weights, dtype=np.float64), indices, indptr),
+                                       shape=(ndocs, nterms))
+        doc_of = np.repeat(np.arange(ndocs), np.diff(indptr))
+        bm25 = self.bm25_idf[indices] * ((self.k1 + 1) * tfs) / (self.length_norm[doc_of] + tfs)
+        self.bm25_matrix = sparse.csr_matrix((bm25, indices, indptr), shape=(ndocs, nterms))
+
+    def check_version(self):
+        """
+        Rebuild if the collection changed since the matrices were built.
+        """
+        if self.collection.version != self.version:
+            self.build()
+
+    def query_matrix(self, weights_list):
+        """
+        Stack {term: weight} query vectors into a sparse (terms x queries) matrix.
+        Terms unknown to the collection are dropped.
+        """
+        rows, cols, data = [], [], []
+        for col, weights in enumerate(weights_list):
+            for term, weight in weights.items():
+                tid = self.term_ids.get(term)
+                if tid is not None:
+                    rows.append(tid)
+                    cols.append(col)
+                    data.append(weight)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(len(self.term_ids), len(weights_list)))
+
+    def score_tfidf(self, q_tfidfs):
+        """
+        Dot-product scores for a batch of query tf-idf vectors.
+        Returns a sparse (documents x queries) CSC matrix holding only the
+        documents that share a term with each query.
+        """
+        self.check_version()
+        return self.columns(self.tfidf_matrix @ self.query_matrix(q_tfidfs))
+
+    def score_bm25(self, query_tfs):
+        """
+        BM25 scores for a batch of query term-frequency Counters.
+        Returns a sparse (documents x queries) CSC matrix, as score_tfidf.
+        """
+        self.check_version()
+        k2 = self.k2
+        factors = [{t: ((k2 + 1) * qf) / (k2 + qf) for t, qf in qtf.items()} for qtf in query_tfs]
+        return self.columns(self.bm25_matrix @ self.query_matrix(factors))
+
+    @staticmethod
+    def columns(scores):
+        """
+        Convert a score matrix to CSC with each column's documents in collection order.
+        """
+        scores = scores.tocsc()
+        scores.sort_indices()
+        return scores
+
+    def ranking(self, docs, scores, top_k=None):
+        """
+        Turn the stored entries of one score column, document numbers in
+        collection order and their scores, into a {newsID: score} dict ordered
+        like NewsCollection.rank_scores: positive scores descending with ties
+        in collection order, then zero-score documents in collection order.
+        Only the stored entries are sorted, never a dense column.
+        """
+        check_top_k(top_k)
+        positive = scores > 0
+        docs, scores = docs[positive], scores[positive]
+        if top_k is not None and len(scores) > top_k:
+            # argpartition finds the k-th best score; keep every document tied
+            # with it so the stable sort below breaks ties by collection order
+            kth = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+            keep = scores >= kth
+            docs, scores = docs[keep], scores[keep]
+        order = np.argsort(-scores, kind="stable")
+        if top_k is not None:
+            order = order[:top_k]
+        nids = self.nids
+        ranked = {nids[i]: score for i, score in zip(docs[order].tolist(), scores[order].tolist())}
+        limit = len(nids) if top_k is None else top_k
+        if len(ranked) < limit:
+            for nid in nids:
+                if len(ranked) >= limit:
+                    break
+                if nid not in ranked:
+                    ranked[nid] = 0.0
+        return ranked
+
+    def rankings(self, scores, top_k=None):
+        """
+        One ranking per column of a CSC score matrix from score_tfidf or score_bm25.
+        """
+        indptr, indices, data = scores.indptr, scores.indices, scores.data
+        return [self.ranking(indices[indptr[j]:indptr[j + 1]], data[indptr[j]:indptr[j + 1]], top_k)
+                for j in range(scores.shape[1])]
+
+    def rank_tfidf_many(self, q_tfidfs, top_k=None):
+        """
+        Batch equivalent of NewsCollection.rank_tfidf.
+        """
+        check_top_k(top_k)
+        return self.rankings(self.score_tfidf(q_tfidfs), top_k)
+
+    def rank_tfidf(self, q_tfidf, top_k=None):
+        """
+        Same as NewsCollection.rank_tfidf, scored as a sparse matrix product.
+        """
+        return self.rank_tfidf_many([q_tfidf], top_k)[0]
+
+    def bm25_many(self, queries, top_k=None):
+        """
+        Batch equivalent of NewsCollection.my_bm25 over the collection's own df.
+        Queries are parsed with the collection's query parser.
+        """
+        return self.rank_bm25_many(self.collection.query_parser.parse_many(queries), top_k)
+
+    def rank_bm25_many(self, query_tfs, top_k=None):
+        """
+        Batch equivalent of NewsCollection.bm25_rank over already parsed queries.
+        """
+        check_top_k(top_k)
+        return self.rankings(self.score_bm25(query_tfs), top_k)
+
+    def bm25(self, q, top_k=None):
+        """
+        Same as NewsCollection.my_bm25(q, collection.df, top_k).
+        """
+        return self.bm25_many([q], top_k)[0]
@@ -0,0 +1,148 @@
+from collections import deque
+
+import json
+import time
+
+
+class StageStats():
+    """
+    Accumulated counters for one named stage.
+    """
+    __slots__ = ("seconds", "calls", "docs", "tokens", "bytes")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.docs = 0
+        self.tokens = 0
+        self.bytes = 0
+
+    def as_dict(self):
+        return {"seconds": self.seconds, "calls": self.calls, "docs": self.docs,
+                "tokens": self.tokens, "bytes": self.bytes}
+
+
+class StageTimer():
+    """
+    Context manager returned by Instrumentation.stage; adds its wall time on exit.
+    Counts can be raised inside the block through the docs/tokens/bytes attributes.
+    """
+    __slots__ = ("stats", "name", "start", "docs", "tokens", "bytes")
+
+    def __init__(self, stats, name, docs, tokens, nbytes):
+        self.stats = stats
+        self.name = name
+        self.docs = docs
+        self.tokens = tokens
+        self.bytes = nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add(self.name, time.perf_counter() - self.start, 1, self.docs, self.tokens, self.bytes)
+        return False
+
+
+class Instrumentation():
+    """
+    Per-stage wall time and counters (calls, documents, tokens, bytes) for
+    ingestion, plus per-query records for ranking. Read it with snapshot()
+    or dump it with to_json().
+
+    Hot paths check the enabled flag before timing anything, so a disabled
+    instance (see NULL_STATS) costs one attribute lookup per call site.
+    """
+
+    def __init__(self, enabled=True, query_log_size=1000):
+        """
+        Parameters:
+            enabled (bool): Record anything at all.
+            query_log_size (int): Number of most recent query records kept.
+        """
+        self.enabled = enabled
+        self.stages = {}
+        self.queries = deque(maxlen=query_log_size)
+
+    def add(self, name, seconds=0.0, calls=1, docs=0, tokens=0, nbytes=0):
+        """
+        Add time and counts to a stage.
+        """
+        if not self.enabled:
+            return
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageStats()
+        stage.seconds += seconds
+        stage.calls += calls
+        stage.docs += docs
+        stage.tokens += tokens
+        stage.bytes += nbytes
+
+    def stage(self, name, docs=0, tokens=0, nbytes=0):
+        """
+        Time a block: `with stats.stage("parse", docs=1, nbytes=n): ...`
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return StageTimer(self, name, docs, tokens, nbytes)
+
+    def record_query(self, model, seconds, terms, candidates, returned):
+        """
+        Record one ranking call: model name, wall time, number of query terms,
+        documents scored and results returned. Also aggregated as stage "rank.<model>".
+        """
+        if not self.enabled:
+            return
+        self.add("rank." + model, seconds, 1, candidates, terms)
+        self.queries.append({"model": model, "seconds": seconds, "terms": terms,
+                             "candidates": candidates, "returned": returned})
+
+    def reset(self):
+        """
+        Drop everything recorded so far.
+        """
+        self.stages.clear()
+        self.queries.clear()
+
+    def snapshot(self):
+        """
+        Return the recorded stages and recent queries as plain dicts.
+        """
+        return {"stages": {name: stage.as_dict() for name, stage in self.stages.items()},
+                "queries": list(self.queries)}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def dump(self, path):
+        """
+        Write snapshot() as JSON to path.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    def __str__(self):
+        lines = [f"{'stage':<20}{'seconds':>10}{'calls':>10}{'docs':>10}{'tokens':>12}{'bytes':>14}"]
+        for name, s in sorted(self.stages.items(), key=lambda kv: kv[1].seconds, reverse=True):
+            lines.append(f"{name:<20}{s.seconds:>10.4f}{s.calls:>10}{s.docs:>10}{s.tokens:>12}{s.bytes:>14}")
+        return "\n".join(lines)
+
+
+class NullTimer():
+    """
+    Shared no-op context manager used when instrumentation is disabled.
+    """
+    __slots__ = ("docs", "tokens", "bytes")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = NullTimer()
+# Disabled instance used by default; never records anything
+NULL_STATS = Instrumentation(enabled=False, query_log_size=0)
@@ -0,0 +1,48 @@
+class TermDictionary():
+    """
+    Collection-wide term dictionary that interns term strings to dense integer ids.
+    Ids are assigned in first-seen order and never reused.
+    """
+    __slots__ = ("ids", "terms")
+
+    def __init__(self, terms=()):
+        """
+        Parameters:
+            terms (iterable of str, optional): Terms to intern up front, in id order.
+        """
+        self.terms = list(terms)
+        self.ids = {term: tid for tid, term in enumerate(self.terms)}
+        if len(self.ids) != len(self.terms):
+            # Repeated terms keep their first id
+            self.ids = {}
+            terms, self.terms = self.terms, []
+            for term in terms:
+                self.intern(term)
+
+    def intern(self, term):
+        """
+        Return the id of a term, assigning the next free id if it is new.
+        """
+        tid = self.ids.get(term)
+        if tid is None:
+            tid = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+        return tid
+
+    def get(self, term, default=None):
+        """
+        Return the id of a known term without interning it.
+        """
+        return self.ids.get(term, default)
+
+    def term(self, tid):
+        """
+        Return the term string for an id.
+        """
+        return self.terms[tid]
+
+    def __contains__(self, term):
+        return term in self.ids
+
+    def __len__(self):
+        return len(self.terms)
@@ -1,9 +1,16 @@
 import re
 
+# One token per markup construct: start/end/self-closing tags, or a declaration/comment
+TAG_PATTERN = re.compile(r'<(/?)(\w+)([^>]*)>|<[?!][^>]*>')
+PROP_PATTERN = re.compile(r'(\w+)=["\'](.*?)["\']')
+
+
 class XMLElement:
     """
     Represents an XML element with a tag name, attributes, text content, and child elements.
     """
+    __slots__ = ("tag", "properties", "content", "children")
+
     def __init__(self, tag, properties, content="", children=None):
         """
         Initialize an XMLElement.
@@ -20,6 +27,152 @@ class XMLElement:
         self.children = children if children is not None else []
 
 
+def iterparse(content):
+    """
+    Single-pass, event-driven XML parser.
+
+    Scans the markup once and yields events in document order:
+    ("start", XMLElement) when a tag opens, ("text", str) for text directly
+    inside the innermost open element, and ("end", XMLElement) when it
+    closes. At the "end" event the element's content (its own text, without
+    child elements, stripped) and children are complete. Self-closing tags
+    yield "start" and "end" back to back. Declarations and comments are
+    skipped, stray closing tags ignored and unclosed tags closed at the
+    next enclosing end tag or end of input.
+
+    Parameters:
+    content (str): A string of XML markup to parse.
+
+    Yields:
+    tuple: (event, XMLElement) or ("text", str).
+    """
+    stack = []  # open (element, text pieces) pairs, innermost last
+    pos = 0
+    for match in TAG_PATTERN.finditer(content):
+        start = match.start()
+        if stack and start > pos:
+            text = content[pos:start]
+            stack[-1][1].append(text)
+            yield "text", text
+        pos = match.end()
+
+        closing, tag, raw_properties = match.group(1, 2, 3)
+        if tag is None:
+            continue
+        if closing:
+            if any(element.tag == tag for element, _ in stack):
+                while True:
+                    element, pieces = stack.pop()
+                    element.content = ''.join(pieces).strip()
+                    yield "end", element
+                    if element.tag == tag:
+                        break
+            continue
+
+        self_closing = raw_properties.endswith('/')
+        if self_closing:
+            raw_properties = raw_properties[:-1]
+        raw_properties = raw_properties.strip()
+        properties = dict(PROP_PATTERN.findall(raw_properties)) if raw_properties else {}
+        element = XMLElement(tag, properties, "", [])
+        if stack:
+            stack[-1][0].children.append(element)
+        yield "start", element
+        if self_closing:
+            yield "end", element
+        else:
+            stack.append((element, []))
+
+    while stack:
+        element, pieces = stack.pop()
+        element.content = ''.join(pieces).strip()
+        yield "end", element
+
+
+def iter_text(content, tags):
+    """
+    Stream the text of selected elements without keeping the tree.
+
+    Parameters:
+    content (str): A string of XML markup to parse.
+    tags (iterable of str): Tag names whose text is wanted.
+
+    Yields:
+    tuple: (tag, content) for each matching element, in closing order.
+    """
+    tags = set(tags)
+    for event, element in iterparse(content):
+        if event == "end" and element.tag in tags:
+            yield element.tag, element.content
+
+
+def parse_fields(content, tag_fields, skip=()):
+    """
+    Tag-selective parse: collect only the text of indexed elements, without
+    building XMLElements. An element belongs to the field of its own tag or,
+    if its tag has none, to the field of its nearest enclosing element; text
+    outside any field is never joined or stripped. The subtree of a tag in
+    skip is jumped over with one search for its closing tag.
+
+    Parameters:
+    content (str or list of str): An XML document or its lines/segments.
+    tag_fields (dict): {tag: field name} of the indexed elements.
+    skip (iterable of str): Tags whose whole subtree holds nothing to index.
+
+    Returns:
+    tuple: (itemid of the <newsitem> element or "", list of (field, text) with
+    each element's own text, stripped, in document order).
+    """
+    if not isinstance(content, str):
+        content = ''.join(content)
+    skip = frozenset(skip)
+    newsID = ""
+    texts = []
+    stack = []  # open (tag, field, text pieces, slot in texts), innermost last
+    pos = 0
+    while True:
+        match = TAG_PATTERN.search(content, pos)
+        if match is None:
+            break
+        start = match.start()
+        if stack and stack[-1][1] is not None and start > pos:
+            stack[-1][2].append(content[pos:start])
+        pos = match.end()
+
+        closing, tag, raw_properties = match.group(1, 2, 3)
+        if tag is None:
+            continue
+        if closing:
+            if any(open_tag == tag for open_tag, _, _, _ in stack):
+                while True:
+                    open_tag, field, pieces, slot = stack.pop()
+                    if field is not None:
+                        texts[slot] = (field, ''.join(pieces).strip())
+                    if open_tag == tag:
+                        break
+            continue
+
+        if tag == "newsitem":
+            newsID = dict(PROP_PATTERN.findall(raw_properties)).get("itemid", "")
+        if raw_properties.endswith('/'):
+            continue
+        if tag in skip:
+            end = content.find(f"</{tag}>", pos)
+            pos = len(content) if end < 0 else end + len(tag) + 3
+            continue
+        field = tag_fields.get(tag, stack[-1][1] if stack else None)
+        slot = len(texts)
+        if field is not None:
+            texts.append(None)
+        stack.append((tag, field, [], slot))
+
+    while stack:
+        _, field, pieces, slot = stack.pop()
+        if field is not None:
+            texts[slot] = (field, ''.join(pieces).strip())
+    return newsID, [entry for entry in texts if entry[1]]
+
+
 class XMLCollection:
     """
     Parses XML content into a tree of XMLElement objects and provides both tree and flat views.
@@ -29,165 +182,45 @@ class XMLCollection:
         Initialize the XMLCollection by parsing raw XML content.
 
         Parameters:
-        file_content (list of str): Lines or segments of an XML document.
+        file_content (str or list of str): An XML document or its lines/segments.
         """
-        self.root_elements = self.parse_xml(file_content)
-        # For backward compatibility, also maintain a flat list of all elements
-        self.elements = self.flatten_elements(self.root_elements)
+        self.root_elements, self.elements = self.parse_xml(file_content)
 
     def parse_xml(self, content):
         """
         Parse raw XML content into top-level XMLElement objects.
 
         Parameters:
-        content (list of str): Lines or segments of the XML document.
+        content (str or list of str): The XML document or its lines/segments.
 
         Returns:
-        list of XMLElement: Top-level elements parsed from the content.
+        tuple: (top-level XMLElements, flat list of all elements in document order).
         """
-        full_content = ''.join(content)
+        full_content = content if isinstance(content, str) else ''.join(content)
         return self.parse_elements(full_content)
 
     def parse_elements(self, content):
         """
-        Recursively parse XML content and build an element tree.
+        Build the element tree from a single pass of iterparse events.
 
         Parameters:
         content (str): A string of XML markup to parse.
 
         Returns:
-        list of XMLElement: Parsed elements found at the current level.
-        """
-        elements = []
-        pos = 0
-        content_length = len(content)
-
-        while pos < content_length:
-            tag_start = content.find('<', pos)
-            if tag_start == -1:
-                break
-
-            # Skip declarations and comments
-            if content[tag_start:].startswith('<?') or content[tag_start:].startswith('<!'):
-                tag_end = content.find('>', tag_start)
-                if tag_end == -1:
-                    break
-                pos = tag_end + 1
-                continue
-
-            # Handle self-closing tags
-            self_closing_match = re.match(r'<(\w+)([^>]*)/>', content[tag_start:])
-            if self_closing_match:
-                tag = self_closing_match.group(1)
-                raw_properties = self_closing_match.group(2).strip()
-                properties = {}
-                if raw_properties:
-                    prop_pattern = r'(\w+)=["\'](.*?)["\']'
-                    properties = {m.group(1): m.group(2) for m in re.finditer(prop_pattern, raw_properties)}
-                element = XMLElement(tag, properties, "", [])
-                elements.append(element)
-                pos = tag_start + len(self_closing_match.group(0))
-                continue
-
-            # Handle opening tags
-            tag_match = re.match(r'<(\w+)([^>]*)>', content[tag_start:])
-            if not tag_match:
-                pos = tag_start + 1
-                continue
-
-            tag = tag_match.group(1)
-            raw_properties = tag_match.group(2).strip()
-            inner_start = tag_start + len(tag_match.group(0))
-
-            open_tag = f'<{tag}'
-            close_tag = f'</{tag}>'
-            nesting_level = 1
-            close_pos = inner_start
-
-            # Find matching closing tag, accounting for nesting
-            while nesting_level > 0 and close_pos < content_length:
-                next_open = content.find(open_tag, close_pos)
-                next_close = content.find(close_tag, close_pos)
-                if next_close == -1:
-                    break
-                if next_open != -1 and next_open < next_close:
-                    close_pos = next_open + len(open_tag)
-                    if content[close_pos:close_pos+1] in [' ', '>', '/']:
-                        nesting_level += 1
-                else:
-                    close_pos = next_close + len(close_tag)
-                    nesting_level -= 1
-
-            if nesting_level > 0:
-                pos = tag_start + 1
-                continue
-
-            inner_content = content[inner_start:next_close]
-            properties = {}
-            if raw_properties:
-                prop_pattern = r'(\w+)=["\'](.*?)["\']'
-                properties = {m.group(1): m.group(2) for m in re.finditer(prop_pattern, raw_properties)}
-
-            children = self.parse_elements(inner_content)
-            pure_content = self.extract_pure_content(inner_content, children)
-            element = XMLElement(tag, properties, pure_content, children)
-            elements.append(element)
-            pos = close_pos
-
-        return elements
-
-    def extract_pure_content(self, full_content, children):
-        """
-        Extract text content that is not part of any child elements.
-
-        Parameters:
-        full_content (str): The inner XML markup of a parent element.
-        children (list of XMLElement): Child elements parsed from the content.
-
-        Returns:
-        str: The concatenated text outside of child tags.
+        tuple: (top-level XMLElements, flat list of all elements in document order).
         """
-        if not children:
-            return re.sub(r'<[^>]*>', '', full_content).strip()
-
-        temp_content = full_content
-        for child in children:
-            child_tag = child.tag
-            open_tag = f'<{child_tag}'
-            close_tag = f'</{child_tag}>'
-            start_pos = 0
-            while True:
-                tag_start = temp_content.find(open_tag, start_pos)
-                if tag_start == -1:
-                    break
-                tag_end = temp_content.find('>', tag_start)
-                if tag_end == -1:
-                    start_pos = tag_start + 1
-                    continue
-                inner_start = tag_end + 1
-                nesting_level = 1
-                close_pos = inner_start
-                while nesting_level > 0 and close_pos < len(temp_content):
-                    next_open = temp_content.find(open_tag, close_pos)
-                    next_close = temp_content.find(close_tag, close_pos)
-                    if next_close == -1:
-                        break
-                    if next_open != -1 and next_open < next_close:
-                        close_pos = next_open + len(open_tag)
-                        if close_pos < len(temp_content) and temp_content[close_pos:close_pos+1] in [' ', '>', '/']:
-                            nesting_level += 1
-                    else:
-                        close_pos = next_close + len(close_tag)
-                        nesting_level -= 1
-                if nesting_level > 0:
-                    start_pos = tag_start + 1
-                    continue
-                full_match = temp_content[tag_start:close_pos]
-                temp_content = temp_content.replace(full_match, '', 1)
-                start_pos = tag_start
-        temp_content = re.sub(r'<\w+[^>]*/>', '', temp_content)
-        temp_content = re.sub(r'<[^>]*>', '', temp_content)
-        return temp_content.strip()
+        roots = []
+        flattened = []
+        depth = 0
+        for event, element in iterparse(content):
+            if event == "start":
+                if depth == 0:
+                    roots.append(element)
+                flattened.append(element)
+                depth += 1
+            elif event == "end":
+                depth -= 1
+        return roots, flattened
 
     def flatten_elements(self, elements, flattened=None):
         """
@@ -206,4 +239,3 @@ class XMLCollection:
             flattened.append(element)
             self.flatten_elements(element.children, flattened)
         return flattened
-
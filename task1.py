@@ -1,5 +1,6 @@
 from src.Parser import Rev1_Parser
 from src.Q_Parser import Q_Parser
+from src.Export import write_term_stats
 
 
 def main():
@@ -40,7 +41,7 @@ def main():
     Rev1_Coll = Rev1_Parser("common-english-words.txt", "RCV1v2")
 
     with open("ZachEdwards_Q1.txt", "w", encoding="utf-8") as f:
-        f.write(str(Rev1_Coll))
+        write_term_stats(Rev1_Coll, f)
 
         for query in Q1_queries:
             query_tf = Q_Parser(query, "common-english-words.txt")
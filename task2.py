@@ -1,4 +1,5 @@
 from src.Parser import Rev1_Parser, Q_Collection
+from src.Export import write_tfidf, write_rankings
 
 def main():
 
@@ -40,29 +41,11 @@ def main():
     # TASK 2.3
     with open("ZachEdwards_Q2.txt", "w", encoding="utf-8") as f:
 
-        for news_dict in Rev1_Coll.newscollectiondict.values():
-            f.write(f"Document {news_dict["news_item"].newsID} contains {news_dict["news_item"].get_size()} terms\n")
-            if len(news_dict["tf_idf"]) > 30:
-                i = 0
-                for term in news_dict["tf_idf"]:
-                    if i == 30:
-                        break
-                    f.write(f"{term} : {news_dict["tf_idf"][term]}\n")
-                    i += 1
-            else:
-                for term in news_dict["tf_idf"]:
-                    f.write(f"{term} : {news_dict["tf_idf"][term]}\n")
-
-            f.write("\n")
+        write_tfidf(Rev1_Coll, f, limit=30)
 
         Q2_queries = ["FRANCE: Reuters French Advertising & Media Digest - Aug 6", "UK: Britain's Channel 5 to broadcast Fashion Awards.", "ISRAEL: Shooting, protests spread in Gaza, West Bank", "ISRAEL: Death toll 33 Arabs, 10 Israelis at 1400 gmt."]
 
-        for query in Q2_queries:
-            scores = Q_Collection(query, Rev1_Coll, "common-english-words.txt")
-            f.write(f"The Ranking Result for query: {query}\n\n")
-            for doc in scores.keys():
-                f.write(f"{doc} : {scores[doc]}\n")
-            f.write("\n")
+        write_rankings(((query, Q_Collection(query, Rev1_Coll, "common-english-words.txt")) for query in Q2_queries), f)
 
 main()
 
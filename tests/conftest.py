@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA_DIR = os.path.join(ROOT, "RCV1v2")
+STOP_WORDS = os.path.join(ROOT, "common-english-words.txt")
+
+
+@pytest.fixture
+def collection():
+    from src.Parser import Rev1_Parser
+    return Rev1_Parser(STOP_WORDS, DATA_DIR)
@@ -0,0 +1,11 @@
+from conftest import DATA_DIR, STOP_WORDS
+from src.Benchmark import INDEX_STAGES, run_benchmark
+
+
+def test_index_build_is_timed_from_the_constructor():
+    result = run_benchmark(DATA_DIR, STOP_WORDS, ["Rocket attacks", "Fashion awards"], top_k=3)
+    stages = result["build_stages"]
+    assert all(name in stages for name in INDEX_STAGES)
+    assert result["index_build_seconds"] == sum(stages[name]["seconds"] for name in INDEX_STAGES)
+    assert result["index_build_seconds"] <= result["ingest_seconds"]
+    assert result["latency"]["bm25_topk"]["queries"] == 2
@@ -0,0 +1,24 @@
+from conftest import DATA_DIR, STOP_WORDS
+from src import DocStore as docstore
+from src.Parser import Rev1_Parser
+
+
+def test_headline_and_body_parse_once(tmp_path, monkeypatch):
+    collection = Rev1_Parser(STOP_WORDS, DATA_DIR, doc_store=str(tmp_path / "docs.bin"))
+    store = collection.documents
+    nid = next(iter(collection.newscollectiondict))
+    expected = store.fields(nid)
+
+    parses = []
+    parse = docstore.XMLCollection
+    monkeypatch.setattr(docstore, "XMLCollection", lambda text: parses.append(1) or parse(text))
+    store.parsed = None
+    assert store.headline(nid) == expected["headline"]
+    assert store.body(nid) == expected["text"]
+    collection.result_snippets({nid: 1.0}, "Rocket attacks")
+    assert len(parses) == 1
+
+    store.fields(nid)["headline"] = "changed"
+    assert store.headline(nid) == expected["headline"]
+    store.add(nid, f"<newsitem itemid=\"{nid}\"><headline>New</headline></newsitem>")
+    assert store.headline(nid) == "New"
@@ -0,0 +1,76 @@
+import io
+import json
+from itertools import islice
+
+import pytest
+
+from conftest import STOP_WORDS
+from src.Export import write_term_stats, write_tfidf, write_rankings, read_binary
+from src.Parser import Q_Collection
+
+QUERIES = ["FRANCE: Reuters French Advertising & Media Digest - Aug 6",
+           "ISRAEL: Shooting, protests spread in Gaza, West Bank"]
+
+
+def baseline_tfidf(collection):
+    # The task 2 output loop the writer replaced
+    lines = []
+    for nd in collection.newscollectiondict.values():
+        lines.append(f"Document {nd['news_item'].newsID} contains {nd['news_item'].get_size()} terms\n")
+        for term in islice(nd["tf_idf"], 30):
+            lines.append(f"{term} : {nd['tf_idf'][term]}\n")
+        lines.append("\n")
+    return "".join(lines)
+
+
+def baseline_rankings(rankings):
+    lines = []
+    for query, scores in rankings:
+        lines.append(f"The Ranking Result for query: {query}\n\n")
+        for doc in scores.keys():
+            lines.append(f"{doc} : {scores[doc]}\n")
+        lines.append("\n")
+    return "".join(lines)
+
+
+def export(writer, *args, **kwargs):
+    out = io.StringIO()
+    writer(*args, out, **kwargs)
+    return out.getvalue()
+
+
+def export_binary(writer, *args):
+    out = io.BytesIO()
+    writer(*args, out, "binary")
+    out.seek(0)
+    return list(read_binary(out))
+
+
+def test_text_writers_match_baseline_output(collection):
+    # Task 1 wrote str() of every NewsItem, joined by blank lines
+    expected = "\n".join(str(nd["news_item"]) for nd in collection.newscollectiondict.values())
+    assert export(write_term_stats, collection, chunk_size=100) == expected
+    assert export(write_tfidf, collection, chunk_size=100) == baseline_tfidf(collection)
+    rankings = [(query, Q_Collection(query, collection, STOP_WORDS)) for query in QUERIES]
+    assert export(write_rankings, iter(rankings), chunk_size=100) == baseline_rankings(rankings)
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "binary"])
+def test_structured_formats_hold_the_text_records(collection, fmt):
+    rankings = [(query, Q_Collection(query, collection, STOP_WORDS, 5)) for query in QUERIES]
+    exports = [(write_term_stats, collection), (write_tfidf, collection), (write_rankings, rankings)]
+    for writer, source in exports:
+        if fmt == "jsonl":
+            records = [json.loads(line) for line in export(writer, source, fmt="jsonl").splitlines()]
+        else:
+            records = export_binary(writer, source)
+        if writer is write_rankings:
+            assert [(r["query"], r["results"]) for r in records] == rankings
+            continue
+        docs = collection.newscollectiondict.values()
+        assert [r["newsID"] for r in records] == [nd["news_item"].newsID for nd in docs]
+        for record, nd in zip(records, docs):
+            if writer is write_term_stats:
+                assert list(record["terms"].items()) == list(nd["news_item"].ordered_terms.items())
+            else:
+                assert list(record["weights"]) == list(islice(nd["tf_idf"], 30))
@@ -0,0 +1,19 @@
+from conftest import DATA_DIR, STOP_WORDS
+from src.Fields import DEFAULT_SKIP, FieldSchema
+from src.Parser import Rev1_Parser
+
+
+def test_custom_fields_skip_nothing_by_default():
+    assert FieldSchema().skip == DEFAULT_SKIP
+    assert FieldSchema({"doc": "newsitem"}).skip == ()
+    assert FieldSchema({"doc": "newsitem"}, skip=["metadata"]).skip == ("metadata",)
+
+
+def test_whole_document_field_matches_default_build(collection):
+    fielded = Rev1_Parser(STOP_WORDS, DATA_DIR, schema=FieldSchema({"doc": "newsitem"}))
+    assert list(fielded.newscollectiondict) == list(collection.newscollectiondict)
+    for nid, nd in collection.newscollectiondict.items():
+        item = fielded.newscollectiondict[nid]["news_item"]
+        assert list(item.iter_terms()) == list(nd["news_item"].iter_terms())
+        assert item.get_size() == nd["news_item"].get_size()
+    assert fielded.df == collection.df
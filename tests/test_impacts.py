@@ -0,0 +1,12 @@
+from conftest import DATA_DIR, STOP_WORDS
+from src.Parser import Rev1_Parser
+from src.QueryCache import QueryCache
+
+
+def test_enabling_impacts_invalidates_cached_rankings():
+    collection = Rev1_Parser(STOP_WORDS, DATA_DIR, query_cache=QueryCache())
+    exact = collection.my_bm25("Rocket attacks", collection.df)
+    impacts = collection.build_bm25_impacts(bits=8)
+    quantized = collection.my_bm25("Rocket attacks", collection.df)
+    assert quantized == collection.rank_scores(impacts.scores(collection.query_parser.parse("Rocket attacks")))
+    assert quantized != exact
@@ -0,0 +1,49 @@
+import math
+import os
+import shutil
+
+import pytest
+
+from conftest import DATA_DIR, STOP_WORDS
+from src.Parser import Rev1_Parser, Q_Collection
+
+ADDED = ["741299news.xml", "80283news.xml"]
+QUERIES = ["Rocket attacks", "FRANCE: Reuters French Advertising & Media Digest - Aug 6",
+           "ISRAEL: Shooting, protests spread in Gaza, West Bank"]
+
+
+def assert_same_index(collection, expected):
+    assert collection.df == expected.df
+    assert collection.ndocs == expected.ndocs and collection.avg_length() == expected.avg_length()
+    assert set(collection.postings) == set(expected.postings)
+    for term, plist in expected.postings.items():
+        assert dict(collection.postings[term]) == dict(plist)
+    for query in QUERIES:
+        for ranked, wanted in ((Q_Collection(query, collection, STOP_WORDS), Q_Collection(query, expected, STOP_WORDS)),
+                               (collection.my_bm25(query, collection.df), expected.my_bm25(query, expected.df))):
+            assert ranked.keys() == wanted.keys()
+            assert all(math.isclose(ranked[nid], score, abs_tol=1e-12) for nid, score in wanted.items())
+        # Added documents come last in collection order, which only breaks ties
+        top = collection.my_bm25(query, collection.df, 3).values()
+        wanted = expected.my_bm25(query, expected.df, 3).values()
+        assert all(math.isclose(a, b, abs_tol=1e-12) for a, b in zip(top, wanted))
+
+
+@pytest.mark.parametrize("compress_postings", [False, True])
+def test_add_then_remove_matches_fresh_build(tmp_path, compress_postings):
+    part = tmp_path / "part"
+    shutil.copytree(DATA_DIR, part, ignore=shutil.ignore_patterns(*ADDED))
+    collection = Rev1_Parser(STOP_WORDS, str(part), compress_postings=compress_postings)
+    version = collection.version
+
+    collection.add_document(os.path.join(DATA_DIR, ADDED[0]))
+    with open(os.path.join(DATA_DIR, ADDED[1]), encoding="utf-8") as f:
+        collection.add_document(f.read())
+    assert collection.version > version
+    assert_same_index(collection, Rev1_Parser(STOP_WORDS, DATA_DIR))
+
+    version = collection.version
+    for name in ADDED:
+        collection.remove_document(name[:-len("news.xml")])
+    assert collection.version > version
+    assert_same_index(collection, Rev1_Parser(STOP_WORDS, str(part)))
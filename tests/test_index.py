@@ -0,0 +1,110 @@
+import os
+import tarfile
+import zipfile
+
+from conftest import DATA_DIR, STOP_WORDS
+from src.Fields import FieldSchema
+from src.Parser import Rev1_Parser
+from src.Postings import CompressedPostings
+from src.Stats import Instrumentation
+
+
+def test_fresh_index_keeps_requested_structures(tmp_path):
+    index = str(tmp_path / "rcv1.idx")
+    for _ in range(2):
+        collection = Rev1_Parser(STOP_WORDS, DATA_DIR, index, compress_postings=True, positions=True)
+        assert isinstance(collection.postings, CompressedPostings)
+        assert collection.positions is not None
+        assert collection.rank_positional('"rocket attacks"', top_k=3)
+
+
+def test_fresh_index_is_loaded(tmp_path):
+    index = str(tmp_path / "rcv1.idx")
+    built = Rev1_Parser(STOP_WORDS, DATA_DIR, index)
+    loaded = Rev1_Parser(STOP_WORDS, DATA_DIR, index)
+    assert loaded.positions is None
+    assert loaded.my_bm25("Rocket attacks", loaded.df) == built.my_bm25("Rocket attacks", built.df)
+
+
+def test_loaded_index_records_into_callers_stats(tmp_path):
+    index = str(tmp_path / "rcv1.idx")
+    Rev1_Parser(STOP_WORDS, DATA_DIR, index)
+    stats = Instrumentation()
+    loaded = Rev1_Parser(STOP_WORDS, DATA_DIR, index, stats=stats)
+    assert loaded.stats is stats and loaded.analyzer.stats is stats
+    loaded.remove_document("741299")
+    assert "analyze.stem" not in stats.stages
+    loaded.add_document(os.path.join(DATA_DIR, "741299news.xml"))
+    assert stats.stages["analyze.stem"].calls
+    loaded.my_bm25("Rocket attacks", loaded.df)
+    assert stats.queries[-1]["model"] == "bm25"
+
+
+def test_loaded_documents_are_lazy_and_editable(tmp_path):
+    index = str(tmp_path / "rcv1.idx")
+    built = Rev1_Parser(STOP_WORDS, DATA_DIR, index)
+    loaded = Rev1_Parser(STOP_WORDS, DATA_DIR, index)
+    docs = loaded.newscollectiondict
+    assert not docs.cache
+    assert list(docs) == list(built.newscollectiondict)
+    assert loaded.my_bm25("Rocket attacks", loaded.df) == built.my_bm25("Rocket attacks", built.df)
+    assert len(docs.cache) < len(docs)
+
+    nid = next(iter(docs))
+    item = built.newscollectiondict[nid]["news_item"]
+    assert dict(docs[nid]["news_item"].iter_terms()) == dict(item.iter_terms())
+    loaded.remove_document(nid)
+    built.remove_document(nid)
+    assert nid not in docs and len(docs) == len(built.newscollectiondict)
+    query = "Reuters French Advertising Media"
+    assert loaded.rank_tfidf(loaded.my_tfidf(loaded.query_parser.parse(query), loaded.df, loaded.ndocs)) == \
+        built.rank_tfidf(built.my_tfidf(built.query_parser.parse(query), built.df, built.ndocs))
+
+
+def test_fresh_index_warm_starts_compressed_postings(tmp_path):
+    index = str(tmp_path / "rcv1.idx")
+    built = Rev1_Parser(STOP_WORDS, DATA_DIR, index)
+    loaded = Rev1_Parser(STOP_WORDS, DATA_DIR, index, compress_postings=True)
+    assert getattr(loaded, "index_mmap", None) is not None
+    assert isinstance(loaded.postings, CompressedPostings)
+    for term, plist in built.postings.items():
+        assert list(loaded.postings[term].items()) == list(plist.items())
+    for top_k in (None, 3):
+        assert loaded.my_bm25("Rocket attacks", loaded.df, top_k) == built.my_bm25("Rocket attacks", built.df, top_k)
+
+
+def test_unusable_fresh_index_is_not_rewritten(tmp_path):
+    index = str(tmp_path / "rcv1.idx")
+    Rev1_Parser(STOP_WORDS, DATA_DIR, index)
+    written = os.stat(index).st_mtime_ns
+    Rev1_Parser(STOP_WORDS, DATA_DIR, index, positions=True)
+    Rev1_Parser(STOP_WORDS, DATA_DIR, index, schema=FieldSchema())
+    assert os.stat(index).st_mtime_ns == written
+
+    schema_only = str(tmp_path / "schema.idx")
+    Rev1_Parser(STOP_WORDS, DATA_DIR, schema_only, schema=FieldSchema())
+    assert not os.path.exists(schema_only)
+
+
+def test_index_of_archive_list_is_saved_and_loaded(tmp_path):
+    names = sorted(os.listdir(DATA_DIR))
+    half = len(names) // 2
+    zip_path, tar_path = str(tmp_path / "a.zip"), str(tmp_path / "b.tar.gz")
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        for name in names[:half]:
+            archive.write(os.path.join(DATA_DIR, name), name)
+    with tarfile.open(tar_path, "w:gz") as archive:
+        for name in names[half:]:
+            archive.add(os.path.join(DATA_DIR, name), name)
+
+    sources = [zip_path, tar_path]
+    index = str(tmp_path / "archives.idx")
+    built = Rev1_Parser(STOP_WORDS, sources, index)
+    loaded = Rev1_Parser(STOP_WORDS, sources, index)
+    assert getattr(loaded, "index_mmap", None) is not None
+    assert loaded.ndocs == built.ndocs == len(names)
+    assert loaded.my_bm25("Rocket attacks", loaded.df) == built.my_bm25("Rocket attacks", built.df)
+
+    with zipfile.ZipFile(zip_path, "a") as archive:
+        archive.writestr("extra.txt", "")
+    assert getattr(Rev1_Parser(STOP_WORDS, sources, index), "index_mmap", None) is None
@@ -0,0 +1,30 @@
+from conftest import DATA_DIR, STOP_WORDS
+from src.Parser import Rev1_Parser, rank_many
+from src.Postings import CompressedPostings, posting_blocks, posting_probe
+
+QUERIES = ["Rocket attacks", "FRANCE: Reuters French Advertising & Media Digest - Aug 6",
+           "ISRAEL: Shooting, protests spread in Gaza, West Bank"]
+
+
+def test_compressed_postings_rank_like_dicts(collection):
+    compressed = Rev1_Parser(STOP_WORDS, DATA_DIR, compress_postings=True)
+    for term, plist in collection.postings.items():
+        blocks = list(posting_blocks(compressed.postings[term]))
+        assert [(nid, f) for nids, tfs in blocks for nid, f in zip(nids, tfs)] == list(plist.items())
+    for top_k in (None, 3):
+        for query in QUERIES:
+            assert compressed.my_bm25(query, compressed.df, top_k) == collection.my_bm25(query, collection.df, top_k)
+        for model in ("tfidf", "bm25"):
+            assert rank_many(QUERIES, compressed, STOP_WORDS, top_k, model) == \
+                rank_many(QUERIES, collection, STOP_WORDS, top_k, model)
+
+
+def test_probe_matches_lookups():
+    nids = ["d%d" % i for i in range(700)]
+    postings = CompressedPostings({nid: i for i, nid in enumerate(nids)})
+    postings["t"] = {nids[i]: i % 5 + 1 for i in range(0, 700, 3)}
+    plist = postings["t"]
+    probe = posting_probe(plist)
+    for i, nid in enumerate(nids):
+        assert probe(i, nid) == plist.get(nid, 0)
+    assert [nid for nids, _ in plist.blocks() for nid in nids] == list(plist)
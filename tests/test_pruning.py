@@ -0,0 +1,16 @@
+from conftest import DATA_DIR, STOP_WORDS
+from src.Parser import Rev1_Parser
+from src.Pruning import overlap_report
+from src.Q_Parser import QueryParser
+
+QUERIES = ["Rocket attacks", "ISRAEL: Shooting, protests spread in Gaza, West Bank"]
+
+
+def test_overlap_report_parses_with_given_stop_words():
+    collection = Rev1_Parser(STOP_WORDS, DATA_DIR)
+    collection.prune_tfidf(top_n=1000)
+    report = overlap_report(collection, QUERIES, STOP_WORDS, (1, 5))
+    assert report["queries"] == 2 and report["overlap"] == {1: 1.0, 5: 1.0}
+    # Stop-wording the first query away leaves it matching nothing
+    parser = QueryParser(["rocket", "attacks"])
+    assert overlap_report(collection, QUERIES, parser, (1, 5))["queries"] == 1
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from conftest import STOP_WORDS
+from src.Parser import Q_Collection
+from src.Service import SearchService, HTTPError
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_bm25_rejects_non_positive_top_k(collection, top_k):
+    with pytest.raises(ValueError):
+        collection.my_bm25("Rocket attacks", collection.df, top_k)
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_tfidf_rejects_non_positive_top_k(collection, top_k):
+    with pytest.raises(ValueError):
+        Q_Collection("Rocket attacks", collection, STOP_WORDS, top_k)
+
+
+def test_top_k_one_keeps_best(collection):
+    full = collection.my_bm25("Rocket attacks", collection.df)
+    assert list(collection.my_bm25("Rocket attacks", collection.df, 1)) == list(full)[:1]
+
+
+def test_service_rejects_k_zero(collection):
+    service = SearchService(collection, STOP_WORDS)
+    with pytest.raises(HTTPError) as exc:
+        asyncio.run(service.handle("GET", "/search?q=rocket&k=0", b""))
+    assert exc.value.status == 400
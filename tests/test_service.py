@@ -0,0 +1,51 @@
+import math
+import asyncio
+
+import pytest
+
+from conftest import STOP_WORDS
+from src.Parser import Q_Collection
+from src.Service import HTTPError, SearchService
+
+QUERIES = ["Rocket attacks", "FRANCE: Reuters French Advertising & Media Digest - Aug 6",
+           "rocket ATTACKS!", "US EPA ranks Geo Metro car most fuel-efficient 1997 car."]
+
+
+def test_rank_batch_matches_single_queries(collection):
+    service = SearchService(collection, STOP_WORDS)
+    batch = [(query, model, top_k) for model in ("tfidf", "bm25") for top_k in (None, 3) for query in QUERIES]
+    results = service.rank_batch(batch)
+    assert service.counters["deduplicated"] == 4
+    for (query, model, top_k), ranked in zip(batch, results):
+        if model == "tfidf":
+            expected = Q_Collection(query, collection, service.tfidf_parser, top_k)
+        else:
+            expected = collection.bm25_rank(collection.query_parser.parse(query), collection.df)
+            expected = dict(list(expected.items())[:top_k]) if top_k else expected
+        assert ranked == list(expected.items())
+
+
+def test_full_queue_is_rejected_on_admission(collection):
+    async def run():
+        service = SearchService(collection, STOP_WORDS, max_concurrency=1, max_queue=2)
+        results = await asyncio.gather(*(service.search("Rocket attacks", "bm25", 3) for _ in range(8)),
+                                       return_exceptions=True)
+        service.batcher.cancel()
+        return service, results
+
+    service, results = asyncio.run(run())
+    rejected = [r for r in results if isinstance(r, HTTPError)]
+    assert rejected and all(r.status == 503 for r in rejected)
+    assert len(rejected) < len(results)
+    assert service.counters["rejected"] == len(rejected)
+
+
+def test_sparse_engine_batches_match(collection):
+    pytest.importorskip("scipy")
+    from src.SparseEngine import SparseEngine
+    plain = SearchService(collection, STOP_WORDS)
+    sparse = SearchService(collection, STOP_WORDS, engine=SparseEngine(collection))
+    batch = [(query, model, 5) for model in ("tfidf", "bm25") for query in QUERIES]
+    for expected, ranked in zip(plain.rank_batch(batch), sparse.rank_batch(batch)):
+        assert [nid for nid, _ in ranked] == [nid for nid, _ in expected]
+        assert all(math.isclose(a, b, rel_tol=1e-9) for (_, a), (_, b) in zip(ranked, expected))
@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+from conftest import DATA_DIR, STOP_WORDS
+from src.Parser import Q_Collection, Rev1_Parser, rank_many
+from src.QueryCache import QueryCache
+
+pytest.importorskip("scipy")
+from src.SparseEngine import SparseEngine  # noqa: E402
+
+QUERIES = ["Rocket attacks", "FRANCE: Reuters French Advertising & Media Digest - Aug 6", "zzzz"]
+
+
+@pytest.mark.parametrize("top_k", [None, 1, 5, 1000])
+def test_sparse_rankings_match_collection(collection, top_k):
+    engine = SparseEngine(collection)
+    query_tfs = collection.query_parser.parse_many(QUERIES)
+    q_tfidfs = [collection.my_tfidf(query_tf, collection.df, collection.ndocs) for query_tf in query_tfs]
+    pairs = list(zip(engine.rank_tfidf_many(q_tfidfs, top_k), (collection.rank_tfidf(q, top_k) for q in q_tfidfs)))
+    pairs += zip(engine.rank_bm25_many(query_tfs, top_k), (collection.bm25_rank(q, collection.df, top_k)
+                                                           for q in query_tfs))
+    for ranked, expected in pairs:
+        assert list(ranked) == list(expected)
+        assert all(math.isclose(ranked[nid], score, rel_tol=1e-9, abs_tol=1e-12) for nid, score in expected.items())
+
+
+@pytest.mark.parametrize("top_k", [0, -1, 2.5])
+def test_sparse_rejects_invalid_top_k(collection, top_k):
+    engine = SparseEngine(collection)
+    with pytest.raises(ValueError):
+        engine.bm25("Rocket attacks", top_k)
+    with pytest.raises(ValueError):
+        engine.rank_tfidf({}, top_k)
+    scores = engine.score_bm25([collection.query_parser.parse("Rocket attacks")])
+    with pytest.raises(ValueError):
+        engine.rankings(scores, top_k)
+
+
+def test_engine_rankings_do_not_replace_cached_pruned_ones():
+    collection = Rev1_Parser(STOP_WORDS, DATA_DIR, query_cache=QueryCache())
+    collection.prune_tfidf(top_n=3)
+    collection.build_bm25_impacts(bits=8)
+    engine = SparseEngine(collection)
+    query = QUERIES[1]
+    sparse_tfidf, = rank_many([query], collection, STOP_WORDS, 5, "tfidf", engine)
+    sparse_bm25, = rank_many([query], collection, STOP_WORDS, 5, "bm25", engine)
+    pruned = Q_Collection(query, collection, STOP_WORDS, 5)
+    quantized = collection.my_bm25(query, collection.df, 5)
+    assert pruned != sparse_tfidf and quantized != sparse_bm25
+    collection.query_cache.clear()
+    assert Q_Collection(query, collection, STOP_WORDS, 5) == pruned
+    assert collection.my_bm25(query, collection.df, 5) == quantized